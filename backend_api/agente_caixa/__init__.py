@@ -0,0 +1,5 @@
+# agente_caixa/__init__.py
+"""
+Agente local do caixa: journal de vendas em SQLite para operar sem conexão
+com a API central, sincronizado em lotes quando a conexão volta.
+"""
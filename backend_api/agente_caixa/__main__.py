@@ -0,0 +1,40 @@
+# agente_caixa/__main__.py
+"""
+Executa o agente local do caixa.
+
+Uso (a partir de backend_api/):
+    python -m agente_caixa --api http://servidor:5000 --porta 5050 --journal caixa.db
+"""
+
+import argparse
+import logging
+import os
+from agente_caixa.app import create_agent_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agente local do caixa (vendas offline).")
+    parser.add_argument('--api', default=os.getenv('AGENTE_API_CENTRAL', 'http://localhost:5000'),
+                        help="URL da API central (padrão: AGENTE_API_CENTRAL ou http://localhost:5000).")
+    parser.add_argument('--porta', type=int, default=int(os.getenv('AGENTE_PORTA', 5050)),
+                        help="Porta local em que o frontend do caixa acessa o agente.")
+    parser.add_argument('--journal', default=os.getenv('AGENTE_JOURNAL', 'caixa_journal.db'),
+                        help="Arquivo SQLite do journal de vendas.")
+    parser.add_argument('--intervalo', type=float, default=5,
+                        help="Segundos entre tentativas de sincronização.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    app = create_agent_app(args.api, args.journal)
+    sincronizador = app.extensions['agente_caixa']
+    sincronizador.intervalo_vendas = args.intervalo
+    sincronizador.iniciar()
+    try:
+        app.run(host='0.0.0.0', port=args.porta, threaded=True)
+    finally:
+        sincronizador.parar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# agente_caixa/app.py
+
+import logging
+import uuid
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+from marshmallow import ValidationError
+from http import HTTPStatus
+from src.schemas.venda_schema import VendaSchema
+from src.utils.pagination import parse_ids
+from agente_caixa.journal import JournalVendas, REJEITADA
+from agente_caixa.cliente_central import ClienteCentral, CentralIndisponivelError
+from agente_caixa.sincronizador import Sincronizador
+
+logger = logging.getLogger(__name__)
+
+venda_schema = VendaSchema()
+
+# Cabeçalhos repassados entre o terminal e o servidor central pelo proxy
+CABECALHOS_REPASSADOS = ('Content-Type', 'Authorization', 'Idempotency-Key', 'X-Next-Cursor', 'Idempotent-Replayed')
+
+LIMITE_MAXIMO_IDS = 500 # Mesmo limite de ?ids= do servidor central
+
+
+def create_agent_app(url_central: str, caminho_journal: str, timeout: float = 3.0) -> Flask:
+    """
+    Agente local do caixa. O frontend aponta para ele em vez da API central:
+    vendas e consultas de produto funcionam sem conexão; o resto é repassado.
+    """
+    app = Flask(__name__)
+    CORS(app, expose_headers=['X-Next-Cursor', 'Idempotent-Replayed'])
+
+    journal = JournalVendas(caminho_journal)
+    cliente = ClienteCentral(url_central, timeout=timeout)
+    sincronizador = Sincronizador(journal, cliente)
+    app.extensions['agente_caixa'] = sincronizador
+
+    @app.route('/api/v1/vendas', methods=['POST'], strict_slashes=False)
+    def registrar_venda():
+        """
+        Valida como o servidor central, grava no journal e só então tenta enviar.
+        201: confirmada pelo servidor. 202: gravada localmente, será sincronizada.
+        """
+        data = request.get_json(silent=True)
+        try:
+            validada = venda_schema.load(data)
+        except ValidationError as e:
+            return jsonify({"message": "Erro de validação nos dados da venda.", "errors": e.messages}), HTTPStatus.BAD_REQUEST
+
+        def venda_pendente(venda):
+            """ 202: a venda fica no journal e a sincronização a envia com a mesma chave. """
+            return jsonify({
+                "message": "Venda registrada no caixa. Será enviada ao servidor quando a conexão voltar.",
+                "status": "pendente",
+                "chave_idempotencia": chave,
+                "data_venda": venda['data_venda'],
+                "valor_total": str(validada['valor_total']),
+                "troco": str(validada['troco'])
+            }), HTTPStatus.ACCEPTED
+
+        # Marcada como em envio antes de entrar no journal e até o resultado ser gravado:
+        # a sincronização em fundo não reenvia esta venda em paralelo
+        chave = str(uuid.uuid4())
+        with sincronizador.envio_online(chave):
+            venda = journal.registrar_venda(data, chave)
+            try:
+                resposta = cliente.enviar_venda(venda)
+            except CentralIndisponivelError as e:
+                logger.info(f"Venda {chave} mantida no journal (servidor central indisponível): {e}")
+                return venda_pendente(venda)
+
+            try:
+                corpo = resposta.json()
+            except ValueError:
+                corpo = None
+            if not isinstance(corpo, dict):
+                # Não é uma resposta da API (proxy, página de erro): a sincronização reenvia com a mesma chave
+                logger.warning(f"Venda {chave} mantida no journal (resposta {resposta.status_code} não é JSON da API).")
+                journal.registrar_tentativa(chave, {"status": "erro", "http_status": resposta.status_code})
+                return venda_pendente(venda)
+
+            if resposta.status_code in (HTTPStatus.CREATED, HTTPStatus.OK):
+                journal.marcar_sincronizada(chave, corpo['id_venda'])
+            elif resposta.status_code == HTTPStatus.CONFLICT and 'faltas' not in corpo:
+                # Chave ainda em processamento no servidor (como 'em_processamento' no lote): segue pendente
+                journal.registrar_tentativa(chave, corpo)
+                return venda_pendente(venda)
+            else:
+                # Recusa de negócio com o servidor no ar (estoque, cliente, caixa): o operador vê na hora
+                journal.marcar_rejeitada(chave, corpo)
+        return jsonify(corpo), resposta.status_code
+
+    @app.route('/api/v1/produtos', methods=['GET'], strict_slashes=False)
+    def listar_produtos():
+        """
+        Sem parâmetros: catálogo da última sincronização (preços e saldos podem estar defasados).
+        Com parâmetros (?q=, ?ids=, ?limite=, ?cursor=, ?campos=, ?ordem=): repassada ao
+        servidor central. Sem conexão, só ?ids= é respondida pelo catálogo local.
+        """
+        if not request.args:
+            return jsonify(journal.listar_produtos()), HTTPStatus.OK
+        try:
+            return _repassar_ao_central('v1/produtos')
+        except CentralIndisponivelError:
+            if set(request.args) != {'ids'}:
+                raise
+
+        try:
+            codigos = parse_ids(request.args.get('ids'), LIMITE_MAXIMO_IDS)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+        produtos = journal.buscar_produtos(codigos)
+        encontrados = {produto['codigo_produto'] for produto in produtos}
+        return jsonify({
+            "produtos": produtos,
+            "nao_encontrados": [codigo for codigo in codigos if codigo not in encontrados]
+        }), HTTPStatus.OK
+
+    @app.route('/api/v1/produtos/<int:codigo_produto>', methods=['GET'])
+    def buscar_produto(codigo_produto):
+        produto = journal.buscar_produto(codigo_produto)
+        if produto is None:
+            return jsonify({"message": "Produto não encontrado no catálogo local."}), HTTPStatus.NOT_FOUND
+        return jsonify(produto), HTTPStatus.OK
+
+    @app.route('/agente/status', methods=['GET'])
+    def status_agente():
+        return jsonify({
+            "vendas": journal.contagem_por_status(),
+            "ultima_sincronizacao": journal.obter_estado('ultima_sincronizacao'),
+            "catalogo_atualizado_em": journal.obter_estado('catalogo_atualizado_em')
+        }), HTTPStatus.OK
+
+    @app.route('/agente/vendas/rejeitadas', methods=['GET'])
+    def vendas_rejeitadas():
+        """ Vendas recusadas pelo servidor na sincronização: precisam de conferência manual. """
+        return jsonify(journal.listar_vendas(REJEITADA)), HTTPStatus.OK
+
+    @app.route('/agente/sincronizar', methods=['POST'])
+    def sincronizar_agora():
+        encerradas = sincronizador.drenar()
+        return jsonify({"encerradas": encerradas, "vendas": journal.contagem_por_status()}), HTTPStatus.OK
+
+    def _repassar_ao_central(caminho):
+        """ Repassa a requisição atual a /api/<caminho>. Levanta CentralIndisponivelError sem conexão. """
+        resposta = cliente.requisitar(
+            request.method, f"/api/{caminho}",
+            params=request.args,
+            data=request.get_data(),
+            headers={k: v for k, v in request.headers.items() if k in CABECALHOS_REPASSADOS}
+        )
+        cabecalhos = {k: v for k, v in resposta.headers.items() if k in CABECALHOS_REPASSADOS}
+        return Response(resposta.content, status=resposta.status_code, headers=cabecalhos)
+
+    @app.errorhandler(CentralIndisponivelError)
+    def central_indisponivel(e):
+        return jsonify({"message": "Servidor central indisponível. Operação disponível apenas online."}), HTTPStatus.SERVICE_UNAVAILABLE
+
+    @app.route('/api/<path:caminho>', methods=['GET', 'POST', 'PUT', 'DELETE'])
+    def repassar(caminho):
+        """ Demais rotas da API: repassadas ao servidor central (exigem conexão). """
+        return _repassar_ao_central(caminho)
+
+    return app
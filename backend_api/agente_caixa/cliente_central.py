@@ -0,0 +1,54 @@
+# agente_caixa/cliente_central.py
+
+import requests
+
+
+class CentralIndisponivelError(Exception):
+    """ Servidor central fora do ar, lento demais ou com erro interno (5xx). """
+
+
+class ClienteCentral:
+    """ Cliente HTTP da API central (o mesmo backend usado pelo frontend). """
+
+    def __init__(self, url_base: str, timeout: float = 3.0):
+        self.url_base = url_base.rstrip('/')
+        self.timeout = timeout
+        self.sessao = requests.Session()
+
+    def requisitar(self, metodo: str, caminho: str, **kwargs) -> requests.Response:
+        """
+        Executa a requisição e devolve a resposta (inclusive 4xx, que são respostas de negócio).
+        Levanta CentralIndisponivelError quando não há resposta útil do servidor.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        try:
+            resposta = self.sessao.request(metodo, f"{self.url_base}{caminho}", **kwargs)
+        except requests.RequestException as e:
+            raise CentralIndisponivelError(str(e)) from e
+
+        if resposta.status_code >= 500:
+            raise CentralIndisponivelError(f"Servidor central respondeu {resposta.status_code}.")
+        return resposta
+
+    def enviar_venda(self, venda: dict) -> requests.Response:
+        """ POST /vendas com a chave do journal como Idempotency-Key (reenvio seguro). """
+        payload = {k: v for k, v in venda.items() if k not in ('chave_idempotencia', 'data_venda')}
+        return self.requisitar(
+            'POST', '/api/v1/vendas/', json=payload,
+            headers={'Idempotency-Key': venda['chave_idempotencia']}
+        )
+
+    def enviar_lote(self, vendas: list[dict]) -> list[dict]:
+        """ POST /vendas/lote. Retorna os resultados na ordem das vendas enviadas. """
+        resposta = self.requisitar('POST', '/api/v1/vendas/lote', json={'vendas': vendas}, timeout=self.timeout * 10)
+        if resposta.status_code != 200:
+            raise CentralIndisponivelError(f"Lote recusado pelo servidor central ({resposta.status_code}): {resposta.text}")
+        return resposta.json()['resultados']
+
+    def buscar_catalogo(self, desde: int = None) -> dict:
+        """ GET /produtos/catalogo: alterações desde a versão informada (ou o catálogo completo). """
+        params = {'desde': desde} if desde is not None else {}
+        resposta = self.requisitar('GET', '/api/v1/produtos/catalogo', params=params, timeout=self.timeout * 10)
+        if resposta.status_code != 200:
+            raise CentralIndisponivelError(f"Falha ao baixar o catálogo ({resposta.status_code}).")
+        return resposta.json()
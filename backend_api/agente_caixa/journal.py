@@ -0,0 +1,211 @@
+# agente_caixa/journal.py
+
+import json
+import sqlite3
+import uuid
+from datetime import datetime
+from src.utils.pagination import ordenar_por_ids
+
+# Status das vendas no journal
+PENDENTE = 'pendente'        # Ainda não confirmada pelo servidor central
+SINCRONIZADA = 'sincronizada' # Gravada no servidor (id_venda conhecido)
+REJEITADA = 'rejeitada'      # Recusada pelo servidor (estoque, validação...): requer conferência
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS venda_journal (
+        chave TEXT PRIMARY KEY,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pendente',
+        id_venda INTEGER,
+        resultado TEXT,
+        tentativas INTEGER NOT NULL DEFAULT 0,
+        criado_em TEXT NOT NULL,
+        sincronizado_em TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_venda_journal_status ON venda_journal (status, criado_em);
+
+    CREATE TABLE IF NOT EXISTS produto_catalogo (
+        codigo_produto INTEGER PRIMARY KEY,
+        codigo_barras TEXT,
+        dados TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_produto_catalogo_barras ON produto_catalogo (codigo_barras);
+
+    CREATE TABLE IF NOT EXISTS agente_estado (
+        chave TEXT PRIMARY KEY,
+        valor TEXT
+    );
+"""
+
+
+class JournalVendas:
+    """
+    Journal local (SQLite) do caixa: toda venda é gravada aqui antes de
+    qualquer tentativa de envio ao servidor central, e só sai do status
+    'pendente' quando o servidor confirma. Guarda também a cópia local
+    do catálogo de produtos para consultas sem conexão.
+
+    Cada operação abre a sua conexão: o journal é usado pelas requisições
+    do agente e pela thread de sincronização ao mesmo tempo.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        with self._conectar() as conn:
+            # WAL: leitores não bloqueiam a gravação; FULL: venda confirmada sobrevive a queda de energia
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.executescript(_SCHEMA)
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=FULL;")
+        return conn
+
+    def _executar(self, funcao):
+        conn = self._conectar()
+        try:
+            with conn: # COMMIT ao final (ou ROLLBACK em exceção)
+                return funcao(conn)
+        finally:
+            conn.close()
+
+    # --- VENDAS ---
+
+    def registrar_venda(self, payload: dict, chave: str = None) -> dict:
+        """
+        Grava a venda (payload no formato do POST /vendas) como pendente.
+        Usa a chave de idempotência informada (ou gera uma) e fixa a data original da venda.
+        Retorna o payload completo, pronto para POST /vendas/lote.
+        """
+        registro = dict(payload)
+        registro['chave_idempotencia'] = chave or str(uuid.uuid4())
+        registro['data_venda'] = datetime.now().isoformat(timespec='seconds')
+
+        self._executar(lambda conn: conn.execute(
+            "INSERT INTO venda_journal (chave, payload, criado_em) VALUES (?, ?, ?)",
+            (registro['chave_idempotencia'], json.dumps(registro), registro['data_venda'])
+        ))
+        return registro
+
+    def pendentes(self, limite: int = 100) -> list[dict]:
+        """ Vendas ainda não confirmadas, da mais antiga para a mais nova. """
+        linhas = self._executar(lambda conn: conn.execute(
+            "SELECT payload FROM venda_journal WHERE status = ? ORDER BY criado_em, rowid LIMIT ?",
+            (PENDENTE, limite)
+        ).fetchall())
+        return [json.loads(linha['payload']) for linha in linhas]
+
+    def marcar_sincronizada(self, chave: str, id_venda: int):
+        self._executar(lambda conn: conn.execute(
+            "UPDATE venda_journal SET status = ?, id_venda = ?, sincronizado_em = ? WHERE chave = ?",
+            (SINCRONIZADA, id_venda, datetime.now().isoformat(timespec='seconds'), chave)
+        ))
+
+    def marcar_rejeitada(self, chave: str, resultado: dict):
+        self._executar(lambda conn: conn.execute(
+            "UPDATE venda_journal SET status = ?, resultado = ?, sincronizado_em = ? WHERE chave = ?",
+            (REJEITADA, json.dumps(resultado), datetime.now().isoformat(timespec='seconds'), chave)
+        ))
+
+    def registrar_tentativa(self, chave: str, resultado: dict = None):
+        """ Falha transitória: a venda continua pendente para o próximo envio. """
+        self._executar(lambda conn: conn.execute(
+            "UPDATE venda_journal SET tentativas = tentativas + 1, resultado = ? WHERE chave = ?",
+            (json.dumps(resultado) if resultado else None, chave)
+        ))
+
+    def buscar_venda(self, chave: str):
+        linha = self._executar(lambda conn: conn.execute(
+            "SELECT chave, status, id_venda, resultado, tentativas, criado_em, sincronizado_em "
+            "FROM venda_journal WHERE chave = ?", (chave,)
+        ).fetchone())
+        return self._venda_dict(linha) if linha else None
+
+    def listar_vendas(self, status: str, limite: int = 100) -> list[dict]:
+        linhas = self._executar(lambda conn: conn.execute(
+            "SELECT chave, status, id_venda, resultado, tentativas, criado_em, sincronizado_em "
+            "FROM venda_journal WHERE status = ? ORDER BY criado_em DESC, rowid DESC LIMIT ?",
+            (status, limite)
+        ).fetchall())
+        return [self._venda_dict(linha) for linha in linhas]
+
+    def contagem_por_status(self) -> dict:
+        linhas = self._executar(lambda conn: conn.execute(
+            "SELECT status, COUNT(*) AS total FROM venda_journal GROUP BY status"
+        ).fetchall())
+        contagem = {PENDENTE: 0, SINCRONIZADA: 0, REJEITADA: 0}
+        contagem.update({linha['status']: linha['total'] for linha in linhas})
+        return contagem
+
+    @staticmethod
+    def _venda_dict(linha) -> dict:
+        venda = dict(linha)
+        venda['resultado'] = json.loads(venda['resultado']) if venda['resultado'] else None
+        return venda
+
+    # --- CATÁLOGO ---
+
+    def substituir_catalogo(self, produtos: list[dict]):
+        """ Troca a cópia local do catálogo pela lista recebida do servidor (atômico). """
+        def substituir(conn):
+            conn.execute("DELETE FROM produto_catalogo")
+            conn.executemany(
+                "INSERT INTO produto_catalogo (codigo_produto, codigo_barras, dados) VALUES (?, ?, ?)",
+                [(p['codigo_produto'], p.get('codigo_barras'), json.dumps(p)) for p in produtos]
+            )
+        self._executar(substituir)
+        self.definir_estado('catalogo_atualizado_em', datetime.now().isoformat(timespec='seconds'))
+
+    def aplicar_alteracoes_catalogo(self, produtos: list[dict], excluidos: list[int]):
+        """ Aplica uma sincronização incremental: sobrescreve os alterados e remove os excluídos. """
+        def aplicar(conn):
+            conn.executemany(
+                "INSERT INTO produto_catalogo (codigo_produto, codigo_barras, dados) VALUES (?, ?, ?) "
+                "ON CONFLICT (codigo_produto) DO UPDATE SET codigo_barras = excluded.codigo_barras, dados = excluded.dados",
+                [(p['codigo_produto'], p.get('codigo_barras'), json.dumps(p)) for p in produtos]
+            )
+            conn.executemany("DELETE FROM produto_catalogo WHERE codigo_produto = ?", [(c,) for c in excluidos])
+        self._executar(aplicar)
+        self.definir_estado('catalogo_atualizado_em', datetime.now().isoformat(timespec='seconds'))
+
+    def listar_produtos(self) -> list[dict]:
+        linhas = self._executar(lambda conn: conn.execute(
+            "SELECT dados FROM produto_catalogo ORDER BY codigo_produto"
+        ).fetchall())
+        return [json.loads(linha['dados']) for linha in linhas]
+
+    def buscar_produto(self, codigo_produto: int):
+        linha = self._executar(lambda conn: conn.execute(
+            "SELECT dados FROM produto_catalogo WHERE codigo_produto = ?", (codigo_produto,)
+        ).fetchone())
+        return json.loads(linha['dados']) if linha else None
+
+    def buscar_produtos(self, codigos: list[int]) -> list[dict]:
+        """ Produtos do catálogo local na ordem dos códigos pedidos (os não encontrados ficam de fora). """
+        marcadores = ', '.join('?' * len(codigos))
+        linhas = self._executar(lambda conn: conn.execute(
+            f"SELECT dados FROM produto_catalogo WHERE codigo_produto IN ({marcadores})", codigos
+        ).fetchall())
+        return ordenar_por_ids([json.loads(linha['dados']) for linha in linhas], codigos, 'codigo_produto')
+
+    def buscar_produto_por_codigo_barras(self, codigo_barras: str):
+        linha = self._executar(lambda conn: conn.execute(
+            "SELECT dados FROM produto_catalogo WHERE codigo_barras = ?", (codigo_barras,)
+        ).fetchone())
+        return json.loads(linha['dados']) if linha else None
+
+    # --- ESTADO DO AGENTE ---
+
+    def definir_estado(self, chave: str, valor: str):
+        self._executar(lambda conn: conn.execute(
+            "INSERT INTO agente_estado (chave, valor) VALUES (?, ?) "
+            "ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor",
+            (chave, valor)
+        ))
+
+    def obter_estado(self, chave: str):
+        linha = self._executar(lambda conn: conn.execute(
+            "SELECT valor FROM agente_estado WHERE chave = ?", (chave,)
+        ).fetchone())
+        return linha['valor'] if linha else None
@@ -0,0 +1,135 @@
+# agente_caixa/sincronizador.py
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from agente_caixa.cliente_central import CentralIndisponivelError
+
+logger = logging.getLogger(__name__)
+
+# Vendas por POST /vendas/lote (o servidor aceita até 500 e grava em blocos de 100)
+TAMANHO_LOTE_SINCRONIZACAO = 100
+
+# Resultados de POST /vendas/lote que encerram a venda no journal
+STATUS_CONFIRMADOS = {'criada', 'repetida'}
+STATUS_REJEITADOS = {'invalida', 'estoque_insuficiente', 'recusada', 'conflito'}
+# Os demais ('em_processamento', 'erro') mantêm a venda pendente para o próximo ciclo
+
+
+class Sincronizador:
+    """
+    Esvazia o journal para o servidor central em lotes e mantém a cópia
+    local do catálogo atualizada. Roda em uma thread de fundo do agente.
+    """
+
+    def __init__(self, journal, cliente, intervalo_vendas: float = 5, intervalo_catalogo: float = 60):
+        self.journal = journal
+        self.cliente = cliente
+        self.intervalo_vendas = intervalo_vendas
+        self.intervalo_catalogo = intervalo_catalogo
+        self._parar = threading.Event()
+        self._thread = None
+        self._ultimo_catalogo = None
+        # Vendas sendo enviadas agora pelo POST /vendas do agente: ficam fora do lote
+        self._envios_online = set()
+        self._envios_lock = threading.Lock()
+
+    @contextmanager
+    def envio_online(self, chave: str):
+        """ Marca a venda como em envio direto (antes mesmo de gravá-la no journal) até o fim do bloco. """
+        with self._envios_lock:
+            self._envios_online.add(chave)
+        try:
+            yield
+        finally:
+            with self._envios_lock:
+                self._envios_online.discard(chave)
+
+    def aplicar_resultado(self, chave: str, resultado: dict):
+        """ Atualiza a venda do journal conforme a resposta do servidor para ela. """
+        status = resultado.get('status')
+        if status in STATUS_CONFIRMADOS:
+            self.journal.marcar_sincronizada(chave, resultado['id_venda'])
+        elif status in STATUS_REJEITADOS:
+            logger.warning(f"Venda {chave} rejeitada pelo servidor central: {resultado}")
+            self.journal.marcar_rejeitada(chave, resultado)
+        else:
+            self.journal.registrar_tentativa(chave, resultado)
+
+    def drenar(self) -> int:
+        """
+        Envia as vendas pendentes, em ordem, até esvaziar o journal ou perder a conexão.
+        Retorna quantas vendas saíram do status pendente.
+        """
+        encerradas = 0
+        while True:
+            pendentes = self.journal.pendentes(TAMANHO_LOTE_SINCRONIZACAO)
+            # As que o POST /vendas ainda está enviando ficam para o próximo ciclo (a resposta dele decide)
+            with self._envios_lock:
+                lote = [venda for venda in pendentes if venda['chave_idempotencia'] not in self._envios_online]
+            if not lote:
+                break
+            try:
+                resultados = self.cliente.enviar_lote(lote)
+            except CentralIndisponivelError as e:
+                logger.info(f"Servidor central indisponível; {len(lote)} venda(s) seguem no journal: {e}")
+                break
+
+            restantes = 0
+            for venda, resultado in zip(lote, resultados):
+                self.aplicar_resultado(venda['chave_idempotencia'], resultado)
+                if resultado.get('status') in STATUS_CONFIRMADOS | STATUS_REJEITADOS:
+                    encerradas += 1
+                else:
+                    restantes += 1
+
+            self.journal.definir_estado('ultima_sincronizacao', datetime.now().isoformat(timespec='seconds'))
+            # Falhas transitórias no lote: tenta de novo só no próximo ciclo
+            if restantes or len(pendentes) < TAMANHO_LOTE_SINCRONIZACAO or len(lote) < len(pendentes):
+                break
+        return encerradas
+
+    def atualizar_catalogo(self) -> bool:
+        """
+        Atualiza a cópia local do catálogo com o que mudou desde a última versão
+        recebida (ou com o catálogo completo, se o servidor assim responder).
+        Mantém a cópia atual se o servidor não responder.
+        """
+        versao = self.journal.obter_estado('catalogo_versao')
+        try:
+            catalogo = self.cliente.buscar_catalogo(int(versao) if versao else None)
+        except CentralIndisponivelError as e:
+            logger.info(f"Catálogo local mantido (servidor central indisponível): {e}")
+            return False
+
+        if catalogo['completo']:
+            self.journal.substituir_catalogo(catalogo['produtos'])
+        else:
+            self.journal.aplicar_alteracoes_catalogo(catalogo['produtos'], catalogo['excluidos'])
+        self.journal.definir_estado('catalogo_versao', str(catalogo['versao']))
+        return True
+
+    def executar_ciclo(self):
+        self.drenar()
+        agora = datetime.now()
+        if self._ultimo_catalogo is None or (agora - self._ultimo_catalogo).total_seconds() >= self.intervalo_catalogo:
+            if self.atualizar_catalogo():
+                self._ultimo_catalogo = agora
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                self.executar_ciclo()
+            except Exception as e:
+                logger.error(f"Erro no ciclo de sincronização do agente: {e}")
+            self._parar.wait(self.intervalo_vendas)
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._executar, name='sincronizador-caixa', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread:
+            self._thread.join()
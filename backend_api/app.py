@@ -5,6 +5,9 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 from config import Config
+from src import db_connection
+from src.utils.cache import get_cache_stats
+from src.models.produto_dao import recarregar_indice_autocomplete
 
 # IMPORTS DE BLUEPRINTS SEM DEPENDÊNCIA DO BCRYPT
 from src.controllers.cliente_controller import cliente_bp
@@ -16,6 +19,7 @@ from src.controllers.compra_controller import compra_bp
 from src.controllers.tipo_funcionario_controller import tipo_funcionario_bp
 from src.controllers.fornecedor_controller import fornecedor_bp
 from src.controllers.fluxo_caixa_controller import fluxo_caixa_bp
+from src.controllers.preco_controller import preco_bp
 
 # Bcrypt 
 from flask_bcrypt import Bcrypt
@@ -34,7 +38,7 @@ bcrypt = Bcrypt()
 def create_app(testing=False):
     # Inicializa instância do Flask
     app = Flask(__name__)
-    CORS(app) # Habilita CORS
+    CORS(app, expose_headers=['X-Next-Cursor', 'Idempotent-Replayed']) # Habilita CORS (e expõe o cursor de paginação)
 
     # Carrega configurações da classe Config
     app.config.from_object(Config)
@@ -46,12 +50,17 @@ def create_app(testing=False):
     # Inicializa o Bcrypt vinculado ao app
     bcrypt.init_app(app)
 
+    # Devolve a conexão da requisição ao pool no teardown
+    db_connection.init_app(app)
+
     # -----------------------------------------------------------
     # ROTINA AUTOMÁTICA PARA CRIAR ADMIN (caso não exista)
     # -----------------------------------------------------------
     with app.app_context():
         # initialize_application usará app.config.get("TESTING")
         initialize_application(app, bcrypt) 
+        # Índice em memória do autocompletar de produtos
+        recarregar_indice_autocomplete()
 
     # ================================================
     # IMPORT LOCAL PARA QUEBRAR CICLO (bcrypt → auth)
@@ -71,6 +80,7 @@ def create_app(testing=False):
     app.register_blueprint(fornecedor_bp, url_prefix='/api/v1/fornecedores')
     app.register_blueprint(produto_bp, url_prefix='/api/v1/produtos')
     app.register_blueprint(estoque_bp, url_prefix='/api/v1/estoque')
+    app.register_blueprint(preco_bp, url_prefix='/api/v1/precos')
 
     # Funcionários e Tipos
     app.register_blueprint(funcionario_bp, url_prefix='/api/v1/funcionarios')
@@ -89,6 +99,17 @@ def create_app(testing=False):
     def index():
         return jsonify({"message": "API Rodando! Versão: v1"})
 
+    # -----------------------------------------------------------
+    # STATUS DO BANCO (pool de conexões, repetições de transação e caches)
+    # -----------------------------------------------------------
+    @app.route('/api/v1/status', methods=['GET'])
+    def status():
+        return jsonify({
+            "pool": db_connection.get_pool().get_stats(),
+            "transacoes": db_connection.get_retry_stats(),
+            "cache": get_cache_stats()
+        })
+
     return app
 
 
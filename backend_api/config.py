@@ -1,6 +1,10 @@
 # config.py
 
 import os
+from dotenv import load_dotenv
+
+# Carrega o .env antes de ler as variáveis abaixo
+load_dotenv()
 
 class Config:
     # A chave secreta é essencial para segurança em sessões e proteção CSRF
@@ -14,4 +18,54 @@ class Config:
     DB_PORT = os.environ.get('DB_PORT')
     DB_NAME = os.environ.get('DB_NAME')
     DB_USER = os.environ.get('DB_USER')
-    DB_PASSWORD = os.environ.get('DB_PASSWORD')
\ No newline at end of file
+    DB_PASSWORD = os.environ.get('DB_PASSWORD')
+
+    # Checkout em uma única chamada à função registrar_venda_json (scripts/create_tables.py)
+    CHECKOUT_VIA_PROCEDURE = os.environ.get('CHECKOUT_VIA_PROCEDURE', 'false').lower() in ('1', 'true', 'sim')
+
+    # Pool de conexões (src/db_connection.py)
+    DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+    DB_POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', 300))  # segundos ociosa antes de ser encerrada
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))      # segundos de espera por uma conexão livre
+
+    # Repetição automática de transações em deadlock/falha de serialização (run_in_unit_of_work)
+    DB_RETRY_MAX_ATTEMPTS = int(os.environ.get('DB_RETRY_MAX_ATTEMPTS', 3))
+    DB_RETRY_BASE_DELAY = float(os.environ.get('DB_RETRY_BASE_DELAY', 0.05))  # segundos; dobra a cada tentativa
+    DB_RETRY_MAX_DELAY = float(os.environ.get('DB_RETRY_MAX_DELAY', 1))
+
+    # Idempotency-Key do POST /vendas (src/models/idempotencia_dao.py)
+    IDEMPOTENCIA_TTL_HORAS = int(os.environ.get('IDEMPOTENCIA_TTL_HORAS', 24))
+    IDEMPOTENCIA_ESPERA_SEGUNDOS = float(os.environ.get('IDEMPOTENCIA_ESPERA_SEGUNDOS', 5))  # espera por uma venda com a mesma chave em andamento
+
+    # Produtos de alta rotatividade: saldo dividido em N frações, uma por caixa (id_fluxo % N).
+    # 0 desativa. Rebalanceamento periódico: scripts/redistribuir_estoque.py
+    ESTOQUE_FRACOES = int(os.environ.get('ESTOQUE_FRACOES', 0))
+
+    # Cache do scan (ProdutoDAO.find_by_codigo_barras): dados de catálogo por código de barras
+    # e, à parte, o saldo de estoque com TTL curto. TTL 0 desativa a camada.
+    PRODUTO_CACHE_TAMANHO = int(os.environ.get('PRODUTO_CACHE_TAMANHO', 10000))
+    PRODUTO_CACHE_TTL = float(os.environ.get('PRODUTO_CACHE_TTL', 300))              # segundos
+    PRODUTO_CACHE_SALDO_TTL = float(os.environ.get('PRODUTO_CACHE_SALDO_TTL', 2))    # segundos
+
+    # Autocompletar de produtos em memória (GET /api/v1/produtos/autocomplete): recarga completa
+    # periódica, para refletir alterações feitas por outros processos da API
+    AUTOCOMPLETE_RECARGA_SEGUNDOS = float(os.environ.get('AUTOCOMPLETE_RECARGA_SEGUNDOS', 300))
+
+    # Popularidade dos produtos na ordem das buscas (scripts/atualizar_popularidade.py):
+    # cada venda vale metade a cada MEIA_VIDA dias; vendas mais antigas que JANELA são ignoradas
+    POPULARIDADE_MEIA_VIDA_DIAS = float(os.environ.get('POPULARIDADE_MEIA_VIDA_DIAS', 14))
+    POPULARIDADE_JANELA_DIAS = int(os.environ.get('POPULARIDADE_JANELA_DIAS', 90))
+
+    # Catálogo binário dos terminais (GET /api/v1/produtos/catalogo.bin), regenerado quando o catálogo muda
+    CATALOGO_BINARIO_PASTA = os.environ.get('CATALOGO_BINARIO_PASTA') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var')
+
+    # Scan do caixa (GET /api/v1/produtos/scan/<codigo>): promoções vigentes em memória, recarregadas a cada TTL
+    PROMOCAO_CACHE_TTL = float(os.environ.get('PROMOCAO_CACHE_TTL', 30))  # segundos
+
+    # Etiquetas de balança (EAN-13): PREFIXO + código do item (DIGITOS_CODIGO) + valor + dígito verificador.
+    # O valor é o preço total em centavos (BALANCA_VALOR=preco) ou o peso em gramas (BALANCA_VALOR=peso).
+    # O produto pesável é cadastrado com codigo_barras = PREFIXO + código do item (ex.: 200123)
+    BALANCA_PREFIXO = os.environ.get('BALANCA_PREFIXO', '2')
+    BALANCA_DIGITOS_CODIGO = int(os.environ.get('BALANCA_DIGITOS_CODIGO', 5))
+    BALANCA_VALOR = os.environ.get('BALANCA_VALOR', 'preco')
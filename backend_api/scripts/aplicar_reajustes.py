@@ -0,0 +1,23 @@
+import sys
+import os
+import argparse
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.models.reajuste_preco_dao import ReajustePrecoDAO
+
+# Aplica os reajustes de preço agendados (POST /api/v1/precos/reajustes com vigência)
+# cuja vigência já chegou. Rodar periodicamente: uma vez (cron) ou com --intervalo.
+def aplicar_reajustes():
+    for reajuste in ReajustePrecoDAO().aplicar_pendentes():
+        print(f"Reajuste {reajuste['id_reajuste']} aplicado: {reajuste['produtos_alterados']} produto(s) alterado(s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--intervalo", type=float, help="segundos entre execuções (repete até ser interrompido)")
+    args = parser.parse_args()
+
+    while True:
+        aplicar_reajustes()
+        if not args.intervalo:
+            break
+        time.sleep(args.intervalo)
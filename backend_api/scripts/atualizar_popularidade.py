@@ -0,0 +1,26 @@
+import sys
+import os
+import argparse
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import Config
+from src.models.produto_dao import ProdutoDAO
+
+# Recalcula a popularidade dos produtos (produto_popularidade) usada na ordem da
+# busca e do autocompletar. Rodar periodicamente: uma vez (cron) ou com --intervalo.
+def atualizar_popularidade(meia_vida_dias: float, janela_dias: int):
+    pontuados = ProdutoDAO().atualizar_popularidade(meia_vida_dias, janela_dias)
+    print(f"{pontuados} produto(s) com vendas nos últimos {janela_dias} dia(s) pontuado(s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--meia-vida-dias", type=float, default=Config.POPULARIDADE_MEIA_VIDA_DIAS)
+    parser.add_argument("--janela-dias", type=int, default=Config.POPULARIDADE_JANELA_DIAS)
+    parser.add_argument("--intervalo", type=float, help="segundos entre execuções (repete até ser interrompido)")
+    args = parser.parse_args()
+
+    while True:
+        atualizar_popularidade(args.meia_vida_dias, args.janela_dias)
+        if not args.intervalo:
+            break
+        time.sleep(args.intervalo)
@@ -3,6 +3,256 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.db_connection import get_db_connection
+import psycopg
+
+# Texto em minúsculas e sem acentos (mesma normalização de normalizar_busca, em src/utils/formatters.py)
+SEM_ACENTO_SQL = (
+    "translate(lower(coalesce({0}, '')), "
+    "'áàâãäåéèêëíìîïóòôõöúùûüçñ', 'aaaaaaeeeeiiiiooooouuuucn')"
+)
+
+# Recebe o payload validado pelo VendaSchema (JSONB) e executa a venda completa:
+# cliente, caixa aberto, baixa de estoque set-based, venda, itens e fluxo de caixa.
+# Retorna o recibo no mesmo formato de VendaDAO.buscar_por_id.
+# Erros de negócio usam SQLSTATEs próprios (tratados em VendaDAO):
+#   PV001 estoque insuficiente (DETAIL = JSON com as faltas)
+#   PV002 cliente não encontrado
+#   PV003 caixa não está aberto
+REGISTRAR_VENDA_JSON_SQL = """
+    CREATE OR REPLACE FUNCTION registrar_venda_json(p_venda JSONB)
+    RETURNS JSONB
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_cpf_cliente TEXT := NULLIF(regexp_replace(COALESCE(p_venda->>'cpf_cliente', ''), '[^0-9]', '', 'g'), '');
+        v_pagamento   JSONB := p_venda->'pagamentos'->0;
+        v_id_cliente  INTEGER;
+        v_id_fluxo    INTEGER;
+        v_id_venda    INTEGER;
+        v_faltas      JSONB;
+        v_fracoes     INTEGER := COALESCE((p_venda->>'fracoes_estoque')::int, 0);
+        v_servidos    INTEGER[] := '{}';
+    BEGIN
+        IF v_cpf_cliente IS NOT NULL THEN
+            SELECT id_cliente INTO v_id_cliente FROM cliente WHERE cpf_cnpj = v_cpf_cliente;
+            IF v_id_cliente IS NULL THEN
+                RAISE EXCEPTION 'O Cliente com CPF/CNPJ ''%'' não foi encontrado no sistema.', v_cpf_cliente
+                    USING ERRCODE = 'PV002';
+            END IF;
+        END IF;
+
+        SELECT id_fluxo INTO v_id_fluxo
+        FROM fluxo_caixa
+        WHERE cpf_funcionario_abertura = p_venda->>'cpf_funcionario' AND status = 'ABERTO'
+        ORDER BY data_hora_abertura DESC LIMIT 1
+        FOR SHARE;
+
+        IF v_id_fluxo IS NULL THEN
+            RAISE EXCEPTION 'Caixa não está aberto para o funcionário. ROLLBACK!' USING ERRCODE = 'PV003';
+        END IF;
+
+        -- Produtos de alta rotatividade: baixa na fração do caixa (ver EstoqueDAO.baixar_em_lote)
+        IF v_fracoes > 0 THEN
+            WITH pedido AS (
+                SELECT (i->>'codigo_produto')::int AS codigo_produto,
+                       SUM((i->>'quantidade_venda')::int)::int AS quantidade
+                FROM jsonb_array_elements(p_venda->'itens') AS i
+                GROUP BY 1
+            ),
+            trava AS (
+                SELECT f.codigo_produto
+                FROM estoque_fracao f
+                WHERE f.fracao = v_id_fluxo % v_fracoes
+                  AND f.codigo_produto IN (SELECT codigo_produto FROM pedido)
+                ORDER BY f.codigo_produto
+                FOR NO KEY UPDATE
+            ),
+            baixa AS (
+                UPDATE estoque_fracao f
+                SET quantidade = f.quantidade - p.quantidade
+                FROM pedido p
+                JOIN trava t ON t.codigo_produto = p.codigo_produto
+                WHERE f.codigo_produto = p.codigo_produto
+                  AND f.fracao = v_id_fluxo % v_fracoes
+                  AND f.quantidade >= p.quantidade
+                RETURNING f.codigo_produto
+            )
+            SELECT COALESCE(array_agg(codigo_produto), '{}') INTO v_servidos FROM baixa;
+        END IF;
+
+        WITH pedido AS (
+            SELECT (i->>'codigo_produto')::int AS codigo_produto,
+                   SUM((i->>'quantidade_venda')::int)::int AS quantidade
+            FROM jsonb_array_elements(p_venda->'itens') AS i
+            WHERE (i->>'codigo_produto')::int <> ALL (v_servidos)
+            GROUP BY 1
+        ),
+        trava AS (
+            -- Mesma ordem de travamento de EstoqueDAO.baixar_em_lote (evita deadlock)
+            SELECT e.codigo_produto
+            FROM estoque e
+            WHERE e.codigo_produto IN (SELECT codigo_produto FROM pedido)
+            ORDER BY e.codigo_produto
+            FOR NO KEY UPDATE
+        ),
+        livres AS (
+            SELECT f.codigo_produto, f.fracao, f.quantidade
+            FROM estoque_fracao f
+            WHERE f.codigo_produto IN (SELECT codigo_produto FROM pedido) AND f.quantidade > 0
+            ORDER BY f.codigo_produto, f.fracao
+            FOR NO KEY UPDATE SKIP LOCKED
+        ),
+        recolhido AS (
+            UPDATE estoque_fracao f
+            SET quantidade = 0
+            FROM livres l
+            WHERE f.codigo_produto = l.codigo_produto AND f.fracao = l.fracao
+            RETURNING f.codigo_produto, l.quantidade
+        ),
+        reforco AS (
+            SELECT codigo_produto, SUM(quantidade) AS quantidade FROM recolhido GROUP BY codigo_produto
+        ),
+        baixa AS (
+            UPDATE estoque e
+            SET quantidade = e.quantidade + COALESCE(r.quantidade, 0) - p.quantidade
+            FROM pedido p
+            JOIN trava t ON t.codigo_produto = p.codigo_produto
+            LEFT JOIN reforco r ON r.codigo_produto = p.codigo_produto
+            WHERE e.codigo_produto = p.codigo_produto
+              AND e.quantidade + COALESCE(r.quantidade, 0) >= p.quantidade
+            RETURNING e.codigo_produto
+        )
+        SELECT jsonb_agg(jsonb_build_object(
+                   'codigo_produto', p.codigo_produto,
+                   'solicitado', p.quantidade,
+                   'disponivel', COALESCE(s.quantidade, 0)
+               ) ORDER BY p.codigo_produto)
+        INTO v_faltas
+        FROM pedido p
+        LEFT JOIN estoque_saldo s ON s.codigo_produto = p.codigo_produto
+        WHERE p.codigo_produto NOT IN (SELECT codigo_produto FROM baixa);
+
+        IF v_faltas IS NOT NULL THEN
+            RAISE EXCEPTION 'Estoque insuficiente.' USING ERRCODE = 'PV001', DETAIL = v_faltas::text;
+        END IF;
+
+        INSERT INTO venda (
+            valor_total, cpf_cnpj_cliente, id_cliente, cpf_funcionario,
+            id_tipo_pagamento, valor_pago, troco, desconto, data_venda
+        )
+        VALUES (
+            (p_venda->>'valor_total')::numeric,
+            v_cpf_cliente,
+            v_id_cliente,
+            p_venda->>'cpf_funcionario',
+            (v_pagamento->>'id_tipo')::int,
+            (v_pagamento->>'valor_pago')::numeric,
+            (p_venda->>'troco')::numeric,
+            COALESCE((p_venda->>'desconto')::numeric, 0),
+            COALESCE((p_venda->>'data_venda')::timestamp, CURRENT_TIMESTAMP)
+        )
+        RETURNING id_venda INTO v_id_venda;
+
+        INSERT INTO venda_item (id_venda, codigo_produto, preco_unitario, quantidade_venda, valor_total)
+        SELECT v_id_venda,
+               (i->>'codigo_produto')::int,
+               (i->>'preco_unitario')::numeric,
+               (i->>'quantidade_venda')::int,
+               (i->>'subtotal')::numeric
+        FROM jsonb_array_elements(p_venda->'itens') WITH ORDINALITY AS t(i, ordem)
+        ORDER BY ordem;
+
+        INSERT INTO fluxo_caixa_movimento (id_fluxo, id_venda, valor, tipo)
+        VALUES (v_id_fluxo, v_id_venda, (p_venda->>'valor_total')::numeric, 'ENTRADA');
+
+        RETURN (
+            SELECT to_jsonb(v) || jsonb_build_object(
+                'tipo_pagamento_descricao', tp.descricao,
+                'nome_caixa', CONCAT(f.nome, ' ', f.sobrenome),
+                'nome_cliente', c.nome,
+                'mercado_cnpj', cm.cnpj,
+                'mercado_endereco', cm.endereco,
+                'mercado_razao_social', cm.razao_social,
+                'mercado_contato', cm.contato,
+                'itens', (
+                    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                               'codigo_produto', vi.codigo_produto,
+                               'quantidade_venda', vi.quantidade_venda,
+                               'preco_unitario', vi.preco_unitario,
+                               'subtotal', vi.valor_total,
+                               'nome_produto', p.nome
+                           ) ORDER BY vi.id_venda_item), '[]'::jsonb)
+                    FROM venda_item vi
+                    JOIN produto p ON vi.codigo_produto = p.codigo_produto
+                    WHERE vi.id_venda = v.id_venda
+                ),
+                'pagamentos', jsonb_build_array(jsonb_build_object(
+                    'id_tipo', v.id_tipo_pagamento,
+                    'valor_pago', v.valor_pago,
+                    'troco', v.troco,
+                    'descricao', tp.descricao
+                ))
+            )
+            FROM venda v
+            LEFT JOIN tipo_pagamento tp ON v.id_tipo_pagamento = tp.id_tipo
+            LEFT JOIN funcionario f ON v.cpf_funcionario = f.cpf
+            LEFT JOIN cliente c ON v.id_cliente = c.id_cliente
+            LEFT JOIN configuracao_mercado cm ON cm.id_config = 1
+            WHERE v.id_venda = v_id_venda
+        );
+    END;
+    $$;
+"""
+
+# Versão do catálogo = id da transação (xid8) que gravou a linha. Quem sincroniza recebe como
+# próxima versão o xmin do snapshot da leitura: toda transação com id menor já terminou e foi
+# vista, e as demais (em andamento) aparecem na próxima consulta.
+CATALOGO_VERSAO_SQL = """
+    CREATE OR REPLACE FUNCTION catalogo_marcar_versao()
+    RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        NEW.versao := pg_current_xact_id()::text::bigint;
+        -- Produto recriado com o mesmo código deixa de constar como excluído
+        IF TG_TABLE_NAME = 'produto' AND TG_OP = 'INSERT' THEN
+            DELETE FROM catalogo_exclusao WHERE codigo_produto = NEW.codigo_produto;
+        END IF;
+        RETURN NEW;
+    END;
+    $$;
+
+    CREATE OR REPLACE FUNCTION catalogo_registrar_exclusao()
+    RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        INSERT INTO catalogo_exclusao (codigo_produto, versao)
+        VALUES (OLD.codigo_produto, pg_current_xact_id()::text::bigint)
+        ON CONFLICT (codigo_produto) DO UPDATE SET versao = EXCLUDED.versao;
+        RETURN OLD;
+    END;
+    $$;
+"""
+
+# Histórico de preços: toda alteração de produto.preco (cadastro, importação, reajuste) vira uma
+# linha em produto_preco_historico, em um INSERT por comando (tabelas de transição). Os reajustes
+# (ReajustePrecoDAO) informam o id_reajuste pela configuração local da transação pdv.id_reajuste.
+PRECO_HISTORICO_SQL = """
+    CREATE OR REPLACE FUNCTION produto_registrar_preco()
+    RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        INSERT INTO produto_preco_historico (codigo_produto, preco_anterior, preco_novo, id_reajuste)
+        SELECT n.codigo_produto, a.preco, n.preco, NULLIF(current_setting('pdv.id_reajuste', true), '')::integer
+        FROM novos n
+        JOIN antigos a ON a.codigo_produto = n.codigo_produto
+        WHERE a.preco <> n.preco;
+        RETURN NULL;
+    END;
+    $$;
+"""
 
 def create_tables():
     conn = get_db_connection()
@@ -66,6 +316,193 @@ def create_tables():
             );
         """)
         
+        # Produtos de alta rotatividade: saldo dividido em frações por caixa (EstoqueDAO)
+        cur.execute("ALTER TABLE estoque ADD COLUMN IF NOT EXISTS alta_rotatividade BOOLEAN NOT NULL DEFAULT FALSE;")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS estoque_fracao (
+                codigo_produto INTEGER NOT NULL REFERENCES estoque(codigo_produto) ON DELETE CASCADE,
+                fracao SMALLINT NOT NULL,
+                quantidade INTEGER NOT NULL DEFAULT 0 CHECK (quantidade >= 0),
+                PRIMARY KEY (codigo_produto, fracao)
+            );
+        """)
+
+        # Saldo real do produto = linha central + frações (leitura consistente em uma consulta)
+        cur.execute("""
+            CREATE OR REPLACE VIEW estoque_saldo AS
+            SELECT e.codigo_produto, e.quantidade + COALESCE(SUM(f.quantidade), 0)::int AS quantidade
+            FROM estoque e
+            LEFT JOIN estoque_fracao f ON f.codigo_produto = e.codigo_produto
+            GROUP BY e.codigo_produto, e.quantidade;
+        """)
+
+        # Chaves de idempotência do POST /vendas (IdempotenciaDAO)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS venda_idempotencia (
+                chave VARCHAR(255) PRIMARY KEY,
+                hash_requisicao CHAR(64) NOT NULL,
+                id_venda INTEGER REFERENCES venda(id_venda) ON DELETE CASCADE,
+                criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expira_em TIMESTAMP NOT NULL
+            );
+        """)
+
+        # CPF/CNPJ do cliente só com dígitos, mantido pelo banco (busca de vendas por CPF)
+        cur.execute("""
+            ALTER TABLE venda ADD COLUMN IF NOT EXISTS cpf_cnpj_cliente_digitos VARCHAR(20)
+            GENERATED ALWAYS AS (REGEXP_REPLACE(cpf_cnpj_cliente, '[^0-9]', '', 'g')) STORED;
+        """)
+
+        # Busca de produtos (ProdutoDAO.buscar): texto em minúsculas e sem acentos, mantido pelo banco.
+        # translate() é imutável e dispensa a extensão unaccent.
+        cur.execute(f"""
+            ALTER TABLE produto ADD COLUMN IF NOT EXISTS nome_busca TEXT
+            GENERATED ALWAYS AS ({SEM_ACENTO_SQL.format("nome")}) STORED;
+        """)
+        cur.execute(f"""
+            ALTER TABLE produto ADD COLUMN IF NOT EXISTS busca_tsv tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('portuguese', {SEM_ACENTO_SQL.format("nome")}), 'A') ||
+                setweight(to_tsvector('portuguese', {SEM_ACENTO_SQL.format("descricao")}), 'B')
+            ) STORED;
+        """)
+
+        # Popularidade dos produtos (vendas recentes com decaimento), usada na ordem das buscas.
+        # Recalculada por scripts/atualizar_popularidade.py; 0..1 em relação ao mais vendido.
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS produto_popularidade (
+                codigo_produto INTEGER PRIMARY KEY REFERENCES produto(codigo_produto) ON DELETE CASCADE,
+                pontuacao REAL NOT NULL,
+                atualizado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+
+        # Sincronização incremental do catálogo (ProdutoDAO.catalogo_desde): cada linha de produto,
+        # estoque e estoque_fracao guarda o id da transação que a alterou por último.
+        # Exclusões de produto ficam registradas em catalogo_exclusao.
+        for tabela in ('produto', 'estoque', 'estoque_fracao'):
+            cur.execute(f"ALTER TABLE {tabela} ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 0;")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS catalogo_exclusao (
+                codigo_produto INTEGER PRIMARY KEY,
+                versao BIGINT NOT NULL
+            );
+        """)
+        cur.execute(CATALOGO_VERSAO_SQL)
+        for tabela in ('produto', 'estoque', 'estoque_fracao'):
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_{tabela}_versao ON {tabela};")
+            cur.execute(f"""
+                CREATE TRIGGER trg_{tabela}_versao BEFORE INSERT OR UPDATE ON {tabela}
+                FOR EACH ROW EXECUTE FUNCTION catalogo_marcar_versao();
+            """)
+        cur.execute("DROP TRIGGER IF EXISTS trg_produto_exclusao ON produto;")
+        cur.execute("""
+            CREATE TRIGGER trg_produto_exclusao AFTER DELETE ON produto
+            FOR EACH ROW EXECUTE FUNCTION catalogo_registrar_exclusao();
+        """)
+
+        # Reajustes de preço em lote (lista de preços ou percentual), imediatos ou agendados
+        # para 'vigencia' (aplicados por scripts/aplicar_reajustes.py), e o histórico de preços
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS reajuste_preco (
+                id_reajuste SERIAL PRIMARY KEY,
+                descricao VARCHAR(255),
+                percentual NUMERIC(7, 3),
+                id_fornecedor INTEGER REFERENCES fornecedor(id_fornecedor),
+                vigencia TIMESTAMPTZ NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'agendado' CHECK (status IN ('agendado', 'aplicado', 'cancelado')),
+                produtos_alterados INTEGER,
+                criado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+                aplicado_em TIMESTAMPTZ
+            );
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS reajuste_preco_item (
+                id_reajuste INTEGER NOT NULL REFERENCES reajuste_preco(id_reajuste) ON DELETE CASCADE,
+                codigo_produto INTEGER NOT NULL REFERENCES produto(codigo_produto) ON DELETE CASCADE,
+                preco NUMERIC(10, 2) CHECK (preco > 0),
+                PRIMARY KEY (id_reajuste, codigo_produto)
+            );
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS produto_preco_historico (
+                id_historico BIGSERIAL PRIMARY KEY,
+                codigo_produto INTEGER NOT NULL REFERENCES produto(codigo_produto) ON DELETE CASCADE,
+                preco_anterior NUMERIC(10, 2) NOT NULL,
+                preco_novo NUMERIC(10, 2) NOT NULL,
+                id_reajuste INTEGER REFERENCES reajuste_preco(id_reajuste) ON DELETE SET NULL,
+                alterado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+        """)
+        cur.execute(PRECO_HISTORICO_SQL)
+        cur.execute("DROP TRIGGER IF EXISTS trg_produto_preco ON produto;")
+        cur.execute("""
+            CREATE TRIGGER trg_produto_preco AFTER UPDATE ON produto
+            REFERENCING OLD TABLE AS antigos NEW TABLE AS novos
+            FOR EACH STATEMENT EXECUTE FUNCTION produto_registrar_preco();
+        """)
+
+        # Promoções por produto: preço promocional entre 'inicio' e 'fim', a partir de
+        # 'quantidade_minima' unidades. O caixa recebe as vigentes no scan (GET /produtos/scan)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS promocao (
+                id_promocao SERIAL PRIMARY KEY,
+                codigo_produto INTEGER NOT NULL REFERENCES produto(codigo_produto) ON DELETE CASCADE,
+                descricao VARCHAR(100),
+                preco_promocional NUMERIC(10, 2) NOT NULL CHECK (preco_promocional > 0),
+                quantidade_minima INTEGER NOT NULL DEFAULT 1 CHECK (quantidade_minima >= 1),
+                inicio TIMESTAMPTZ NOT NULL DEFAULT now(),
+                fim TIMESTAMPTZ NOT NULL,
+                CHECK (fim > inicio)
+            );
+        """)
+
+        # Índices das listagens de vendas (paginação por data_venda, id_venda e itens por venda)
+        print("Creating indexes...")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_venda_data_id ON venda (data_venda DESC, id_venda DESC);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_venda_item_id_venda ON venda_item (id_venda);")
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_venda_cpf_cliente_digitos
+            ON venda (cpf_cnpj_cliente_digitos, data_venda DESC, id_venda DESC)
+            WHERE cpf_cnpj_cliente_digitos IS NOT NULL;
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_venda_idempotencia_expira_em ON venda_idempotencia (expira_em);")
+
+        # Sincronização do catálogo. Sem índice em estoque.versao/estoque_fracao.versao:
+        # a baixa de estoque de cada venda continua sendo um UPDATE HOT (sem tocar índices)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_produto_versao ON produto (versao);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_catalogo_exclusao_versao ON catalogo_exclusao (versao);")
+
+        # Reajustes agendados a aplicar e histórico de preços por produto
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_reajuste_preco_agendado ON reajuste_preco (vigencia) WHERE status = 'agendado';")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_produto_preco_historico_produto ON produto_preco_historico (codigo_produto, alterado_em DESC);")
+
+        # Listagem paginada de produtos por nome ou preço (keyset com desempate pelo código)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_produto_nome_codigo ON produto (nome, codigo_produto);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_produto_preco_codigo ON produto (preco, codigo_produto);")
+
+        # Promoções ainda não encerradas (carregadas no cache do scan)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_promocao_fim ON promocao (fim);")
+
+        # Índices da busca de produtos (texto, prefixo do nome e prefixo do código de barras)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_produto_busca_tsv ON produto USING GIN (busca_tsv);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_produto_nome_busca_prefixo ON produto (nome_busca text_pattern_ops);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_produto_codigo_barras_prefixo ON produto (codigo_barras text_pattern_ops);")
+
+        # Trigramas (opcional): com pg_trgm, a busca também encontra trechos no meio das palavras
+        cur.execute("SAVEPOINT trigrama;")
+        try:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_produto_nome_busca_trgm ON produto USING GIN (nome_busca gin_trgm_ops);")
+            cur.execute("RELEASE SAVEPOINT trigrama;")
+        except psycopg.Error as e:
+            cur.execute("ROLLBACK TO SAVEPOINT trigrama;")
+            print(f"pg_trgm indisponível, busca de produtos só por texto e prefixo: {e}")
+
+        # Checkout em uma única chamada (VendaDAO com CHECKOUT_VIA_PROCEDURE)
+        print("Creating functions...")
+        cur.execute(REGISTRAR_VENDA_JSON_SQL)
+
         conn.commit()
         print("Tables created successfully")
     
@@ -0,0 +1,37 @@
+import sys
+import os
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.models.produto_dao import ProdutoDAO, ImportacaoInvalidaError
+
+# Importação em massa de produtos (carga de uma loja nova, listas de fornecedores).
+# Mesmo formato e regras de POST /api/v1/produtos/importar: cabeçalho com
+# nome, descricao, preco e, opcionalmente, codigo_barras e quantidade.
+def importar_produtos(caminho: str, simular: bool) -> bool:
+    with open(caminho, 'rb') as arquivo:
+        try:
+            relatorio = ProdutoDAO().importar_csv(arquivo, simular=simular)
+        except ImportacaoInvalidaError as e:
+            print(f"Arquivo recusado: {e}")
+            return False
+
+    if relatorio is None:
+        print("Erro ao importar os produtos (veja o log).")
+        return False
+
+    for erro in relatorio['erros']:
+        print(f"linha {erro['linha']}: {erro['erro']}")
+    acao = "validado(s)" if simular else "importado(s)"
+    print(
+        f"{relatorio['total']} linha(s): {relatorio['inseridos']} produto(s) novo(s) e "
+        f"{relatorio['atualizados']} existente(s) {acao}, {relatorio['rejeitados']} rejeitada(s)"
+    )
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("arquivo", help="CSV em UTF-8, separado por ',' ou ';'")
+    parser.add_argument("--simular", action="store_true", help="só valida o arquivo, sem gravar")
+    args = parser.parse_args()
+
+    sys.exit(0 if importar_produtos(args.arquivo, args.simular) else 1)
@@ -0,0 +1,13 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.models.idempotencia_dao import IdempotenciaDAO
+
+# Remove as chaves de idempotência vencidas (agendar, ex.: cron diário).
+# Chaves vencidas já são reaproveitadas na reserva; isto só mantém a tabela pequena.
+def limpar_idempotencia():
+    removidas = IdempotenciaDAO().remover_expiradas()
+    print(f"{removidas} chave(s) de idempotência expirada(s) removida(s)")
+
+if __name__ == "__main__":
+    limpar_idempotencia()
@@ -0,0 +1,25 @@
+import sys
+import os
+import argparse
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import Config
+from src.models.estoque_dao import EstoqueDAO
+
+# Rebalanceia as frações de estoque dos produtos de alta rotatividade
+# (ESTOQUE_FRACOES). Rodar periodicamente: uma vez (cron) ou com --intervalo.
+def redistribuir_estoque(fracoes: int):
+    processados = EstoqueDAO().redistribuir_fracoes(fracoes)
+    print(f"{processados} produto(s) de alta rotatividade redistribuído(s) em {fracoes} fração(ões)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fracoes", type=int, default=Config.ESTOQUE_FRACOES)
+    parser.add_argument("--intervalo", type=float, help="segundos entre execuções (repete até ser interrompido)")
+    args = parser.parse_args()
+
+    while True:
+        redistribuir_estoque(args.fracoes)
+        if not args.intervalo:
+            break
+        time.sleep(args.intervalo)
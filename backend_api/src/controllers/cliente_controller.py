@@ -4,6 +4,7 @@ from flask import Blueprint, request, jsonify
 from src.schemas.cliente_schema import ClienteSchema
 from src.models.cliente_dao import ClienteDAO
 from src.utils.formatters import clean_only_numbers
+from src.utils.pagination import parse_ids
 from http import HTTPStatus
 import logging
 
@@ -14,6 +15,9 @@ cliente_dao = ClienteDAO()
 cliente_schema = ClienteSchema()
 clientes_schema = ClienteSchema(many=True)
 
+# Busca em lote (GET /api/v1/clientes?ids=1,2,3)
+LIMITE_MAXIMO_IDS = 500
+
 
 @cliente_bp.route('/', methods=['POST'], strict_slashes=False)
 def create_cliente():
@@ -54,7 +58,9 @@ def create_cliente():
 
 @cliente_bp.route('/', methods=['GET'], strict_slashes=False)
 def get_all_clientes():
-    """ Rota para buscar todos os clientes cadastrados. """
+    """ Rota para buscar todos os clientes cadastrados. Com ?ids=1,2,3, busca esses clientes em lote. """
+    if 'ids' in request.args:
+        return _buscar_clientes_por_ids()
     
     clientes_data = cliente_dao.find_all() 
     
@@ -63,6 +69,23 @@ def get_all_clientes():
     else:
         return jsonify([]), HTTPStatus.OK
 
+def _buscar_clientes_por_ids():
+    """ GET /api/v1/clientes?ids=...: clientes na ordem pedida e os ids não encontrados. """
+    try:
+        ids = parse_ids(request.args.get('ids'), LIMITE_MAXIMO_IDS)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+
+    clientes_data = cliente_dao.find_by_ids(ids)
+    if clientes_data is None:
+        return jsonify({"message": "Erro ao buscar clientes."}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    encontrados = {cliente['id_cliente'] for cliente in clientes_data}
+    return jsonify({
+        "clientes": clientes_schema.dump(clientes_data),
+        "nao_encontrados": [i for i in ids if i not in encontrados]
+    }), HTTPStatus.OK
+
 @cliente_bp.route('/<string:identifier>', methods=['GET'])
 def get_cliente_unificado(identifier):
     """ 
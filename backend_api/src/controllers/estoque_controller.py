@@ -48,4 +48,22 @@ def update_estoque_quantity(codigo_produto):
     elif rows_affected == 0:
         return jsonify({"message": f"Produto {codigo_produto} não encontrado no estoque."}), http.HTTPStatus.NOT_FOUND
     else:
-        return jsonify({"message": "Falha na atualização de estoque (Erro interno).", "status": "Error"}), http.HTTPStatus.INTERNAL_SERVER_ERROR
\ No newline at end of file
+        return jsonify({"message": "Falha na atualização de estoque (Erro interno).", "status": "Error"}), http.HTTPStatus.INTERNAL_SERVER_ERROR
+
+@estoque_bp.route('/<int:codigo_produto>/alta-rotatividade', methods=['PUT'])
+def update_alta_rotatividade(codigo_produto):
+    """ 
+    Marca ({"ativo": true}) ou desmarca o produto como de alta rotatividade:
+    o saldo passa a ser dividido em frações por caixa (ESTOQUE_FRACOES).
+    """
+    data = request.get_json() or {}
+    ativo = data.get('ativo')
+
+    if not isinstance(ativo, bool):
+        return jsonify({"message": "O campo 'ativo' deve ser true ou false."}), http.HTTPStatus.BAD_REQUEST
+
+    rows_affected = estoque_dao.definir_alta_rotatividade(codigo_produto, ativo)
+
+    if rows_affected == 1:
+        return jsonify({"message": f"Alta rotatividade do produto {codigo_produto} {'ativada' if ativo else 'desativada'}."}), http.HTTPStatus.OK
+    return jsonify({"message": f"Produto {codigo_produto} não encontrado no estoque."}), http.HTTPStatus.NOT_FOUND
@@ -4,6 +4,7 @@ from flask import Blueprint, request, jsonify
 from src.schemas.fornecedor_schema import FornecedorSchema
 from src.models.fornecedor_dao import FornecedorDAO
 from src.utils.formatters import clean_only_numbers
+from src.utils.pagination import parse_ids
 from http import HTTPStatus
 import logging
 
@@ -14,6 +15,9 @@ fornecedor_dao = FornecedorDAO()
 fornecedor_schema = FornecedorSchema()
 fornecedores_schema = FornecedorSchema(many=True) 
 
+# Busca em lote (GET /api/v1/fornecedores?ids=1,2,3)
+LIMITE_MAXIMO_IDS = 500
+
 
 @fornecedor_bp.route('/', methods=['POST'])
 def create_fornecedor():
@@ -56,12 +60,32 @@ def create_fornecedor():
 
 @fornecedor_bp.route('/', methods=['GET'])
 def get_all_fornecedores():
-    """ Rota para listar todos os fornecedores. """
+    """ Rota para listar todos os fornecedores. Com ?ids=1,2,3, busca esses fornecedores em lote. """
+    if 'ids' in request.args:
+        return _buscar_fornecedores_por_ids()
+
     fornecedores_data = fornecedor_dao.find_all()
     if fornecedores_data is not None:
         return fornecedores_schema.dump(fornecedores_data), HTTPStatus.OK
     return jsonify({"message": "Erro ao buscar fornecedores."}), HTTPStatus.INTERNAL_SERVER_ERROR
 
+def _buscar_fornecedores_por_ids():
+    """ GET /api/v1/fornecedores?ids=...: fornecedores na ordem pedida e os ids não encontrados. """
+    try:
+        ids = parse_ids(request.args.get('ids'), LIMITE_MAXIMO_IDS)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+
+    fornecedores_data = fornecedor_dao.find_by_ids(ids)
+    if fornecedores_data is None:
+        return jsonify({"message": "Erro ao buscar fornecedores."}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    encontrados = {fornecedor['id_fornecedor'] for fornecedor in fornecedores_data}
+    return jsonify({
+        "fornecedores": fornecedores_schema.dump(fornecedores_data),
+        "nao_encontrados": [i for i in ids if i not in encontrados]
+    }), HTTPStatus.OK
+
 @fornecedor_bp.route('/<int:id_fornecedor>', methods=['GET'])
 def get_fornecedor(id_fornecedor):
     """ Rota para buscar um fornecedor pelo ID. """
@@ -0,0 +1,116 @@
+# src/controllers/preco_controller.py
+
+from flask import Blueprint, request, jsonify
+from src.schemas.reajuste_preco_schema import ReajustePrecoSchema
+from src.models.reajuste_preco_dao import ReajustePrecoDAO
+from src.schemas.promocao_schema import PromocaoSchema
+from src.models.promocao_dao import PromocaoDAO
+from marshmallow import ValidationError
+from http import HTTPStatus
+
+# Instanciação dos objetos globais
+reajuste_dao = ReajustePrecoDAO()
+reajuste_schema = ReajustePrecoSchema()
+reajustes_schema = ReajustePrecoSchema(many=True)
+promocao_dao = PromocaoDAO()
+promocao_schema = PromocaoSchema()
+promocoes_schema = PromocaoSchema(many=True)
+preco_bp = Blueprint('precos', __name__)
+
+STATUS_REAJUSTE = ('agendado', 'aplicado', 'cancelado')
+LIMITE_HISTORICO = 50
+
+
+@preco_bp.route('/reajustes', methods=['POST'])
+def criar_reajuste():
+    """
+    Reajuste de preços em lote (lista de preços ou percentual). Aplicado na hora
+    (200) ou agendado para a vigência informada (201).
+    """
+    try:
+        dados = reajuste_schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return jsonify({"message": "Erro de validação no reajuste.", "errors": err.messages}), HTTPStatus.BAD_REQUEST
+
+    try:
+        reajuste = reajuste_dao.criar(dados)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+    if reajuste is None:
+        return jsonify({"message": "Erro ao registrar o reajuste de preços."}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    status_http = HTTPStatus.CREATED if reajuste['status'] == 'agendado' else HTTPStatus.OK
+    return jsonify(reajuste_schema.dump(reajuste)), status_http
+
+
+@preco_bp.route('/reajustes', methods=['GET'])
+def listar_reajustes():
+    """ Reajustes registrados; ?status=agendado|aplicado|cancelado. """
+    status = request.args.get('status')
+    if status and status not in STATUS_REAJUSTE:
+        return jsonify({"message": f"status deve ser um de: {', '.join(STATUS_REAJUSTE)}."}), HTTPStatus.BAD_REQUEST
+    return jsonify(reajustes_schema.dump(reajuste_dao.find_all(status))), HTTPStatus.OK
+
+
+@preco_bp.route('/reajustes/<int:id_reajuste>', methods=['GET'])
+def buscar_reajuste(id_reajuste):
+    reajuste = reajuste_dao.find_by_id(id_reajuste)
+    if reajuste is None:
+        return jsonify({"message": "Reajuste não encontrado."}), HTTPStatus.NOT_FOUND
+    return jsonify(reajuste_schema.dump(reajuste)), HTTPStatus.OK
+
+
+@preco_bp.route('/reajustes/<int:id_reajuste>', methods=['DELETE'])
+def cancelar_reajuste(id_reajuste):
+    """ Cancela um reajuste agendado (os já aplicados não são desfeitos). """
+    if reajuste_dao.cancelar(id_reajuste):
+        return jsonify({"message": "Reajuste cancelado."}), HTTPStatus.OK
+    if reajuste_dao.find_by_id(id_reajuste) is None:
+        return jsonify({"message": "Reajuste não encontrado."}), HTTPStatus.NOT_FOUND
+    return jsonify({"message": "Só reajustes agendados podem ser cancelados."}), HTTPStatus.CONFLICT
+
+
+@preco_bp.route('/historico/<int:codigo_produto>', methods=['GET'])
+def historico_precos(codigo_produto):
+    """ Alterações de preço do produto (mais recentes primeiro). """
+    historico = reajuste_dao.historico(codigo_produto, LIMITE_HISTORICO)
+    for alteracao in historico:
+        alteracao['preco_anterior'] = str(alteracao['preco_anterior'])
+        alteracao['preco_novo'] = str(alteracao['preco_novo'])
+        alteracao['alterado_em'] = alteracao['alterado_em'].isoformat()
+    return jsonify(historico), HTTPStatus.OK
+
+
+@preco_bp.route('/promocoes', methods=['POST'])
+def criar_promocao():
+    """ Cadastra um preço promocional com período de validade. """
+    try:
+        dados = promocao_schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return jsonify({"message": "Erro de validação na promoção.", "errors": err.messages}), HTTPStatus.BAD_REQUEST
+
+    try:
+        promocao = promocao_dao.criar(dados)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+    if promocao is None:
+        return jsonify({"message": "Erro ao cadastrar a promoção."}), HTTPStatus.INTERNAL_SERVER_ERROR
+    return jsonify(promocao_schema.dump(promocao)), HTTPStatus.CREATED
+
+
+@preco_bp.route('/promocoes', methods=['GET'])
+def listar_promocoes():
+    """ Promoções não encerradas; ?codigo_produto= filtra, ?encerradas=true inclui as antigas. """
+    codigo_produto = request.args.get('codigo_produto', type=int)
+    encerradas = request.args.get('encerradas', 'false').lower() in ('1', 'true', 'sim')
+    return jsonify(promocoes_schema.dump(promocao_dao.find_all(codigo_produto, encerradas))), HTTPStatus.OK
+
+
+@preco_bp.route('/promocoes/<int:id_promocao>', methods=['DELETE'])
+def excluir_promocao(id_promocao):
+    rows_affected = promocao_dao.delete(id_promocao)
+    if rows_affected == 1:
+        return '', HTTPStatus.NO_CONTENT
+    if rows_affected == 0:
+        return jsonify({"message": "Promoção não encontrada."}), HTTPStatus.NOT_FOUND
+    return jsonify({"message": "Erro ao excluir a promoção."}), HTTPStatus.INTERNAL_SERVER_ERROR
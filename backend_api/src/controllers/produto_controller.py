@@ -1,16 +1,37 @@
 # src/controllers/produto_controller.py
 
-from flask import Blueprint, jsonify, request
-from src.models.produto_dao import ProdutoDAO
-from src.schemas.produto_schema import ProdutoSchema
+from flask import Blueprint, jsonify, request, send_file
+from src.models.produto_dao import ProdutoDAO, ImportacaoInvalidaError
+from src.services.catalogo_binario_service import obter_catalogo_binario
+from src.services.scan_service import escanear
+from src.utils.catalogo_binario import ler_cabecalho
+from src.schemas.produto_schema import ProdutoSchema, ScanSchema
 from marshmallow import ValidationError
+from src.utils.pagination import parse_limite, parse_ids
 import http
+import time
 
 # Instanciação
 produto_bp = Blueprint('produtos', __name__)
 produto_dao = ProdutoDAO()
 produto_schema = ProdutoSchema()         # Para um único objeto (POST, PUT)
 produtos_schema = ProdutoSchema(many=True) # Para listas (GET)
+scan_schema = ScanSchema()
+
+# Busca (GET /api/v1/produtos?q=...)
+LIMITE_PADRAO_BUSCA = 20
+LIMITE_MAXIMO_BUSCA = 100
+
+# Listagem paginada (GET /api/v1/produtos?limite=...&cursor=...)
+LIMITE_PADRAO_LISTAGEM = 50
+LIMITE_MAXIMO_LISTAGEM = 200
+
+# Busca em lote (GET /api/v1/produtos?ids=1,2,3)
+LIMITE_MAXIMO_IDS = 500
+
+# Autocompletar do caixa (GET /api/v1/produtos/autocomplete?q=...)
+LIMITE_PADRAO_AUTOCOMPLETE = 10
+LIMITE_MAXIMO_AUTOCOMPLETE = 50
 
 # =======================================================
 # 1. READ ALL & CREATE (GET /api/v1/produtos & POST /api/v1/produtos)
@@ -18,15 +39,181 @@ produtos_schema = ProdutoSchema(many=True) # Para listas (GET)
 
 @produto_bp.route('/', methods=['GET'], strict_slashes=False)
 def get_produtos():
-    """ Rota para listar todos os produtos (READ ALL). """
-    produtos_data = produto_dao.find_all()
-    
+    """ 
+    Rota para listar todos os produtos (READ ALL).
+    ?campos= (ex.: codigo_produto,nome,preco) limita as colunas retornadas e
+    ?ordem= (codigo_produto, nome ou preco; '-' para decrescente) a ordenação.
+    Com ?limite= (padrão 50, máximo 200) ou ?cursor=, devolve uma página
+    (cabeçalho X-Next-Cursor); sem eles, a lista completa.
+    Com ?q=, faz a busca por relevância (nome, descrição ou código de barras),
+    paginada por ?limite= (padrão 20, máximo 100) e ?cursor= (cabeçalho X-Next-Cursor).
+    Com ?ids=1,2,3, busca esses produtos em lote (até 500).
+    """
+    if 'q' in request.args:
+        return _buscar_produtos()
+    if 'ids' in request.args:
+        return _buscar_produtos_por_ids()
+
+    campos = [c.strip() for c in request.args.get('campos', '').split(',') if c.strip()] or None
+    ordem = request.args.get('ordem')
+    paginado = 'limite' in request.args or 'cursor' in request.args
+    try:
+        if paginado:
+            limite = parse_limite(request.args.get('limite'), LIMITE_PADRAO_LISTAGEM, LIMITE_MAXIMO_LISTAGEM)
+            pagina = produto_dao.find_all_paginado(campos, ordem, limite, request.args.get('cursor'))
+        else:
+            produtos_data = produto_dao.find_all(campos=campos, ordem=ordem)
+    except ValueError as e: # Campos/ordem inválidos ou CursorInvalidoError
+        return jsonify({"message": str(e)}), http.HTTPStatus.BAD_REQUEST
+
+    schema = ProdutoSchema(many=True, only=campos) if campos else produtos_schema
+    if paginado:
+        if pagina is None:
+            return jsonify({"message": "Erro ao buscar produtos."}), http.HTTPStatus.INTERNAL_SERVER_ERROR
+        response = jsonify(schema.dump(pagina['produtos']))
+        if pagina['proximo_cursor']:
+            response.headers['X-Next-Cursor'] = pagina['proximo_cursor']
+        return response, http.HTTPStatus.OK
+
     if produtos_data is not None:
-        result = produtos_schema.dump(produtos_data) 
+        result = schema.dump(produtos_data) 
         return jsonify(result), http.HTTPStatus.OK
     else:
         return jsonify({"message": "Erro ao buscar produtos."}), http.HTTPStatus.INTERNAL_SERVER_ERROR
 
+def _buscar_produtos():
+    """ GET /api/v1/produtos?q=...: página da busca por relevância. """
+    try:
+        limite = parse_limite(request.args.get('limite'), LIMITE_PADRAO_BUSCA, LIMITE_MAXIMO_BUSCA)
+        pagina = produto_dao.buscar(request.args.get('q', ''), limite=limite, cursor=request.args.get('cursor'))
+    except ValueError as e: # Inclui CursorInvalidoError
+        return jsonify({"message": str(e)}), http.HTTPStatus.BAD_REQUEST
+    except Exception:
+        return jsonify({"message": "Erro ao buscar produtos."}), http.HTTPStatus.INTERNAL_SERVER_ERROR
+
+    response = jsonify(produtos_schema.dump(pagina['produtos']))
+    if pagina['proximo_cursor']:
+        response.headers['X-Next-Cursor'] = pagina['proximo_cursor']
+    return response, http.HTTPStatus.OK
+
+def _buscar_produtos_por_ids():
+    """ GET /api/v1/produtos?ids=...: produtos na ordem pedida e os códigos não encontrados. """
+    try:
+        codigos = parse_ids(request.args.get('ids'), LIMITE_MAXIMO_IDS)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), http.HTTPStatus.BAD_REQUEST
+
+    produtos = produto_dao.find_by_ids(codigos)
+    if produtos is None:
+        return jsonify({"message": "Erro ao buscar produtos."}), http.HTTPStatus.INTERNAL_SERVER_ERROR
+
+    encontrados = {produto['codigo_produto'] for produto in produtos}
+    return jsonify({
+        "produtos": produtos_schema.dump(produtos),
+        "nao_encontrados": [codigo for codigo in codigos if codigo not in encontrados]
+    }), http.HTTPStatus.OK
+
+@produto_bp.route('/autocomplete', methods=['GET'])
+def autocompletar_produtos():
+    """ 
+    Sugestões enquanto o operador digita (nome ou código de barras), servidas
+    do índice em memória. ?q= e ?limite= (padrão 10, máximo 50).
+    """
+    try:
+        limite = parse_limite(request.args.get('limite'), LIMITE_PADRAO_AUTOCOMPLETE, LIMITE_MAXIMO_AUTOCOMPLETE)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), http.HTTPStatus.BAD_REQUEST
+
+    sugestoes = produto_dao.autocompletar(request.args.get('q', ''), limite)
+    return jsonify(produtos_schema.dump(sugestoes)), http.HTTPStatus.OK
+
+@produto_bp.route('/scan/<string:codigo_barras>', methods=['GET'])
+def escanear_produto(codigo_barras):
+    """
+    Scan do caixa: preço a cobrar, estoque, promoções vigentes e a leitura da
+    etiqueta de balança em uma resposta (src/services/scan_service.py).
+    O cabeçalho Server-Timing traz o tempo gasto no servidor.
+    """
+    inicio = time.perf_counter()
+    item = escanear(codigo_barras)
+    if item is None:
+        response = jsonify({"message": f"Produto com código de barras {codigo_barras} não encontrado."})
+        status = http.HTTPStatus.NOT_FOUND
+    else:
+        response = jsonify(scan_schema.dump(item))
+        status = http.HTTPStatus.OK
+    response.headers['Server-Timing'] = f"scan;dur={(time.perf_counter() - inicio) * 1000:.2f}"
+    return response, status
+
+@produto_bp.route('/catalogo', methods=['GET'])
+def sincronizar_catalogo():
+    """ 
+    Sincronização incremental do catálogo pelos terminais do caixa.
+    ?desde= com a 'versao' da resposta anterior: só alterados e excluídos.
+    Sem ?desde=: catálogo completo ('completo': true).
+    """
+    desde = request.args.get('desde')
+    if desde not in (None, ''):
+        try:
+            desde = int(desde)
+        except ValueError:
+            return jsonify({"message": "O parâmetro 'desde' deve ser a versão (número inteiro) da última sincronização."}), http.HTTPStatus.BAD_REQUEST
+    else:
+        desde = None
+
+    catalogo = produto_dao.catalogo_desde(desde)
+    if catalogo is None:
+        return jsonify({"message": "Erro ao sincronizar o catálogo."}), http.HTTPStatus.INTERNAL_SERVER_ERROR
+
+    catalogo['produtos'] = produtos_schema.dump(catalogo['produtos'])
+    return jsonify(catalogo), http.HTTPStatus.OK
+
+@produto_bp.route('/catalogo.bin', methods=['GET'])
+def baixar_catalogo_binario():
+    """
+    Catálogo completo no formato binário (src/utils/catalogo_binario.py), para a
+    carga inicial do terminal. ETag/If-None-Match pela versão; o header
+    X-Catalogo-Versao é o ?desde= da sincronização seguinte em /catalogo.
+    """
+    caminho = obter_catalogo_binario()
+    if caminho is None:
+        return jsonify({"message": "Erro ao gerar o catálogo binário."}), http.HTTPStatus.INTERNAL_SERVER_ERROR
+
+    # Cabeçalho e conteúdo do mesmo arquivo aberto, mesmo que seja regenerado durante o envio
+    arquivo = open(caminho, 'rb')
+    versao = ler_cabecalho(arquivo)['versao']
+    response = send_file(
+        arquivo, mimetype='application/octet-stream', download_name='catalogo.bin',
+        etag=str(versao), max_age=0
+    )
+    response.headers['X-Catalogo-Versao'] = str(versao)
+    return response
+
+@produto_bp.route('/importar', methods=['POST'])
+def importar_produtos():
+    """
+    Importação em massa por CSV (ProdutoDAO.importar_csv): arquivo no campo
+    'arquivo' (multipart) ou no corpo da requisição (text/csv).
+    ?simular=true só valida. Responde com o relatório por linha.
+    """
+    if request.mimetype == 'multipart/form-data':
+        arquivo = request.files.get('arquivo')
+        if arquivo is None:
+            return jsonify({"message": "Envie o CSV no campo 'arquivo'."}), http.HTTPStatus.BAD_REQUEST
+        arquivo = arquivo.stream
+    else:
+        arquivo = request.stream
+
+    simular = request.args.get('simular', 'false').lower() in ('1', 'true', 'sim')
+    try:
+        relatorio = produto_dao.importar_csv(arquivo, simular=simular)
+    except ImportacaoInvalidaError as e:
+        return jsonify({"message": str(e)}), http.HTTPStatus.BAD_REQUEST
+
+    if relatorio is None:
+        return jsonify({"message": "Erro ao importar os produtos."}), http.HTTPStatus.INTERNAL_SERVER_ERROR
+    return jsonify(relatorio), http.HTTPStatus.OK
+
 @produto_bp.route('/', methods=['POST'], strict_slashes=False)
 def create_produto():
     """ Rota para criar um novo produto (CREATE), incluindo estoque inicial. """
@@ -1,17 +1,42 @@
 # src/controllers/venda_controller.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import csv
+import io
+import itertools
+import json
 import logging
 from src.schemas.venda_schema import VendaSchema
 from src.models.venda_dao import VendaDAO
+from src.models.estoque_dao import EstoqueInsuficienteError
+from src.models.idempotencia_dao import ChaveIdempotenciaEmUsoError, ChaveIdempotenciaReutilizadaError
 from marshmallow import ValidationError
 from http import HTTPStatus
-from datetime import date 
+from datetime import date, datetime
 from src.utils.formatters import clean_only_numbers 
+from src.utils.pagination import parse_limite
 
 venda_dao = VendaDAO() 
 venda_schema = VendaSchema() 
 
+# Limite da coluna venda_idempotencia.chave
+TAMANHO_MAXIMO_CHAVE_IDEMPOTENCIA = 255
+
+# Sincronização offline: vendas por requisição em POST /vendas/lote
+LIMITE_VENDAS_LOTE = 500
+
+# Paginação da listagem de vendas
+LIMITE_PADRAO_VENDAS = 50
+LIMITE_MAXIMO_VENDAS = 200
+
+# Exportação em streaming
+FORMATOS_EXPORTACAO = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+COLUNAS_CSV_VENDAS = [
+    'id_venda', 'data_venda', 'cpf_funcionario', 'cpf_cnpj_cliente', 'tipo_pagamento',
+    'valor_total', 'desconto', 'valor_pago', 'troco',
+    'codigo_produto', 'nome_produto', 'quantidade_venda', 'preco_unitario', 'subtotal'
+]
+
 venda_bp = Blueprint('venda', __name__, url_prefix='/api/v1/vendas')
 logger = logging.getLogger(__name__)
 
@@ -26,20 +51,42 @@ def criar_venda():
         logger.error(f"Erro de validação ao criar venda: {e}")
         return jsonify({"message": "Erro de validação nos dados da venda.", "errors": e.messages}), HTTPStatus.BAD_REQUEST
         
+    chave_idempotencia = request.headers.get('Idempotency-Key', '').strip()
+    if len(chave_idempotencia) > TAMANHO_MAXIMO_CHAVE_IDEMPOTENCIA:
+        return jsonify({
+            "message": f"O cabeçalho Idempotency-Key deve ter no máximo {TAMANHO_MAXIMO_CHAVE_IDEMPOTENCIA} caracteres."
+        }), HTTPStatus.BAD_REQUEST
+        
     try:
-        id_venda = venda_dao.registrar_venda(validated_data) # CHAMA O DAO
+        repetida = False
+        if chave_idempotencia:
+            # Reenvio de uma venda já concluída devolve o recibo original
+            venda_completa, repetida = venda_dao.registrar_venda_idempotente(validated_data, chave_idempotencia)
+        else:
+            venda_completa = venda_dao.registrar_venda_com_recibo(validated_data) # CHAMA O DAO
         
-        if id_venda:
-            # Busca o registro completo para retornar Troco/Total
-            venda_completa = venda_dao.buscar_por_id(id_venda) 
-            
-            return venda_schema.dump(venda_completa), HTTPStatus.CREATED 
+        if venda_completa:
+            headers = {'Idempotent-Replayed': 'true'} if repetida else {}
+            return venda_schema.dump(venda_completa), HTTPStatus.CREATED, headers
         else:
             return jsonify({
                 "message": "Falha na transação de venda. Motivo: Estoque insuficiente, dados duplicados ou erro de FK.", 
                 "status": "Error"
             }), HTTPStatus.INTERNAL_SERVER_ERROR
             
+    except ChaveIdempotenciaEmUsoError as e:
+        return jsonify({"message": str(e), "status": "Error"}), HTTPStatus.CONFLICT
+
+    except ChaveIdempotenciaReutilizadaError as e:
+        return jsonify({"message": str(e), "status": "Error"}), HTTPStatus.UNPROCESSABLE_ENTITY
+
+    except EstoqueInsuficienteError as e:
+        return jsonify({
+            "message": str(e),
+            "faltas": e.faltas,
+            "status": "Error"
+        }), HTTPStatus.CONFLICT
+
     except Exception as e:
         logger.error(f"Erro interno ao processar a venda: {e}")
         return jsonify({
@@ -47,6 +94,79 @@ def criar_venda():
             "status": "Error"
         }), HTTPStatus.INTERNAL_SERVER_ERROR
         
+@venda_bp.route('/lote', methods=['POST'])
+def criar_vendas_em_lote():
+    """
+    Sincronização de vendas feitas offline pelo terminal.
+    Corpo: {"vendas": [ {...mesmo formato do POST /vendas, "chave_idempotencia": "...",
+    "data_venda": "AAAA-MM-DDTHH:MM:SS" (opcional)}, ... ]}.
+    Valida tudo de uma vez, grava em blocos transacionais e devolve um
+    resultado por venda, na mesma ordem. Reenviar o lote é seguro.
+    """
+    data = request.get_json(silent=True) or {}
+    vendas = data.get('vendas')
+
+    if not isinstance(vendas, list) or not vendas:
+        return jsonify({"message": "Envie a lista de vendas no campo 'vendas'."}), HTTPStatus.BAD_REQUEST
+    if len(vendas) > LIMITE_VENDAS_LOTE:
+        return jsonify({"message": f"O lote deve ter no máximo {LIMITE_VENDAS_LOTE} vendas."}), HTTPStatus.BAD_REQUEST
+
+    resultados = [None] * len(vendas)
+    validas = []
+    indices_validos = []
+
+    # Validação de todas as vendas antes de qualquer acesso ao banco
+    for indice, venda in enumerate(vendas):
+        try:
+            chave, dados_venda = _validar_venda_do_lote(venda)
+        except ValidationError as e:
+            resultados[indice] = {"status": "invalida", "errors": e.normalized_messages()}
+            continue
+        validas.append((chave, dados_venda))
+        indices_validos.append(indice)
+
+    if validas:
+        for indice, resultado in zip(indices_validos, venda_dao.registrar_vendas_em_lote(validas)):
+            resultados[indice] = resultado
+
+    for indice, resultado in enumerate(resultados):
+        resultado['indice'] = indice
+        if isinstance(vendas[indice], dict):
+            resultado['chave_idempotencia'] = vendas[indice].get('chave_idempotencia')
+
+    resumo = {}
+    for resultado in resultados:
+        resumo[resultado['status']] = resumo.get(resultado['status'], 0) + 1
+
+    return jsonify({"resultados": resultados, "resumo": resumo}), HTTPStatus.OK
+
+
+def _validar_venda_do_lote(venda):
+    """ Separa chave e data original da venda offline e valida o restante com o VendaSchema. """
+    if not isinstance(venda, dict):
+        raise ValidationError("Cada venda do lote deve ser um objeto.")
+
+    venda = dict(venda)
+    chave = str(venda.pop('chave_idempotencia', '') or '').strip()
+    data_venda = venda.pop('data_venda', None)
+
+    if not chave or len(chave) > TAMANHO_MAXIMO_CHAVE_IDEMPOTENCIA:
+        raise ValidationError(
+            f"Informe 'chave_idempotencia' (até {TAMANHO_MAXIMO_CHAVE_IDEMPOTENCIA} caracteres).",
+            field_name='chave_idempotencia'
+        )
+
+    dados_venda = venda_schema.load(venda)
+
+    if data_venda:
+        try:
+            dados_venda['data_venda'] = datetime.fromisoformat(data_venda)
+        except (TypeError, ValueError):
+            raise ValidationError("Use o formato AAAA-MM-DDTHH:MM:SS.", field_name='data_venda')
+
+    return chave, dados_venda
+
+
 @venda_bp.route('/<int:id_venda>', methods=['GET'])
 def get_venda_by_id(id_venda):
     """ Rota para buscar uma venda e seus detalhes (por número da nota). """
@@ -63,32 +183,147 @@ def get_venda_by_id(id_venda):
 @venda_bp.route('/busca', methods=['GET'])
 def get_vendas_flexivel():
     """ 
-    Rota unificada para listagem e filtro:
-    - GET /api/v1/vendas/           -> Lista todas as vendas (se existirem).
+    Rota unificada para listagem e filtro, paginada por cursor (keyset):
+    - GET /api/v1/vendas/           -> Lista as vendas, da mais recente para a mais antiga.
     - GET /api/v1/vendas/?data=...  -> Filtra por data.
     - GET /api/v1/vendas/hoje       -> Filtra pela data de hoje.
+    Filtros opcionais: cpf, data_inicio, data_fim, cpf_funcionario, id_tipo_pagamento.
+    Paginação: ?limite= (padrão 50, máximo 200) e ?cursor= com o valor do
+    cabeçalho X-Next-Cursor da página anterior (ausente na última página).
     """
     
-    data_str = request.args.get('data')
-    cpf_cliente = request.args.get('cpf')
-    
-    # Trata a rota /hoje para definir a data de hoje
-    if request.path.endswith('/hoje'):
-        data_str = date.today().isoformat()
+    try:
+        limite = parse_limite(request.args.get('limite'), LIMITE_PADRAO_VENDAS, LIMITE_MAXIMO_VENDAS)
         
-    # Prepara o filtro de CPF (limpando o valor)
-    filter_cpf = None
-    if cpf_cliente:
-        filter_cpf = clean_only_numbers(cpf_cliente)
+        # Executa a busca (passa None se o filtro não foi fornecido)
+        pagina = venda_dao.buscar_vendas_paginado(
+            cursor=request.args.get('cursor'),
+            limite=limite,
+            **_filtros_da_requisicao()
+        )
+    except ValueError as e: # Inclui CursorInvalidoError
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        # Uma página vazia sem X-Next-Cursor seria lida como fim da listagem
+        logger.error(f"Erro interno ao listar vendas: {e}")
+        return jsonify({"message": "Erro interno ao listar as vendas.", "status": "Error"}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    # Retorna lista vazia em vez de 404 para evitar erro no frontend
+    response = jsonify(venda_schema.dump(pagina['vendas'], many=True))
+    if pagina['proximo_cursor']:
+        response.headers['X-Next-Cursor'] = pagina['proximo_cursor']
         
-    # Executa a busca (passa None se o filtro não foi fornecido)
-    vendas_data = venda_dao.buscar_vendas_flexivel(
-        data_str=data_str,  
-        cpf_cliente=filter_cpf 
+    return response, HTTPStatus.OK
+
+
+@venda_bp.route('/exportar', methods=['GET'])
+def exportar_vendas():
+    """
+    Exporta as vendas filtradas em streaming (resposta chunked), sem montar
+    o período inteiro em memória:
+    - ?formato=ndjson (padrão) -> uma venda por linha, no formato da listagem.
+    - ?formato=csv             -> uma linha por item vendido.
+    Aceita os mesmos filtros da listagem (data, cpf, data_inicio, data_fim,
+    cpf_funcionario, id_tipo_pagamento). A ordem é cronológica.
+    """
+    formato = request.args.get('formato', 'ndjson').lower()
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({"message": "O parâmetro 'formato' deve ser 'ndjson' ou 'csv'."}), HTTPStatus.BAD_REQUEST
+
+    try:
+        filtros = _filtros_da_requisicao()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+
+    vendas = venda_dao.exportar_vendas(**filtros)
+    try:
+        # Abre o cursor e lê o primeiro lote antes de enviar o status: uma falha aqui ainda é um 500.
+        # Falhas depois disso propagam e interrompem a transferência (o cliente não recebe um arquivo truncado como completo)
+        primeira = next(vendas, None)
+    except Exception as e:
+        logger.error(f"Erro interno ao exportar vendas: {e}")
+        return jsonify({
+            "message": "Erro interno ao exportar as vendas.",
+            "status": "Error"
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+    if primeira is not None:
+        vendas = itertools.chain([primeira], vendas)
+
+    linhas = _linhas_csv(vendas) if formato == 'csv' else _linhas_ndjson(vendas)
+
+    return Response(
+        stream_with_context(linhas),
+        status=HTTPStatus.OK,
+        mimetype=FORMATOS_EXPORTACAO[formato],
+        headers={"Content-Disposition": f"attachment; filename=vendas.{formato}"}
     )
 
-    if vendas_data:
-        return venda_schema.dump(vendas_data, many=True), HTTPStatus.OK
+
+def _linhas_ndjson(vendas):
+    for venda in vendas:
+        yield json.dumps(venda_schema.dump(venda), ensure_ascii=False) + "\n"
+
+
+def _linhas_csv(vendas):
+    """ Gera o CSV venda a venda (cabeçalho + uma linha por item). """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS_CSV_VENDAS)
+    yield _esvaziar(buffer)
+
+    for venda in vendas:
+        for item in venda['itens']:
+            escritor.writerow([
+                venda['id_venda'],
+                venda['data_venda'].isoformat(),
+                venda['cpf_funcionario'],
+                venda.get('cpf_cnpj_cliente') or '',
+                venda.get('tipo_pagamento_descricao') or '',
+                venda['valor_total'],
+                venda.get('desconto') or 0,
+                venda['valor_pago'],
+                venda['troco'],
+                item['codigo_produto'],
+                item['nome_produto'],
+                item['quantidade_venda'],
+                item['preco_unitario'],
+                item['subtotal'],
+            ])
+        yield _esvaziar(buffer)
+
+
+def _esvaziar(buffer):
+    """ Retorna o conteúdo acumulado no buffer e o reinicia. """
+    conteudo = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return conteudo
+
+
+def _filtros_da_requisicao() -> dict:
+    """ Lê os filtros da listagem/exportação de vendas da query string. """
+    data_str = _parse_data(request.args.get('data'), 'data')
     
-    # Retorna lista vazia em vez de 404 para evitar erro no frontend
-    return jsonify([]), HTTPStatus.OK
\ No newline at end of file
+    # Trata a rota /hoje para definir a data de hoje
+    if request.path.endswith('/hoje'):
+        data_str = date.today()
+
+    return {
+        'data_str': data_str,
+        # Prepara o filtro de CPF (limpando o valor)
+        'cpf_cliente': clean_only_numbers(request.args.get('cpf')) or None,
+        'data_inicio': _parse_data(request.args.get('data_inicio'), 'data_inicio'),
+        'data_fim': _parse_data(request.args.get('data_fim'), 'data_fim'),
+        'cpf_funcionario': clean_only_numbers(request.args.get('cpf_funcionario')) or None,
+        'id_tipo_pagamento': request.args.get('id_tipo_pagamento', type=int),
+    }
+
+
+def _parse_data(valor, nome):
+    """ Valida um parâmetro de data no formato AAAA-MM-DD. """
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"O parâmetro '{nome}' deve estar no formato AAAA-MM-DD.")
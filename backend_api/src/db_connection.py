@@ -1,25 +1,409 @@
 # src/db_connection.py
 
 import psycopg
+from psycopg import pq
+from psycopg_pool import ConnectionPool
+import atexit
+import logging
 import os
-from dotenv import load_dotenv 
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, has_request_context
+from dotenv import load_dotenv
 
-load_dotenv() 
+load_dotenv()
 
-def get_db_connection():
+logger = logging.getLogger(__name__)
+
+# Pool único por processo (criado sob demanda na primeira conexão)
+_pool = None
+_pool_lock = threading.Lock()
+
+# Parâmetros do pool (sobrescritos por init_app a partir do app.config)
+_pool_settings = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+}
+
+# Repetição de transações em deadlock/falha de serialização (sobrescritos por init_app)
+_retry_settings = {
+    "max_attempts": int(os.getenv("DB_RETRY_MAX_ATTEMPTS", "3")),
+    "base_delay": float(os.getenv("DB_RETRY_BASE_DELAY", "0.05")),
+    "max_delay": float(os.getenv("DB_RETRY_MAX_DELAY", "1")),
+}
+
+# SQLSTATEs em que a transação inteira pode ser repetida -> contador em _retry_stats
+_RETRYABLE_SQLSTATES = {
+    "40001": "serialization_failures",
+    "40P01": "deadlocks",
+}
+
+_retry_stats = {"deadlocks": 0, "serialization_failures": 0, "retries": 0, "exhausted": 0}
+_retry_stats_lock = threading.Lock()
+
+# Chave usada em flask.g para a conexão vinculada à requisição
+_REQUEST_CONN_KEY = "_db_conn"
+
+# Unidade de trabalho ativa no contexto atual (thread/requisição)
+_current_uow = ContextVar("pdv_unit_of_work", default=None)
+
+
+class DatabaseUnavailableError(Exception):
+    """ Não foi possível obter uma conexão do pool. """
+
+
+def _reset_connection(conn):
+    """ Garante que a conexão volte ao pool no modo transacional padrão. """
+    if conn.autocommit:
+        conn.autocommit = False
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Retorna o pool de conexões do processo, criando-o na primeira chamada.
+    Tamanhos e tempos vêm das variáveis DB_POOL_* (ver config.py).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    kwargs={
+                        "host": os.getenv("DB_HOST"),
+                        "dbname": os.getenv("DB_NAME"),
+                        "user": os.getenv("DB_USER"),
+                        "password": os.getenv("DB_PASSWORD"),
+                        "port": os.getenv("DB_PORT", "5432"),
+                    },
+                    min_size=_pool_settings["min_size"],
+                    max_size=_pool_settings["max_size"],
+                    # Conexões ociosas acima de min_size são encerradas após max_idle segundos
+                    max_idle=_pool_settings["max_idle"],
+                    # Tempo máximo de espera por uma conexão livre
+                    timeout=_pool_settings["timeout"],
+                    # Health check (SELECT 1) antes de entregar a conexão
+                    check=ConnectionPool.check_connection,
+                    reset=_reset_connection,
+                    name="pdv_mercado",
+                    open=True,
+                )
+    return _pool
+
+
+def close_pool():
+    """ Encerra o pool e todas as conexões abertas (usado no shutdown). """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+atexit.register(close_pool)
+
+
+class PooledConnection:
+    """
+    Conexão emprestada do pool. Expõe a mesma interface da conexão psycopg,
+    mas close() devolve a conexão ao pool em vez de encerrar o socket.
+
+    Quando vinculada à requisição Flask, close() apenas descarta a transação
+    pendente; a devolução ao pool acontece no teardown da requisição.
+    """
+
+    def __init__(self, conn, pool, request_bound=False):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_request_bound", request_bound)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def close(self):
+        if self._conn is None:
+            return
+        if self._request_bound:
+            # Mesma semântica do close() antigo: o que não foi commitado é descartado
+            if self._conn.info.transaction_status != pq.TransactionStatus.IDLE:
+                self._conn.rollback()
+            _reset_connection(self._conn)
+            return
+        self.release()
+
+    def release(self):
+        """ Devolve a conexão ao pool, descartando a transação pendente. """
+        if self._conn is None:
+            return
+        conn = self._conn
+        object.__setattr__(self, "_conn", None)
+        if not conn.closed and conn.info.transaction_status == pq.TransactionStatus.INTRANS:
+            # Leituras sem commit são o caso comum nos DAOs; evita o aviso do pool
+            conn.rollback()
+        self._pool.putconn(conn)
+
+
+class _UnitOfWorkConnection:
+    """
+    Visão da conexão entregue aos DAOs durante uma unidade de trabalho.
+    commit()/close() viram no-op e rollback() marca a transação para ser
+    desfeita: quem decide o resultado é a fronteira da unidade de trabalho.
     """
-    Estabelece e retorna uma nova conexão com o PostgreSQL usando psycopg (v3).
-    A função usa as variáveis de ambiente (DB_HOST, DB_NAME, etc.) do .env.
+
+    def __init__(self, uow):
+        object.__setattr__(self, "_uow", uow)
+
+    def __getattr__(self, name):
+        return getattr(self._uow.raw_connection, name)
+
+    def __setattr__(self, name, value):
+        # Alterar autocommit no meio da transação quebraria a atomicidade
+        if name == "autocommit":
+            return
+        setattr(self._uow.raw_connection, name, value)
+
+    @property
+    def closed(self):
+        return self._uow.raw_connection.closed
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._uow.rollback_only = True
+
+    def close(self):
+        pass
+
+
+class UnitOfWork:
     """
+    Executa várias chamadas de DAO em uma única conexão e transação.
+
+    Uso:
+        with unit_of_work():
+            venda_dao.registrar_venda(...)
+            venda_dao.buscar_por_id(...)
+
+    Enquanto estiver ativa, get_db_connection() devolve a conexão da unidade.
+    Chamadas aninhadas são detectadas e apenas se juntam à unidade externa;
+    o COMMIT (ou ROLLBACK, em caso de exceção ou de rollback() pedido por
+    algum DAO) acontece somente na saída da unidade mais externa.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.rollback_only = False
+        self.connection = None
+        self._pooled = None
+        self._token = None
+        self._savepoints = 0
+
+    @property
+    def raw_connection(self):
+        return self._pooled._conn
+
+    @property
+    def nested(self):
+        return self.depth > 1
+
+    def __enter__(self):
+        active = _current_uow.get()
+        if active is not None and active is not self:
+            raise RuntimeError("Já existe outra unidade de trabalho ativa; use unit_of_work() para participar dela.")
+
+        self.depth += 1
+        if self.depth > 1:
+            return self
+
+        pooled = _acquire_connection()
+        if pooled is None:
+            self.depth = 0
+            raise DatabaseUnavailableError("Não foi possível obter conexão com o banco de dados.")
+
+        # Descarta qualquer leitura pendente da requisição antes de abrir a unidade
+        if pooled._conn.info.transaction_status != pq.TransactionStatus.IDLE:
+            pooled._conn.rollback()
+        _reset_connection(pooled._conn)
+
+        self._pooled = pooled
+        self.connection = _UnitOfWorkConnection(self)
+        self._token = _current_uow.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.depth -= 1
+        if self.depth > 0:
+            return False
+
+        conn = self.raw_connection
+        aborted = conn.info.transaction_status == pq.TransactionStatus.INERROR
+        try:
+            if exc_type is None and not self.rollback_only and not aborted:
+                conn.commit()
+            else:
+                if self.rollback_only:
+                    logger.info("Unidade de trabalho desfeita: rollback solicitado por um DAO.")
+                conn.rollback()
+        finally:
+            _current_uow.reset(self._token)
+            # Conexão da requisição é devolvida no teardown; as demais, agora
+            self._pooled.close()
+            self._pooled = None
+            self.connection = None
+
+        if aborted and exc_type is None and not self.rollback_only:
+            # Um DAO engoliu o erro do banco: não podemos reportar sucesso
+            raise RuntimeError("Transação abortada por erro no banco de dados. ROLLBACK!")
+        return False
+
+
+    @contextmanager
+    def savepoint(self):
+        """
+        Isola um trecho da unidade (SAVEPOINT). Se o trecho levantar exceção
+        ou algum DAO pedir rollback(), só ele é desfeito (ROLLBACK TO SAVEPOINT)
+        e a unidade continua válida para o restante do trabalho.
+        """
+        conn = self.raw_connection
+        self._savepoints += 1
+        name = f"uow_sp_{self._savepoints}"
+        outer_rollback_only = self.rollback_only
+        self.rollback_only = False
+
+        conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except BaseException:
+            conn.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            raise
+        else:
+            if self.rollback_only:
+                conn.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            else:
+                conn.execute(f"RELEASE SAVEPOINT {name}")
+        finally:
+            self.rollback_only = outer_rollback_only
+
+
+def unit_of_work() -> UnitOfWork:
+    """ Retorna a unidade de trabalho ativa (chamada aninhada) ou uma nova. """
+    uow = _current_uow.get()
+    if uow is not None:
+        return uow
+    return UnitOfWork()
+
+
+def _count_retry_event(name):
+    with _retry_stats_lock:
+        _retry_stats[name] += 1
+
+
+def get_retry_stats() -> dict:
+    """ Contadores de deadlocks, falhas de serialização e repetições desde o início do processo. """
+    with _retry_stats_lock:
+        return dict(_retry_stats)
+
+
+def run_in_unit_of_work(func, *args, **kwargs):
+    """
+    Executa func(*args, **kwargs) em uma unidade de trabalho e retorna o resultado.
+    Em deadlock (40P01) ou falha de serialização (40001) a transação inteira é
+    desfeita e repetida, com espera exponencial e jitter, até max_attempts vezes.
+
+    Se já houver uma unidade ativa, apenas participa dela: a repetição só
+    faz sentido na fronteira da transação (unidade mais externa).
+    """
+    if _current_uow.get() is not None:
+        with unit_of_work():
+            return func(*args, **kwargs)
+
+    attempt = 1
+    while True:
+        try:
+            with unit_of_work():
+                return func(*args, **kwargs)
+        except psycopg.Error as e:
+            counter = _RETRYABLE_SQLSTATES.get(e.sqlstate)
+            if counter is None:
+                raise
+            _count_retry_event(counter)
+
+            if attempt >= _retry_settings["max_attempts"]:
+                _count_retry_event("exhausted")
+                logger.error(f"Transação desistiu após {attempt} tentativas ({e.sqlstate}): {e}")
+                raise
+
+            delay = min(_retry_settings["max_delay"], _retry_settings["base_delay"] * 2 ** (attempt - 1))
+            delay = random.uniform(delay / 2, delay)
+            logger.warning(f"Transação repetida ({e.sqlstate}), tentativa {attempt + 1} em {delay:.3f}s.")
+            _count_retry_event("retries")
+            time.sleep(delay)
+            attempt += 1
+
+
+def _acquire_connection():
+    """ Empresta uma conexão do pool (ou a já vinculada à requisição). """
     try:
-        conn = psycopg.connect(
-            host=os.getenv("DB_HOST"),
-            dbname=os.getenv("DB_NAME"),  
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            port=os.getenv("DB_PORT", "5432") 
-        )
-        return conn
+        if has_request_context():
+            conn = g.get(_REQUEST_CONN_KEY)
+            if conn is None or conn.closed:
+                if conn is not None:
+                    conn.release()
+                pool = get_pool()
+                conn = PooledConnection(pool.getconn(), pool, request_bound=True)
+                setattr(g, _REQUEST_CONN_KEY, conn)
+            return conn
+
+        pool = get_pool()
+        return PooledConnection(pool.getconn(), pool)
     except Exception as e:
         print(f"ERRO DE CONEXÃO COM O BANCO DE DADOS (psycopg v3): {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def get_db_connection():
+    """
+    Retorna uma conexão do pool com o PostgreSQL usando psycopg (v3).
+    Dentro de uma requisição Flask, todas as chamadas compartilham a mesma
+    conexão, devolvida ao pool no teardown (ver init_app). Dentro de uma
+    unidade de trabalho, devolve a conexão transacional da unidade.
+    Retorna None se não houver conexão disponível.
+    """
+    uow = _current_uow.get()
+    if uow is not None:
+        return uow.connection
+    return _acquire_connection()
+
+
+def release_request_connection(exception=None):
+    """ Devolve ao pool a conexão vinculada à requisição atual (teardown). """
+    conn = g.pop(_REQUEST_CONN_KEY, None)
+    if conn is not None:
+        conn.release()
+
+
+def init_app(app):
+    """
+    Aplica as configurações DB_POOL_* e DB_RETRY_* do app e registra a
+    devolução da conexão da requisição no teardown.
+    """
+    for key in _pool_settings:
+        config_key = f"DB_POOL_{key.upper()}"
+        if config_key in app.config:
+            _pool_settings[key] = app.config[config_key]
+    for key in _retry_settings:
+        config_key = f"DB_RETRY_{key.upper()}"
+        if config_key in app.config:
+            _retry_settings[key] = app.config[config_key]
+    app.teardown_appcontext(release_request_connection)
@@ -1,6 +1,7 @@
 # src/models/cliente_dao.py (VERSÃO FINAL E COMPLETA)
 
 from src.db_connection import get_db_connection
+from src.utils.pagination import ordenar_por_ids
 
 class ClienteDAO:
     """ 
@@ -116,6 +117,32 @@ class ClienteDAO:
         finally:
             if conn: conn.close()
 
+    def find_by_ids(self, ids):
+        """ Busca vários clientes em uma consulta, na ordem de 'ids'. Os inexistentes ficam de fora. """
+        conn = get_db_connection()
+        if conn is None: return None
+        
+        try:
+            with conn.cursor() as cur:
+                sql = """
+                    SELECT c.id_cliente, c.nome, c.cpf_cnpj, c.email, c.telefone, c.sexo, 
+                        l.cep, l.logradouro, l.numero, l.bairro, l.cidade, l.uf, l.id_localizacao
+                    FROM cliente c
+                    LEFT JOIN localizacao l ON c.id_localizacao = l.id_localizacao
+                    WHERE c.id_cliente = ANY(%s);
+                """
+                cur.execute(sql, (list(ids),))
+                
+                column_names = [desc.name for desc in cur.description]
+                clientes_list = [dict(zip(column_names, row)) for row in cur.fetchall()]
+                return ordenar_por_ids(clientes_list, ids, 'id_cliente')
+                    
+        except Exception as e:
+            print(f"Erro no ClienteDAO.find_by_ids: {e}")
+            return None
+        finally:
+            if conn: conn.close()
+
     def find_by_cpf_cnpj(self, cpf_cnpj: str): 
         """ Busca um cliente pela chave de negócio (CPF ou CNPJ). """
         conn = get_db_connection()
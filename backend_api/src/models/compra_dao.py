@@ -45,8 +45,9 @@ class CompraDAO:
                 
                 
                 # LOOP para Itens e AUMENTO DE ESTOQUE
+                # (em ordem de codigo_produto, a mesma da baixa na venda, para evitar deadlock)
                 
-                for item in dados_compra['itens']:
+                for item in sorted(dados_compra['itens'], key=lambda i: i['codigo_produto']):
                     codigo_produto = item['codigo_produto']
                     quantidade_comprada = item['quantidade_comprada']
                     custo_unitario = item['custo_unitario']
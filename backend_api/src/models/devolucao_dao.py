@@ -43,8 +43,9 @@ class DevolucaoDAO:
                 
                 
                 # RESTAURAÇÃO DE ESTOQUE
+                # (em ordem de codigo_produto, a mesma da baixa na venda, para evitar deadlock)
                 
-                for item in dados_devolucao['itens']:
+                for item in sorted(dados_devolucao['itens'], key=lambda i: i['codigo_produto']):
                     codigo_produto = item['codigo_produto']
                     quantidade_devolvida = item['quantidade_devolvida']
                     
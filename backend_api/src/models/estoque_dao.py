@@ -1,10 +1,21 @@
 # src/models/estoque_dao.py
 
 from src.db_connection import get_db_connection
+from src.models.produto_dao import invalidar_cache_produto
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class EstoqueInsuficienteError(ValueError):
+    """ Baixa de estoque recusada. faltas: [{codigo_produto, solicitado, disponivel}, ...] """
+
+    def __init__(self, faltas: list[dict]):
+        self.faltas = faltas
+        produtos = ", ".join(str(f['codigo_produto']) for f in faltas)
+        super().__init__(f"Estoque insuficiente para o(s) produto(s) {produtos}.")
+
+
 class EstoqueDAO:
     
     def __init__(self):
@@ -41,7 +52,8 @@ class EstoqueDAO:
         try:
             conn = get_db_connection()
             with conn.cursor() as cur:
-                cur.execute(f"SELECT codigo_produto, quantidade FROM {self.table_name} WHERE codigo_produto = %s", (codigo_produto,))
+                # estoque_saldo soma as frações dos produtos de alta rotatividade
+                cur.execute("SELECT codigo_produto, quantidade FROM estoque_saldo WHERE codigo_produto = %s", (codigo_produto,))
                 row = cur.fetchone()
                 if row is None: return None
                 
@@ -62,16 +74,250 @@ class EstoqueDAO:
         try:
             conn = get_db_connection()
             with conn.cursor() as cur:
+                # A nova quantidade é o saldo total: as frações (alta rotatividade) são zeradas.
+                # Frações antes da linha central, a mesma ordem de travamento da venda.
+                cur.execute(
+                    "UPDATE estoque_fracao SET quantidade = 0 WHERE codigo_produto = %s AND quantidade > 0",
+                    (codigo_produto,)
+                )
                 cur.execute(
                     f"UPDATE {self.table_name} SET quantidade = %s WHERE codigo_produto = %s",
                     (nova_quantidade, codigo_produto)
                 )
                 rows_affected = cur.rowcount
                 conn.commit()
+                invalidar_cache_produto(codigo_produto, saldo_apenas=True)
                 return rows_affected
         except Exception as e:
             logger.error(f"Erro ao atualizar estoque de produto {codigo_produto}: {e}")
             if conn: conn.rollback()
             raise e 
         finally:
-            if conn: conn.close()
\ No newline at end of file
+            if conn: conn.close()
+
+    def baixar_em_lote(self, itens: list[dict], fracao: int = None):
+        """ 
+        Baixa o estoque de todos os itens com um único UPDATE (set-based).
+        Linhas repetidas do mesmo produto são somadas antes da baixa e as
+        linhas de estoque são travadas em ordem de codigo_produto.
+
+        Com fracao (caixa da venda), produtos de alta rotatividade são baixados
+        primeiro na fração desse caixa, sem disputar a linha central com os
+        demais caixas. Se a fração não tiver saldo, as frações livres são
+        recolhidas para a linha central e a baixa segue o caminho normal.
+
+        Retorna a lista de faltas ({codigo_produto, solicitado, disponivel});
+        se houver qualquer falta, nenhuma linha é baixada (ROLLBACK).
+        """
+        quantidades = {}
+        for item in itens:
+            codigo = item['codigo_produto']
+            quantidades[codigo] = quantidades.get(codigo, 0) + item['quantidade_venda']
+
+        conn = get_db_connection()
+        if conn is None: return None
+
+        try:
+            with conn.cursor() as cur:
+                if fracao is not None:
+                    servidos = self._baixar_na_fracao(cur, quantidades, fracao)
+                    quantidades = {c: q for c, q in quantidades.items() if c not in servidos}
+
+                faltas = []
+                if quantidades:
+                    # O SELECT final enxerga o estoque ANTES do UPDATE: 'disponivel' é o saldo atual
+                    sql = f"""
+                        WITH pedido AS (
+                            SELECT * FROM unnest(%s::int[], %s::int[]) AS p(codigo_produto, quantidade)
+                        ),
+                        trava AS (
+                            -- Linhas travadas sempre em ordem de codigo_produto: vendas concorrentes
+                            -- com produtos em comum esperam umas pelas outras, sem formar ciclo (deadlock)
+                            SELECT e.codigo_produto
+                            FROM {self.table_name} e
+                            WHERE e.codigo_produto IN (SELECT codigo_produto FROM pedido)
+                            ORDER BY e.codigo_produto
+                            FOR NO KEY UPDATE
+                        ),
+                        livres AS (
+                            -- Frações que nenhum outro caixa está usando agora (SKIP LOCKED: não espera)
+                            SELECT f.codigo_produto, f.fracao, f.quantidade
+                            FROM estoque_fracao f
+                            WHERE f.codigo_produto IN (SELECT codigo_produto FROM pedido) AND f.quantidade > 0
+                            ORDER BY f.codigo_produto, f.fracao
+                            FOR NO KEY UPDATE SKIP LOCKED
+                        ),
+                        recolhido AS (
+                            UPDATE estoque_fracao f
+                            SET quantidade = 0
+                            FROM livres l
+                            WHERE f.codigo_produto = l.codigo_produto AND f.fracao = l.fracao
+                            RETURNING f.codigo_produto, l.quantidade
+                        ),
+                        reforco AS (
+                            SELECT codigo_produto, SUM(quantidade) AS quantidade FROM recolhido GROUP BY codigo_produto
+                        ),
+                        baixa AS (
+                            UPDATE {self.table_name} e
+                            SET quantidade = e.quantidade + COALESCE(r.quantidade, 0) - p.quantidade
+                            FROM pedido p
+                            JOIN trava t ON t.codigo_produto = p.codigo_produto
+                            LEFT JOIN reforco r ON r.codigo_produto = p.codigo_produto
+                            WHERE e.codigo_produto = p.codigo_produto
+                              AND e.quantidade + COALESCE(r.quantidade, 0) >= p.quantidade
+                            RETURNING e.codigo_produto
+                        )
+                        SELECT p.codigo_produto, p.quantidade, COALESCE(s.quantidade, 0)
+                        FROM pedido p
+                        LEFT JOIN estoque_saldo s ON s.codigo_produto = p.codigo_produto
+                        WHERE p.codigo_produto NOT IN (SELECT codigo_produto FROM baixa)
+                        ORDER BY p.codigo_produto;
+                    """
+                    cur.execute(sql, (list(quantidades.keys()), list(quantidades.values())))
+                    faltas = [
+                        {'codigo_produto': row[0], 'solicitado': row[1], 'disponivel': row[2]}
+                        for row in cur.fetchall()
+                    ]
+
+                if faltas:
+                    conn.rollback()
+                else:
+                    conn.commit()
+                return faltas
+        except Exception as e:
+            logger.error(f"Erro na baixa de estoque em lote: {e}")
+            if conn: conn.rollback()
+            raise
+        finally:
+            if conn: conn.close()
+
+    def _baixar_na_fracao(self, cur, quantidades: dict, fracao: int) -> set:
+        """ 
+        Baixa na fração do caixa os produtos que tiverem saldo suficiente nela.
+        Retorna os códigos atendidos. Produtos sem frações não são afetados.
+        """
+        cur.execute("""
+            WITH pedido AS (
+                SELECT * FROM unnest(%s::int[], %s::int[]) AS p(codigo_produto, quantidade)
+            ),
+            trava AS (
+                SELECT f.codigo_produto
+                FROM estoque_fracao f
+                WHERE f.fracao = %s AND f.codigo_produto IN (SELECT codigo_produto FROM pedido)
+                ORDER BY f.codigo_produto
+                FOR NO KEY UPDATE
+            )
+            UPDATE estoque_fracao f
+            SET quantidade = f.quantidade - p.quantidade
+            FROM pedido p
+            JOIN trava t ON t.codigo_produto = p.codigo_produto
+            WHERE f.codigo_produto = p.codigo_produto
+              AND f.fracao = %s
+              AND f.quantidade >= p.quantidade
+            RETURNING f.codigo_produto;
+        """, (list(quantidades.keys()), list(quantidades.values()), fracao, fracao))
+        return {row[0] for row in cur.fetchall()}
+
+    def definir_alta_rotatividade(self, codigo_produto: int, ativo: bool):
+        """ 
+        Marca/desmarca o produto como de alta rotatividade. A divisão do saldo
+        em frações (ou o recolhimento delas) acontece em redistribuir_fracoes.
+        """
+        conn = get_db_connection()
+        if conn is None: return 0
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"UPDATE {self.table_name} SET alta_rotatividade = %s WHERE codigo_produto = %s",
+                    (ativo, codigo_produto)
+                )
+                rows_affected = cur.rowcount
+            conn.commit()
+            return rows_affected
+        except Exception as e:
+            logger.error(f"Erro ao marcar alta rotatividade do produto {codigo_produto}: {e}")
+            if conn: conn.rollback()
+            return 0
+        finally:
+            if conn: conn.close()
+
+    def redistribuir_fracoes(self, fracoes: int) -> int:
+        """
+        Passo de manutenção (scripts/redistribuir_estoque.py): para cada produto
+        de alta rotatividade, recolhe o saldo das frações livres para a linha
+        central e o divide de novo em partes iguais entre as frações 0..fracoes-1
+        (a linha central fica com uma parte mais o resto). Produtos desmarcados
+        têm as frações recolhidas. Frações em uso por uma venda são puladas e
+        tratadas na próxima execução. Retorna a quantidade de produtos processados.
+        """
+        conn = get_db_connection()
+        if conn is None: return 0
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT codigo_produto FROM {self.table_name} WHERE alta_rotatividade
+                    UNION
+                    SELECT DISTINCT codigo_produto FROM estoque_fracao
+                    ORDER BY 1;
+                """)
+                produtos = [row[0] for row in cur.fetchall()]
+            conn.commit()
+
+            # Uma transação por produto: a linha central fica travada pelo menor tempo possível
+            for codigo_produto in produtos:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        f"SELECT quantidade, alta_rotatividade FROM {self.table_name} WHERE codigo_produto = %s FOR NO KEY UPDATE",
+                        (codigo_produto,)
+                    )
+                    row = cur.fetchone()
+                    if row is None: # Produto excluído nesse meio tempo
+                        conn.commit()
+                        continue
+                    central, alta_rotatividade = row
+                    alvo = fracoes if alta_rotatividade else 0
+
+                    if alvo:
+                        cur.execute("""
+                            INSERT INTO estoque_fracao (codigo_produto, fracao)
+                            SELECT %s, generate_series(0, %s - 1)
+                            ON CONFLICT DO NOTHING;
+                        """, (codigo_produto, alvo))
+
+                    cur.execute("""
+                        SELECT fracao, quantidade FROM estoque_fracao
+                        WHERE codigo_produto = %s
+                        ORDER BY fracao
+                        FOR NO KEY UPDATE SKIP LOCKED;
+                    """, (codigo_produto,))
+                    livres = cur.fetchall()
+
+                    total = central + sum(quantidade for _, quantidade in livres)
+                    destino = [f for f, _ in livres if f < alvo]
+                    parte = total // (len(destino) + 1)
+
+                    cur.execute("""
+                        UPDATE estoque_fracao
+                        SET quantidade = CASE WHEN fracao = ANY(%s) THEN %s ELSE 0 END
+                        WHERE codigo_produto = %s AND fracao = ANY(%s);
+                    """, (destino, parte, codigo_produto, [f for f, _ in livres]))
+                    # Só as frações já travadas acima: esperar por uma em uso poderia gerar deadlock
+                    cur.execute(
+                        "DELETE FROM estoque_fracao WHERE codigo_produto = %s AND fracao = ANY(%s) AND fracao >= %s",
+                        (codigo_produto, [f for f, _ in livres], alvo)
+                    )
+                    cur.execute(
+                        f"UPDATE {self.table_name} SET quantidade = %s WHERE codigo_produto = %s",
+                        (total - parte * len(destino), codigo_produto)
+                    )
+                conn.commit()
+
+            return len(produtos)
+        except Exception as e:
+            logger.error(f"Erro ao redistribuir frações de estoque: {e}")
+            if conn: conn.rollback()
+            raise
+        finally:
+            if conn: conn.close()
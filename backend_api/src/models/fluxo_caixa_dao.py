@@ -93,8 +93,13 @@ class FluxoCaixaDAO:
         finally:
             if conn: conn.close()
             
-    def buscar_caixa_aberto(self, cpf_funcionario: str):
-        """ Retorna o ID do turno de caixa ABERTO para o funcionário. """
+    def buscar_caixa_aberto(self, cpf_funcionario: str, bloquear: bool = False):
+        """ 
+        Retorna o ID do turno de caixa ABERTO para o funcionário. 
+        Com bloquear=True (dentro de uma unidade de trabalho), o turno fica
+        travado (FOR SHARE) até o fim da transação, impedindo o fechamento
+        do caixa no meio da venda.
+        """
         conn = get_db_connection()
         if conn is None: return None
         
@@ -103,8 +108,10 @@ class FluxoCaixaDAO:
                 sql = f"""
                     SELECT id_fluxo FROM {self.table_name} 
                     WHERE cpf_funcionario_abertura = %s AND status = 'ABERTO' 
-                    ORDER BY data_hora_abertura DESC LIMIT 1;
+                    ORDER BY data_hora_abertura DESC LIMIT 1
                 """
+                if bloquear:
+                    sql += " FOR SHARE"
                 cur.execute(sql, (cpf_funcionario,))
                 row = cur.fetchone()
                 return row[0] if row else None
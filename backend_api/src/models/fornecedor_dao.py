@@ -2,6 +2,7 @@
 
 from src.db_connection import get_db_connection
 from src.utils.formatters import clean_only_numbers
+from src.utils.pagination import ordenar_por_ids
 import logging
 
 logger = logging.getLogger(__name__)
@@ -84,6 +85,30 @@ class FornecedorDAO:
         finally:
             if conn: conn.close()
 
+    def find_by_ids(self, ids: list[int]):
+        """ Busca vários fornecedores em uma consulta, na ordem de 'ids'. Os inexistentes ficam de fora. """
+        conn = None
+        try:
+            conn = get_db_connection()
+            with conn.cursor() as cur:
+                sql = """
+                    SELECT 
+                        f.id_fornecedor, f.cnpj, f.razao_social, f.email, f.celular, f.situacao_cadastral, f.data_abertura, f.id_localizacao,
+                        l.cep, l.logradouro, l.numero, l.bairro, l.cidade, l.uf, l.id_localizacao AS loc_id
+                    FROM fornecedor f
+                    LEFT JOIN localizacao l ON f.id_localizacao = l.id_localizacao
+                    WHERE f.id_fornecedor = ANY(%s);
+                """
+                cur.execute(sql, (list(ids),))
+                columns = [desc[0] for desc in cur.description]
+                fornecedores = [dict(zip(columns, row)) for row in cur.fetchall()]
+                return ordenar_por_ids(fornecedores, ids, 'id_fornecedor')
+        except Exception as e:
+            logger.error(f"Erro ao buscar fornecedores {ids}: {e}")
+            return None
+        finally:
+            if conn: conn.close()
+
     def find_all(self, limit=None): # 🔑 AGORA ACEITA O PARÂMETRO LIMIT
         """ Retorna todos os fornecedores (ou limitado). """
         conn = None
@@ -0,0 +1,120 @@
+# src/models/idempotencia_dao.py
+
+from src.db_connection import get_db_connection
+from config import Config
+import logging
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+
+class ChaveIdempotenciaEmUsoError(Exception):
+    """ Outra requisição com a mesma chave ainda está em andamento. """
+
+
+class ChaveIdempotenciaReutilizadaError(Exception):
+    """ A chave já foi usada com um conteúdo de requisição diferente. """
+
+
+class IdempotenciaDAO:
+    """
+    Tabela chave -> id_venda usada para tornar o POST /vendas seguro contra
+    reenvios. A reserva deve acontecer na mesma unidade de trabalho da venda:
+    se a venda falhar, a chave é desfeita junto e o próximo envio executa de novo.
+    """
+
+    def __init__(self, ttl_horas: int = None, espera_segundos: float = None):
+        self.table_name = "venda_idempotencia"
+        self.ttl_horas = Config.IDEMPOTENCIA_TTL_HORAS if ttl_horas is None else ttl_horas
+        self.espera_segundos = Config.IDEMPOTENCIA_ESPERA_SEGUNDOS if espera_segundos is None else espera_segundos
+
+    def reservar(self, chave: str, hash_requisicao: str):
+        """
+        Reserva a chave para a transação atual. Retorna None se a reserva foi
+        feita (venda nova) ou o id_venda já gravado para a chave (repetição).
+
+        Uma requisição concorrente com a mesma chave fica bloqueada no índice
+        único até a primeira terminar (COMMIT -> repetição, ROLLBACK -> reserva),
+        por no máximo espera_segundos; depois disso, ChaveIdempotenciaEmUsoError.
+        Chaves expiradas são reaproveitadas.
+        """
+        conn = get_db_connection()
+        if conn is None: return None
+
+        try:
+            with conn.cursor() as cur:
+                # Limita a espera apenas desta instrução (SET LOCAL vale até o fim da transação)
+                cur.execute("SELECT set_config('lock_timeout', %s, true);", (f"{int(self.espera_segundos * 1000)}ms",))
+                cur.execute(f"""
+                    INSERT INTO {self.table_name} (chave, hash_requisicao, expira_em)
+                    VALUES (%s, %s, CURRENT_TIMESTAMP + make_interval(hours => %s))
+                    ON CONFLICT (chave) DO UPDATE
+                        SET hash_requisicao = EXCLUDED.hash_requisicao,
+                            id_venda = NULL,
+                            criado_em = CURRENT_TIMESTAMP,
+                            expira_em = EXCLUDED.expira_em
+                        WHERE {self.table_name}.expira_em < CURRENT_TIMESTAMP
+                    RETURNING chave;
+                """, (chave, hash_requisicao, self.ttl_horas))
+                reservada = cur.fetchone() is not None
+                cur.execute("SET LOCAL lock_timeout TO DEFAULT;")
+
+                if reservada:
+                    return None
+
+                cur.execute(
+                    f"SELECT id_venda, hash_requisicao FROM {self.table_name} WHERE chave = %s;",
+                    (chave,)
+                )
+                id_venda, hash_original = cur.fetchone()
+
+        except psycopg.errors.LockNotAvailable:
+            logger.error(f"Chave de idempotência '{chave}' ainda em processamento.")
+            raise ChaveIdempotenciaEmUsoError(
+                "Já existe uma venda com esta Idempotency-Key em processamento. Tente novamente."
+            )
+        finally:
+            if conn: conn.close()
+
+        if hash_original != hash_requisicao:
+            raise ChaveIdempotenciaReutilizadaError(
+                "Esta Idempotency-Key já foi usada com uma venda diferente."
+            )
+        if id_venda is None:
+            raise ChaveIdempotenciaEmUsoError(
+                "Já existe uma venda com esta Idempotency-Key em processamento. Tente novamente."
+            )
+        return id_venda
+
+    def concluir(self, chave: str, id_venda: int):
+        """ Associa a venda gravada à chave reservada. """
+        conn = get_db_connection()
+        if conn is None: return
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"UPDATE {self.table_name} SET id_venda = %s WHERE chave = %s;",
+                    (id_venda, chave)
+                )
+            conn.commit()
+        finally:
+            if conn: conn.close()
+
+    def remover_expiradas(self) -> int:
+        """ Apaga as chaves vencidas. Retorna a quantidade removida. """
+        conn = get_db_connection()
+        if conn is None: return 0
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"DELETE FROM {self.table_name} WHERE expira_em < CURRENT_TIMESTAMP;")
+                removidas = cur.rowcount
+            conn.commit()
+            return removidas
+        except Exception as e:
+            logger.error(f"Erro ao remover chaves de idempotência expiradas: {e}")
+            if conn: conn.rollback()
+            return 0
+        finally:
+            if conn: conn.close()
@@ -1,31 +1,153 @@
 # src/models/produto_dao.py (VERSÃO FINAL E COMPLETA)
 
 from src.db_connection import get_db_connection
+from config import Config
+from src.utils.cache import TTLCache
+from src.utils.formatters import normalizar_busca
+from src.utils.pagination import encode_cursor, decode_cursor, CursorInvalidoError, ordenar_por_ids
+from src.utils.indice_prefixos import IndicePrefixos
+from decimal import Decimal, InvalidOperation
+import psycopg
+import csv
 import logging
+import re
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_INITIAL_QUANTITY = 0 
 
+# Listagem (find_all / find_all_paginado): colunas que podem ser pedidas e ordens aceitas
+CAMPOS_LISTAGEM = ('codigo_produto', 'nome', 'descricao', 'preco', 'codigo_barras', 'quantidade')
+ORDENS_LISTAGEM = ('codigo_produto', 'nome', 'preco')
+
+# Importação de produtos por CSV (ProdutoDAO.importar_csv)
+COLUNAS_IMPORTACAO = ('nome', 'descricao', 'preco', 'codigo_barras', 'quantidade')
+COLUNAS_OBRIGATORIAS_IMPORTACAO = ('nome', 'descricao', 'preco')
+TAMANHO_BLOCO_COPY = 64 * 1024
+
+# Scan no caixa: código de barras -> dados de catálogo (sem o saldo, que muda a cada venda)
+_cache_codigo_barras = TTLCache(maxsize=Config.PRODUTO_CACHE_TAMANHO, ttl=Config.PRODUTO_CACHE_TTL, nome='produto_codigo_barras')
+# Saldo de estoque por codigo_produto, com TTL de poucos segundos
+_cache_saldo = TTLCache(maxsize=Config.PRODUTO_CACHE_TAMANHO, ttl=Config.PRODUTO_CACHE_SALDO_TTL, nome='produto_saldo')
+
+# Autocompletar do caixa: nomes e códigos de barras em memória (sem consulta ao banco por tecla)
+indice_autocomplete = IndicePrefixos()
+_recarga_autocomplete = threading.Lock()
+
+# Índice de trigramas (pg_trgm) em produto.nome_busca: verificado uma vez por processo
+_trigrama_disponivel = None
+
+
+class ImportacaoInvalidaError(ValueError):
+    """ Arquivo de importação recusado por inteiro (cabeçalho, codificação ou formato do CSV). """
+
+
+def invalidar_cache_produto(codigo_produto: int, saldo_apenas: bool = False):
+    """ Remove o produto dos caches do scan (após alterar preço/dados ou ajustar o estoque). """
+    _cache_saldo.invalidate(codigo_produto)
+    if not saldo_apenas:
+        _cache_codigo_barras.invalidate_where(lambda produto: produto['codigo_produto'] == codigo_produto)
+
+
+def invalidar_catalogo_em_memoria():
+    """ Após alterações em massa (importação, reajuste de preços): esvazia os caches do scan e recarrega o autocompletar. """
+    _cache_codigo_barras.clear()
+    _cache_saldo.clear()
+    _recarregar_em_segundo_plano()
+
+
+def recarregar_indice_autocomplete() -> bool:
+    """ Carrega todo o catálogo no índice do autocompletar. Chamada na inicialização do app. """
+    conn = get_db_connection()
+    if conn is None:
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT p.codigo_produto, p.nome, p.preco, p.codigo_barras, COALESCE(pp.pontuacao, 0) AS popularidade
+                FROM produto p
+                LEFT JOIN produto_popularidade pp ON p.codigo_produto = pp.codigo_produto;
+            """)
+            columns = [desc[0] for desc in cur.description]
+            indice_autocomplete.carregar([dict(zip(columns, row)) for row in cur.fetchall()])
+            return True
+    except Exception as e:
+        logger.error(f"Erro ao carregar o índice do autocompletar: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def _recarregar_em_segundo_plano():
+    """ Recarga periódica fora da requisição: enquanto isso, o índice atual continua respondendo. """
+    if not _recarga_autocomplete.acquire(blocking=False):
+        return # Já existe uma recarga em andamento
+
+    def recarregar():
+        try:
+            recarregar_indice_autocomplete()
+        finally:
+            _recarga_autocomplete.release()
+
+    threading.Thread(target=recarregar, name='recarga-autocomplete', daemon=True).start()
+
+
 class ProdutoDAO:
     
     def __init__(self):
         self.table_name = "produto"
     
-    def find_all(self, termo_busca=None):
-        """ Retorna todos os produtos, opcionalmente filtrando por nome ou codigo_barras. """
+    @staticmethod
+    def _validar_listagem(campos, ordem: str) -> tuple[tuple, str, bool]:
+        """ Confere ?campos= e ?ordem= da listagem. Retorna (campos, coluna da ordem, decrescente). """
+        campos = tuple(campos) if campos else CAMPOS_LISTAGEM
+        invalidos = [c for c in campos if c not in CAMPOS_LISTAGEM]
+        if invalidos:
+            raise ValueError(f"Campo(s) inválido(s): {', '.join(invalidos)}. Campos aceitos: {', '.join(CAMPOS_LISTAGEM)}.")
+
+        ordem = ordem or 'codigo_produto'
+        coluna = ordem.lstrip('-')
+        if coluna not in ORDENS_LISTAGEM:
+            raise ValueError(f"Ordem inválida: {ordem}. Aceitas: {', '.join(ORDENS_LISTAGEM)} (prefixo '-' para decrescente).")
+        return campos, coluna, ordem.startswith('-')
+
+    def _sql_listagem(self, campos: tuple, coluna_ordem: str, saldo_por_linha: bool) -> str:
+        """
+        SELECT da listagem só com as colunas pedidas (mais codigo_produto e a coluna
+        da ordem, usados no cursor). O saldo (view estoque_saldo) só entra se pedido:
+        por subconsulta em cada linha da página, ou por junção na listagem completa.
+        """
+        colunas = []
+        juncao = ""
+        for campo in CAMPOS_LISTAGEM:
+            if campo not in campos and campo not in ('codigo_produto', coluna_ordem):
+                continue
+            if campo != 'quantidade':
+                colunas.append(f"p.{campo}")
+            elif saldo_por_linha:
+                colunas.append("COALESCE((SELECT s.quantidade FROM estoque_saldo s WHERE s.codigo_produto = p.codigo_produto), 0) AS quantidade")
+            else:
+                colunas.append("COALESCE(e.quantidade, 0) AS quantidade")
+                juncao = "LEFT JOIN estoque_saldo e ON p.codigo_produto = e.codigo_produto"
+        return f"SELECT {', '.join(colunas)} FROM {self.table_name} p {juncao}"
+
+    def find_all(self, termo_busca=None, campos=None, ordem: str = None):
+        """
+        Retorna todos os produtos, opcionalmente filtrando por nome ou codigo_barras.
+        campos: colunas desejadas (CAMPOS_LISTAGEM; padrão: todas). ordem: uma de
+        ORDENS_LISTAGEM, com '-' na frente para decrescente. Levanta ValueError se inválidos.
+        """
+        campos, coluna_ordem, decrescente = self._validar_listagem(campos, ordem)
+        direcao = "DESC" if decrescente else "ASC"
+
         conn = None
         params = []
         try:
             conn = get_db_connection()
             with conn.cursor() as cur:
-                sql = f"""
-                    SELECT 
-                        p.codigo_produto, p.nome, p.descricao, p.preco, p.codigo_barras, 
-                        COALESCE(e.quantidade, 0) AS quantidade
-                    FROM {self.table_name} p
-                    LEFT JOIN estoque e ON p.codigo_produto = e.codigo_produto
-                """
+                sql = self._sql_listagem(campos, coluna_ordem, saldo_por_linha=False)
 
                 if termo_busca:
                     # Se houver termo de busca, adiciona a cláusula WHERE
@@ -35,7 +157,7 @@ class ProdutoDAO:
                     """
                     params.extend([termo_like, termo_like])
                 
-                sql += " ORDER BY p.codigo_produto;"
+                sql += f" ORDER BY p.{coluna_ordem} {direcao}, p.codigo_produto {direcao};"
 
                 cur.execute(sql, params) 
                 
@@ -48,6 +170,295 @@ class ProdutoDAO:
             if conn:
                 conn.close()
 
+    def find_all_paginado(self, campos=None, ordem: str = None, limite: int = 50, cursor: str = None) -> dict:
+        """
+        Uma página da listagem, por keyset em (coluna da ordem, codigo_produto),
+        com os mesmos campos/ordem de find_all. Retorna {'produtos': [...],
+        'proximo_cursor': str | None}. Levanta ValueError (inclui CursorInvalidoError).
+        """
+        campos, coluna_ordem, decrescente = self._validar_listagem(campos, ordem)
+        direcao = "DESC" if decrescente else "ASC"
+
+        params = []
+        condicao = ""
+        if cursor:
+            valor, codigo = decode_cursor(cursor, 2)
+            try:
+                valor = {'codigo_produto': int, 'nome': str, 'preco': Decimal}[coluna_ordem](valor)
+                codigo = int(codigo)
+            except (ValueError, TypeError, InvalidOperation) as e:
+                raise CursorInvalidoError("Cursor de paginação inválido.") from e
+            comparacao = "<" if decrescente else ">"
+            if coluna_ordem == 'codigo_produto':
+                condicao = f" WHERE p.codigo_produto {comparacao} %s"
+                params.append(codigo)
+            else:
+                condicao = f" WHERE (p.{coluna_ordem}, p.codigo_produto) {comparacao} (%s, %s)"
+                params.extend([valor, codigo])
+
+        conn = get_db_connection()
+        if conn is None: return None
+
+        try:
+            with conn.cursor() as cur:
+                sql = self._sql_listagem(campos, coluna_ordem, saldo_por_linha=True) + condicao
+                sql += f" ORDER BY p.{coluna_ordem} {direcao}, p.codigo_produto {direcao} LIMIT %s;"
+                params.append(limite + 1) # Um a mais para saber se existe próxima página
+
+                cur.execute(sql, params)
+                columns = [desc[0] for desc in cur.description]
+                produtos = [dict(zip(columns, row)) for row in cur.fetchall()]
+        except Exception as e:
+            logger.error(f"Erro ao listar produtos (página): {e}")
+            return None
+        finally:
+            conn.close()
+
+        proximo_cursor = None
+        if len(produtos) > limite:
+            produtos = produtos[:limite]
+            ultimo = produtos[-1]
+            proximo_cursor = encode_cursor(ultimo[coluna_ordem], ultimo['codigo_produto'])
+        return {'produtos': produtos, 'proximo_cursor': proximo_cursor}
+
+    def buscar(self, termo: str, limite: int = 20, cursor: str = None) -> dict:
+        """
+        Busca de produtos para o caixa, sem diferenciar acentos e maiúsculas.
+        Cada palavra digitada casa como prefixo no nome/descrição (busca textual em
+        português, índice GIN), e um termo numérico casa com o início do código de barras.
+        Ordena por relevância: código de barras exato, nome começando pelo termo,
+        popularidade nas vendas recentes (produto_popularidade) e ts_rank (nome pesa
+        mais que descrição). Paginada por keyset (relevância, código).
+        Retorna {'produtos': [...], 'proximo_cursor': str | None}. Levanta
+        CursorInvalidoError se o cursor não for válido; erros de banco são
+        propagados (uma página vazia significaria fim da busca).
+        """
+        apos = None
+        if cursor:
+            relevancia, codigo = decode_cursor(cursor, 2)
+            try:
+                apos = (float(relevancia), int(codigo))
+            except (ValueError, TypeError) as e:
+                raise CursorInvalidoError("Cursor de paginação inválido.") from e
+
+        palavras = re.findall(r'[a-z0-9]+', normalizar_busca(termo))
+        if not palavras:
+            return {'produtos': [], 'proximo_cursor': None}
+        termo_normalizado = ' '.join(palavras) # Sem curingas do LIKE
+
+        params = {
+            'consulta': ' & '.join(f"{palavra}:*" for palavra in palavras),
+            'termo': termo.strip(),
+            'prefixo': termo_normalizado + '%',
+            'trecho': '%' + termo_normalizado + '%',
+            'limite': limite + 1, # Um a mais para saber se existe próxima página
+        }
+
+        condicoes = ["p.busca_tsv @@ to_tsquery('portuguese', %(consulta)s)"]
+        if termo_normalizado.isdigit():
+            condicoes.append("p.codigo_barras LIKE %(prefixo)s")
+        if self._trigrama_disponivel():
+            # Trechos no meio das palavras (ex.: "zinho" em "cafezinho"), acelerado pelo índice de trigramas
+            condicoes.append("p.nome_busca LIKE %(trecho)s")
+
+        sql = f"""
+            SELECT * FROM (
+                SELECT 
+                    p.codigo_produto, p.nome, p.descricao, p.preco, p.codigo_barras, 
+                    COALESCE(e.quantidade, 0) AS quantidade,
+                    (CASE WHEN p.codigo_barras = %(termo)s THEN 100 ELSE 0 END
+                     + CASE WHEN p.nome_busca LIKE %(prefixo)s THEN 10 ELSE 0 END
+                     + 5 * COALESCE(pp.pontuacao, 0)
+                     + ts_rank(p.busca_tsv, to_tsquery('portuguese', %(consulta)s)))::float8 AS relevancia
+                FROM {self.table_name} p
+                LEFT JOIN estoque_saldo e ON p.codigo_produto = e.codigo_produto
+                LEFT JOIN produto_popularidade pp ON p.codigo_produto = pp.codigo_produto
+                WHERE {" OR ".join(condicoes)}
+            ) resultado
+        """
+        if apos:
+            sql += " WHERE relevancia < %(relevancia)s OR (relevancia = %(relevancia)s AND codigo_produto > %(codigo)s)"
+            params['relevancia'], params['codigo'] = apos
+        sql += " ORDER BY relevancia DESC, codigo_produto LIMIT %(limite)s;"
+
+        conn = None
+        try:
+            conn = get_db_connection()
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                columns = [desc[0] for desc in cur.description]
+                produtos = [dict(zip(columns, row)) for row in cur.fetchall()]
+        except Exception as e:
+            logger.error(f"Erro na busca de produtos por '{termo}': {e}")
+            raise
+        finally:
+            if conn:
+                conn.close()
+
+        proximo_cursor = None
+        if len(produtos) > limite:
+            produtos = produtos[:limite]
+            proximo_cursor = encode_cursor(produtos[-1]['relevancia'], produtos[-1]['codigo_produto'])
+        return {'produtos': produtos, 'proximo_cursor': proximo_cursor}
+
+    @staticmethod
+    def _trigrama_disponivel() -> bool:
+        """ True se o índice de trigramas foi criado (pg_trgm instalado, ver scripts/create_tables.py). """
+        global _trigrama_disponivel
+        if _trigrama_disponivel is None:
+            conn = get_db_connection()
+            if conn is None:
+                return False
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT to_regclass('idx_produto_nome_busca_trgm') IS NOT NULL;")
+                    _trigrama_disponivel = cur.fetchone()[0]
+            except Exception as e:
+                logger.error(f"Erro ao verificar o índice de trigramas: {e}")
+                return False
+            finally:
+                conn.close()
+        return _trigrama_disponivel
+
+    def autocompletar(self, termo: str, limite: int = 10) -> list[dict]:
+        """ 
+        Sugestões para o campo de produto do caixa (codigo_produto, nome, preco,
+        codigo_barras), respondidas pelo índice em memória. O banco só é lido na
+        primeira consulta, se o índice ainda não foi carregado, e nas recargas periódicas.
+        """
+        if indice_autocomplete.carregado_em is None:
+            recarregar_indice_autocomplete()
+        elif time.monotonic() - indice_autocomplete.carregado_em > Config.AUTOCOMPLETE_RECARGA_SEGUNDOS:
+            _recarregar_em_segundo_plano()
+        return indice_autocomplete.buscar(termo, limite)
+
+    def atualizar_popularidade(self, meia_vida_dias: float = None, janela_dias: int = None) -> int:
+        """
+        Passo de manutenção (scripts/atualizar_popularidade.py): recalcula a
+        pontuação de cada produto a partir dos itens vendidos na janela, com
+        decaimento exponencial pela idade da venda, normalizada de 0 a 1 em relação
+        ao mais vendido. Produtos sem vendas na janela saem da tabela.
+        Retorna a quantidade de produtos pontuados.
+        """
+        meia_vida_dias = Config.POPULARIDADE_MEIA_VIDA_DIAS if meia_vida_dias is None else meia_vida_dias
+        janela_dias = Config.POPULARIDADE_JANELA_DIAS if janela_dias is None else janela_dias
+
+        conn = get_db_connection()
+        if conn is None: return 0
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    WITH vendido AS (
+                        SELECT vi.codigo_produto,
+                               SUM(power(0.5, GREATEST(EXTRACT(EPOCH FROM LOCALTIMESTAMP - v.data_venda), 0)
+                                              / 86400.0 / %(meia_vida)s)) AS pontos
+                        FROM venda v
+                        JOIN venda_item vi ON vi.id_venda = v.id_venda
+                        JOIN produto p ON p.codigo_produto = vi.codigo_produto
+                        WHERE v.data_venda >= LOCALTIMESTAMP - make_interval(days => %(janela)s)
+                        GROUP BY vi.codigo_produto
+                    )
+                    INSERT INTO produto_popularidade (codigo_produto, pontuacao, atualizado_em)
+                    SELECT codigo_produto, (pontos / MAX(pontos) OVER ())::real, LOCALTIMESTAMP
+                    FROM vendido
+                    ON CONFLICT (codigo_produto) DO UPDATE
+                    SET pontuacao = EXCLUDED.pontuacao, atualizado_em = EXCLUDED.atualizado_em;
+                """, {'meia_vida': meia_vida_dias, 'janela': janela_dias})
+                pontuados = cur.rowcount
+
+                # LOCALTIMESTAMP é o início da transação: sobra só o que não foi recalculado agora
+                cur.execute("DELETE FROM produto_popularidade WHERE atualizado_em < LOCALTIMESTAMP;")
+                conn.commit()
+                return pontuados
+        except Exception as e:
+            logger.error(f"Erro ao atualizar a popularidade dos produtos: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            conn.close()
+
+    def catalogo_desde(self, versao: int = None) -> dict:
+        """
+        Sincronização do catálogo pelos terminais. Com a versão recebida na
+        sincronização anterior, devolve só os produtos alterados (dados ou saldo)
+        e os códigos excluídos desde então; sem versão, ou com uma versão que este
+        banco não conhece, devolve o catálogo completo.
+        Retorna {'versao', 'completo', 'produtos': [...], 'excluidos': [...]}.
+        Uma mesma alteração pode vir em duas sincronizações seguidas (o terminal só sobrescreve).
+        """
+        conn = get_db_connection()
+        if conn is None: return None
+
+        try:
+            with conn.cursor() as cur:
+                # Versão de retorno ANTES da leitura: tudo abaixo dela já terminou e será lido agora
+                cur.execute("""
+                    SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint,
+                           pg_snapshot_xmax(pg_current_snapshot())::text::bigint;
+                """)
+                nova_versao, proxima_transacao = cur.fetchone()
+                completo = versao is None or versao > proxima_transacao
+
+                sql = """
+                    SELECT 
+                        p.codigo_produto, p.nome, p.descricao, p.preco, p.codigo_barras, 
+                        COALESCE(e.quantidade, 0) AS quantidade
+                    FROM produto p
+                    LEFT JOIN estoque_saldo e ON p.codigo_produto = e.codigo_produto
+                """
+                excluidos = []
+                if completo:
+                    cur.execute(sql + " ORDER BY p.codigo_produto;")
+                else:
+                    sql += """
+                        WHERE p.codigo_produto IN (
+                            SELECT codigo_produto FROM produto WHERE versao >= %(versao)s
+                            UNION SELECT codigo_produto FROM estoque WHERE versao >= %(versao)s
+                            UNION SELECT codigo_produto FROM estoque_fracao WHERE versao >= %(versao)s
+                        )
+                        ORDER BY p.codigo_produto;
+                    """
+                    cur.execute(sql, {'versao': versao})
+                columns = [desc[0] for desc in cur.description]
+                produtos = [dict(zip(columns, row)) for row in cur.fetchall()]
+
+                if not completo:
+                    cur.execute(
+                        "SELECT codigo_produto FROM catalogo_exclusao WHERE versao >= %s ORDER BY codigo_produto;",
+                        (versao,)
+                    )
+                    excluidos = [row[0] for row in cur.fetchall()]
+
+                return {'versao': nova_versao, 'completo': completo, 'produtos': produtos, 'excluidos': excluidos}
+        except Exception as e:
+            logger.error(f"Erro ao sincronizar o catálogo desde a versão {versao}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def catalogo_alterado_desde(self, versao: int):
+        """
+        True se algum produto foi incluído, alterado ou excluído desde a versão
+        (mesma numeração de catalogo_desde; o saldo de estoque não conta).
+        Consulta só os índices de versão. None em caso de erro.
+        """
+        conn = get_db_connection()
+        if conn is None: return None
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT EXISTS (SELECT 1 FROM produto WHERE versao >= %(versao)s)
+                        OR EXISTS (SELECT 1 FROM catalogo_exclusao WHERE versao >= %(versao)s);
+                """, {'versao': versao})
+                return cur.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Erro ao verificar alterações do catálogo desde a versão {versao}: {e}")
+            return None
+        finally:
+            conn.close()
+
     def find_by_id(self, codigo_produto: int):
         """ Retorna um produto pelo seu código, INCLUINDO ESTOQUE. """
         conn = None
@@ -60,7 +471,7 @@ class ProdutoDAO:
                         p.codigo_produto, p.nome, p.descricao, p.preco, p.codigo_barras, 
                         COALESCE(e.quantidade, 0) AS quantidade
                     FROM produto p
-                    LEFT JOIN estoque e ON p.codigo_produto = e.codigo_produto
+                    LEFT JOIN estoque_saldo e ON p.codigo_produto = e.codigo_produto
                     WHERE p.codigo_produto = %s;
                 """
                 cur.execute(sql, (codigo_produto,))
@@ -78,19 +489,64 @@ class ProdutoDAO:
             if conn:
                 conn.close()
 
+    def find_by_ids(self, codigos: list[int]):
+        """ Vários produtos (com estoque) em uma consulta, na ordem de 'codigos'. Os inexistentes ficam de fora. None em erro. """
+        conn = get_db_connection()
+        if conn is None: return None
+
+        try:
+            with conn.cursor() as cur:
+                sql = """
+                    SELECT 
+                        p.codigo_produto, p.nome, p.descricao, p.preco, p.codigo_barras, 
+                        COALESCE(e.quantidade, 0) AS quantidade
+                    FROM produto p
+                    LEFT JOIN estoque_saldo e ON p.codigo_produto = e.codigo_produto
+                    WHERE p.codigo_produto = ANY(%s);
+                """
+                cur.execute(sql, (list(codigos),))
+                columns = [desc[0] for desc in cur.description]
+                produtos = [dict(zip(columns, row)) for row in cur.fetchall()]
+                return ordenar_por_ids(produtos, codigos, 'codigo_produto')
+        except Exception as e:
+            logger.error(f"Erro ao buscar produtos {codigos}: {e}")
+            return None
+        finally:
+            conn.close()
+
     def find_by_codigo_barras(self, codigo_barras: str): 
-        """ Retorna um produto pelo seu código de barras (chave de negócio). """
+        """ 
+        Retorna um produto pelo seu código de barras (chave de negócio).
+        Caminho do scan no caixa: os dados de catálogo vêm do cache em memória e
+        o saldo de um cache de TTL curto; só vai ao banco o que tiver expirado.
+        """
+        produto = _cache_codigo_barras.get(codigo_barras)
+        if produto is not None:
+            quantidade = _cache_saldo.get(produto['codigo_produto'])
+            if quantidade is not None:
+                return {**produto, 'quantidade': quantidade}
+
         conn = None
         try:
             conn = get_db_connection()
             with conn.cursor() as cur:
+                if produto is not None:
+                    # Catálogo em cache: busca só o saldo (PK)
+                    cur.execute(
+                        "SELECT COALESCE((SELECT quantidade FROM estoque_saldo WHERE codigo_produto = %s), 0);",
+                        (produto['codigo_produto'],)
+                    )
+                    quantidade = cur.fetchone()[0]
+                    _cache_saldo.set(produto['codigo_produto'], quantidade)
+                    return {**produto, 'quantidade': quantidade}
+
                 # O JOIN é necessário para retornar a quantidade do estoque junto
                 sql = """
                     SELECT 
                         p.codigo_produto, p.nome, p.descricao, p.preco, p.codigo_barras, 
                         COALESCE(e.quantidade, 0) AS quantidade
                     FROM produto p
-                    LEFT JOIN estoque e ON p.codigo_produto = e.codigo_produto
+                    LEFT JOIN estoque_saldo e ON p.codigo_produto = e.codigo_produto
                     WHERE p.codigo_barras = %s;
                 """
                 cur.execute(sql, (codigo_barras,))
@@ -100,7 +556,12 @@ class ProdutoDAO:
                     return None
                 
                 columns = [desc[0] for desc in cur.description]
-                return dict(zip(columns, row))
+                resultado = dict(zip(columns, row))
+
+                catalogo = {k: v for k, v in resultado.items() if k != 'quantidade'}
+                _cache_codigo_barras.set(codigo_barras, catalogo)
+                _cache_saldo.set(resultado['codigo_produto'], resultado['quantidade'])
+                return resultado
         except Exception as e:
             logger.error(f"Erro ao buscar produto por código de barras {codigo_barras}: {e}")
             return None
@@ -136,6 +597,7 @@ class ProdutoDAO:
                 )
 
                 conn.commit()
+                indice_autocomplete.atualizar(last_id, nome=nome, preco=preco, codigo_barras=codigo_barras)
                 return last_id
         except Exception as e:
             logger.error(f"Erro ao inserir produto e inicializar estoque: {e}")
@@ -146,6 +608,188 @@ class ProdutoDAO:
             if conn:
                 conn.close()
 
+    @staticmethod
+    def _ler_cabecalho_importacao(arquivo) -> tuple[list, str]:
+        """ Colunas e delimitador (',' ou ';') a partir da primeira linha do CSV. """
+        try:
+            cabecalho = arquivo.readline().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ImportacaoInvalidaError("O arquivo deve estar em UTF-8.")
+
+        delimitador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+        colunas = [c.strip().lower() for c in next(csv.reader([cabecalho], delimiter=delimitador), [])]
+
+        desconhecidas = [c for c in colunas if c not in COLUNAS_IMPORTACAO]
+        if desconhecidas:
+            raise ImportacaoInvalidaError(
+                f"Coluna(s) desconhecida(s) no cabeçalho: {', '.join(desconhecidas)}. "
+                f"Colunas aceitas: {', '.join(COLUNAS_IMPORTACAO)}."
+            )
+        faltando = [c for c in COLUNAS_OBRIGATORIAS_IMPORTACAO if c not in colunas]
+        if faltando:
+            raise ImportacaoInvalidaError(f"Coluna(s) obrigatória(s) ausente(s) no cabeçalho: {', '.join(faltando)}.")
+        if len(set(colunas)) != len(colunas):
+            raise ImportacaoInvalidaError("Coluna repetida no cabeçalho.")
+        return colunas, delimitador
+
+    def importar_csv(self, arquivo, simular: bool = False) -> dict:
+        """
+        Importação em massa de produtos a partir de um CSV (arquivo binário, lido em
+        blocos). Cabeçalho com nome, descricao, preco e, opcionalmente, codigo_barras
+        e quantidade; separado por ',' ou ';'.
+
+        O arquivo vai por COPY para uma tabela temporária e é validado em SQL com as
+        mesmas regras do cadastro (ProdutoSchema). Linhas válidas com código de barras
+        já cadastrado atualizam o produto (e o saldo, se a quantidade vier preenchida);
+        as demais viram produtos novos com estoque inicial. Tudo em uma transação;
+        linhas com erro ficam de fora e aparecem no relatório.
+        Com simular=True, só valida (nada é gravado).
+
+        Retorna {'total', 'inseridos', 'atualizados', 'rejeitados', 'simulacao',
+        'erros': [{'linha', 'codigo_barras', 'erro'}]} ('linha' conta o cabeçalho como 1).
+        Levanta ImportacaoInvalidaError se o arquivo não puder ser lido; None em erro de banco.
+        """
+        colunas, delimitador = self._ler_cabecalho_importacao(arquivo)
+
+        conn = get_db_connection()
+        if conn is None: return None
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE importacao_csv (
+                        linha INTEGER GENERATED ALWAYS AS IDENTITY (START WITH 2),
+                        nome TEXT, descricao TEXT, preco TEXT, codigo_barras TEXT, quantidade TEXT
+                    ) ON COMMIT DROP;
+                """)
+
+                # Colunas conferidas em _ler_cabecalho_importacao (só nomes de COLUNAS_IMPORTACAO)
+                try:
+                    with cur.copy(
+                        f"COPY importacao_csv ({', '.join(colunas)}) "
+                        f"FROM STDIN (FORMAT csv, DELIMITER '{delimitador}', ENCODING 'UTF8')"
+                    ) as copy:
+                        while bloco := arquivo.read(TAMANHO_BLOCO_COPY):
+                            copy.write(bloco)
+                except psycopg.errors.DataError as e:
+                    conn.rollback()
+                    # O COPY numera a partir da primeira linha de dados
+                    linha = re.search(r'line (\d+)', e.diag.context or '')
+                    onde = f" na linha {int(linha.group(1)) + 1}" if linha else ""
+                    raise ImportacaoInvalidaError(f"CSV inválido{onde}: {e.diag.message_primary}")
+
+                # Sem cadastros/alterações de produto concorrentes até o fim (as vendas não são bloqueadas)
+                if not simular:
+                    cur.execute(f"LOCK TABLE {self.table_name} IN SHARE ROW EXCLUSIVE MODE;")
+
+                # Validação em uma passada: mesmas regras do ProdutoSchema e das colunas da tabela,
+                # códigos de barras repetidos no arquivo e saldo já distribuído em estoque_fracao.
+                # Linhas válidas sem produto com o mesmo código de barras recebem o código novo aqui.
+                cur.execute(rf"""
+                    CREATE TEMP TABLE importacao_produto ON COMMIT DROP AS
+                    SELECT
+                        v.linha, v.nome, v.descricao, v.codigo_barras, v.erro,
+                        CASE WHEN v.erro IS NULL THEN v.preco::numeric(10, 2) END AS preco_valor,
+                        CASE WHEN v.erro IS NULL THEN v.quantidade::integer END AS quantidade_valor,
+                        (v.erro IS NULL AND v.codigo_existente IS NULL) AS novo,
+                        CASE
+                            WHEN v.erro IS NOT NULL THEN NULL
+                            WHEN v.codigo_existente IS NOT NULL THEN v.codigo_existente
+                            WHEN {'FALSE' if simular else 'TRUE'} THEN nextval(pg_get_serial_sequence('{self.table_name}', 'codigo_produto'))
+                        END AS codigo_produto
+                    FROM (
+                        SELECT c.*, p.codigo_produto AS codigo_existente,
+                            CASE
+                                WHEN c.nome IS NULL OR length(c.nome) NOT BETWEEN 3 AND 100 THEN 'nome deve ter de 3 a 100 caracteres'
+                                WHEN c.descricao IS NULL OR length(c.descricao) NOT BETWEEN 5 AND 255 THEN 'descricao deve ter de 5 a 255 caracteres'
+                                WHEN c.preco IS NULL OR c.preco !~ '^\d{{1,8}}(\.\d{{1,2}})?$' THEN 'preco inválido: ' || COALESCE(c.preco, '(vazio)')
+                                WHEN c.preco::numeric <= 0 THEN 'preco deve ser maior que zero'
+                                WHEN length(c.codigo_barras) > 50 THEN 'codigo_barras com mais de 50 caracteres'
+                                WHEN c.codigo_barras !~ '^[ -~]*$' THEN 'codigo_barras com caracteres fora do ASCII imprimível'
+                                WHEN c.quantidade !~ '^\d{{1,9}}$' THEN 'quantidade deve ser um inteiro não negativo: ' || c.quantidade
+                                WHEN c.codigo_barras IS NOT NULL AND count(*) OVER barras > 1
+                                    THEN 'codigo_barras repetido no arquivo (linhas ' || string_agg(c.linha::text, ', ') OVER barras || ')'
+                                WHEN c.quantidade::integer < f.soma THEN 'quantidade menor que o saldo já distribuído entre os caixas (' || f.soma || ')'
+                            END AS erro
+                        FROM (
+                            SELECT linha,
+                                   NULLIF(trim(nome), '') AS nome,
+                                   NULLIF(trim(descricao), '') AS descricao,
+                                   replace(trim(preco), ',', '.') AS preco,
+                                   NULLIF(trim(codigo_barras), '') AS codigo_barras,
+                                   NULLIF(trim(quantidade), '') AS quantidade
+                            FROM importacao_csv
+                        ) c
+                        LEFT JOIN {self.table_name} p ON p.codigo_barras = c.codigo_barras
+                        LEFT JOIN (
+                            SELECT codigo_produto, SUM(quantidade) AS soma FROM estoque_fracao GROUP BY codigo_produto
+                        ) f ON f.codigo_produto = p.codigo_produto
+                        WINDOW barras AS (PARTITION BY c.codigo_barras ORDER BY c.linha ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+                    ) v
+                    ORDER BY v.linha;
+                """)
+
+                if not simular:
+                    cur.execute(f"""
+                        INSERT INTO {self.table_name} (codigo_produto, nome, descricao, preco, codigo_barras)
+                        OVERRIDING SYSTEM VALUE
+                        SELECT codigo_produto, nome, descricao, preco_valor, codigo_barras
+                        FROM importacao_produto WHERE novo;
+                    """)
+                    cur.execute("""
+                        INSERT INTO estoque (codigo_produto, quantidade)
+                        SELECT codigo_produto, COALESCE(quantidade_valor, 0) FROM importacao_produto WHERE novo;
+                    """)
+
+                    # Produtos existentes: só as linhas que mudam algo (o resto não entra na sincronização dos terminais)
+                    cur.execute(f"""
+                        UPDATE {self.table_name} p SET nome = s.nome, descricao = s.descricao, preco = s.preco_valor
+                        FROM importacao_produto s
+                        WHERE s.codigo_produto = p.codigo_produto AND NOT s.novo AND s.erro IS NULL
+                          AND (p.nome, p.descricao, p.preco) IS DISTINCT FROM (s.nome, s.descricao, s.preco_valor);
+                    """)
+                    # O saldo informado vale para o produto todo: a linha central fica com o que não está nas frações
+                    cur.execute("""
+                        UPDATE estoque e SET quantidade = s.quantidade_valor - COALESCE(f.soma, 0)
+                        FROM importacao_produto s
+                        LEFT JOIN (
+                            SELECT codigo_produto, SUM(quantidade) AS soma FROM estoque_fracao GROUP BY codigo_produto
+                        ) f ON f.codigo_produto = s.codigo_produto
+                        WHERE s.codigo_produto = e.codigo_produto AND NOT s.novo AND s.erro IS NULL
+                          AND s.quantidade_valor IS NOT NULL
+                          AND e.quantidade <> s.quantidade_valor - COALESCE(f.soma, 0);
+                    """)
+
+                cur.execute("""
+                    SELECT count(*),
+                           count(*) FILTER (WHERE novo),
+                           count(*) FILTER (WHERE NOT novo AND erro IS NULL),
+                           count(*) FILTER (WHERE erro IS NOT NULL)
+                    FROM importacao_produto;
+                """)
+                total, inseridos, atualizados, rejeitados = cur.fetchone()
+                cur.execute("SELECT linha, codigo_barras, erro FROM importacao_produto WHERE erro IS NOT NULL ORDER BY linha;")
+                erros = [{'linha': linha, 'codigo_barras': codigo_barras, 'erro': erro} for linha, codigo_barras, erro in cur.fetchall()]
+
+            if simular:
+                conn.rollback()
+            else:
+                conn.commit()
+                invalidar_catalogo_em_memoria()
+
+            return {
+                'total': total, 'inseridos': inseridos, 'atualizados': atualizados, 'rejeitados': rejeitados,
+                'simulacao': simular, 'erros': erros
+            }
+        except ImportacaoInvalidaError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao importar produtos: {e}")
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
     def update(self, codigo_produto: int, **kwargs):
         """ 
         Atualiza campos de um produto. 
@@ -173,6 +817,11 @@ class ProdutoDAO:
                 cur.execute(sql, tuple(values))
                 rows_affected = cur.rowcount
                 conn.commit()
+                invalidar_cache_produto(codigo_produto)
+                if rows_affected:
+                    campos = {k: v for k, v in kwargs.items() if k in ('nome', 'preco', 'codigo_barras')}
+                    if campos:
+                        indice_autocomplete.atualizar(codigo_produto, **campos)
                 return rows_affected
 
         except Exception as e:
@@ -198,6 +847,8 @@ class ProdutoDAO:
                 rows_affected = cur.rowcount
                 
                 conn.commit()
+                invalidar_cache_produto(codigo_produto)
+                indice_autocomplete.remover(codigo_produto)
                 return rows_affected
         except Exception as e:
             logger.error(f"Erro ao deletar produto {codigo_produto}: {e}")
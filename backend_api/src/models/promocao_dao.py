@@ -0,0 +1,142 @@
+# src/models/promocao_dao.py
+
+from src.db_connection import get_db_connection
+from src.utils.cache import TTLCache
+from config import Config
+from datetime import datetime, timezone
+import psycopg
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Promoções ainda não encerradas, agrupadas por produto (uma única entrada), para o scan
+# do caixa. Recarregadas a cada PROMOCAO_CACHE_TTL; alterações por esta API limpam na hora
+_cache_promocoes = TTLCache(maxsize=1, ttl=Config.PROMOCAO_CACHE_TTL, nome='promocoes')
+CHAVE_PROMOCOES = 'promocoes'
+
+COLUNAS = "id_promocao, codigo_produto, descricao, preco_promocional, quantidade_minima, inicio, fim"
+
+
+class PromocaoDAO:
+
+    def __init__(self):
+        self.table_name = "promocao"
+
+    def _promocoes_por_produto(self) -> dict:
+        """ {codigo_produto: [promoções não encerradas]}, do cache ou do banco. """
+        promocoes = _cache_promocoes.get(CHAVE_PROMOCOES)
+        if promocoes is not None:
+            return promocoes
+
+        conn = get_db_connection()
+        if conn is None: return {}
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT {COLUNAS} FROM {self.table_name}
+                    WHERE fim > now()
+                    ORDER BY codigo_produto, quantidade_minima, preco_promocional;
+                """)
+                columns = [desc[0] for desc in cur.description]
+                promocoes = {}
+                for row in cur.fetchall():
+                    promocao = dict(zip(columns, row))
+                    promocoes.setdefault(promocao['codigo_produto'], []).append(promocao)
+        except Exception as e:
+            logger.error(f"Erro ao carregar promoções: {e}")
+            return {}
+        finally:
+            conn.close()
+
+        _cache_promocoes.set(CHAVE_PROMOCOES, promocoes)
+        return promocoes
+
+    def vigentes(self, codigo_produto: int) -> list[dict]:
+        """ Promoções do produto valendo agora (inicio <= agora < fim), servidas da memória. """
+        agora = datetime.now(timezone.utc)
+        return [
+            promocao for promocao in self._promocoes_por_produto().get(codigo_produto, ())
+            if promocao['inicio'] <= agora < promocao['fim']
+        ]
+
+    def criar(self, dados: dict):
+        """ Cadastra uma promoção (PromocaoSchema). Levanta ValueError se o produto não existir. """
+        conn = get_db_connection()
+        if conn is None: return None
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    INSERT INTO {self.table_name} (codigo_produto, descricao, preco_promocional, quantidade_minima, inicio, fim)
+                    VALUES (%s, %s, %s, %s, COALESCE(%s, now()), %s)
+                    RETURNING {COLUNAS};
+                    """,
+                    (dados['codigo_produto'], dados.get('descricao'), dados['preco_promocional'],
+                     dados.get('quantidade_minima', 1), dados.get('inicio'), dados['fim'])
+                )
+                columns = [desc[0] for desc in cur.description]
+                promocao = dict(zip(columns, cur.fetchone()))
+            conn.commit()
+        except psycopg.errors.ForeignKeyViolation:
+            conn.rollback()
+            raise ValueError(f"Produto {dados['codigo_produto']} não encontrado.")
+        except psycopg.errors.CheckViolation:
+            conn.rollback()
+            raise ValueError("O fim da promoção deve ser posterior ao início.")
+        except Exception as e:
+            logger.error(f"Erro ao cadastrar promoção: {e}")
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+        _cache_promocoes.clear()
+        return promocao
+
+    def find_all(self, codigo_produto: int = None, incluir_encerradas: bool = False) -> list[dict]:
+        """ Promoções por início (mais recentes primeiro); por padrão, só as não encerradas. """
+        conn = get_db_connection()
+        if conn is None: return []
+
+        try:
+            with conn.cursor() as cur:
+                condicoes, params = [], []
+                if not incluir_encerradas:
+                    condicoes.append("fim > now()")
+                if codigo_produto is not None:
+                    condicoes.append("codigo_produto = %s")
+                    params.append(codigo_produto)
+                sql = f"SELECT {COLUNAS} FROM {self.table_name}"
+                if condicoes:
+                    sql += " WHERE " + " AND ".join(condicoes)
+                sql += " ORDER BY inicio DESC, id_promocao DESC;"
+                cur.execute(sql, params)
+                columns = [desc[0] for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
+        except Exception as e:
+            logger.error(f"Erro ao listar promoções: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def delete(self, id_promocao: int) -> int:
+        """ Exclui a promoção. Retorna 1 se excluiu, 0 se não encontrada, -1 em erro. """
+        conn = get_db_connection()
+        if conn is None: return -1
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"DELETE FROM {self.table_name} WHERE id_promocao = %s;", (id_promocao,))
+                rows_affected = cur.rowcount
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao excluir promoção {id_promocao}: {e}")
+            conn.rollback()
+            return -1
+        finally:
+            conn.close()
+
+        _cache_promocoes.clear()
+        return rows_affected
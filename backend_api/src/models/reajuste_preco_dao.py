@@ -0,0 +1,273 @@
+# src/models/reajuste_preco_dao.py
+
+from src.db_connection import get_db_connection
+from src.models.produto_dao import invalidar_catalogo_em_memoria
+import psycopg
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Aplica um reajuste em um único UPDATE. Escopo: os produtos da lista (itens) ou, sem itens,
+# todo o catálogo; com id_fornecedor, só os produtos já comprados desse fornecedor.
+# Preço do item quando informado, senão o preço atual com o percentual (arredondado em centavos).
+SQL_APLICAR_REAJUSTE = """
+    WITH alvo AS (
+        SELECT i.codigo_produto, i.preco
+        FROM reajuste_preco_item i
+        WHERE i.id_reajuste = %(id_reajuste)s
+        UNION ALL
+        SELECT p.codigo_produto, NULL
+        FROM produto p
+        WHERE NOT EXISTS (SELECT 1 FROM reajuste_preco_item WHERE id_reajuste = %(id_reajuste)s)
+    ),
+    novo AS (
+        SELECT a.codigo_produto,
+               COALESCE(a.preco, round(p.preco * (1 + r.percentual / 100), 2)) AS preco
+        FROM alvo a
+        JOIN produto p ON p.codigo_produto = a.codigo_produto
+        JOIN reajuste_preco r ON r.id_reajuste = %(id_reajuste)s
+        WHERE r.id_fornecedor IS NULL OR a.codigo_produto IN (
+            SELECT ci.codigo_produto
+            FROM compra_item ci
+            JOIN compra c ON c.id_compra = ci.id_compra
+            WHERE c.id_fornecedor = r.id_fornecedor
+        )
+    )
+    UPDATE produto p SET preco = n.preco
+    FROM novo n
+    WHERE p.codigo_produto = n.codigo_produto AND n.preco > 0 AND p.preco <> n.preco;
+"""
+
+
+class ReajustePrecoDAO:
+
+    def __init__(self):
+        self.table_name = "reajuste_preco"
+
+    def _aplicar(self, cur, id_reajuste: int) -> int:
+        """ Aplica o reajuste na transação do cursor. O histórico de preços é gravado pelo trigger de produto. """
+        cur.execute("SELECT set_config('pdv.id_reajuste', %s, true);", (str(id_reajuste),))
+        cur.execute(SQL_APLICAR_REAJUSTE, {'id_reajuste': id_reajuste})
+        alterados = cur.rowcount
+        cur.execute(
+            f"""
+            UPDATE {self.table_name}
+            SET status = 'aplicado', aplicado_em = now(), produtos_alterados = %s
+            WHERE id_reajuste = %s;
+            """,
+            (alterados, id_reajuste)
+        )
+        return alterados
+
+    def criar(self, dados: dict) -> dict:
+        """
+        Registra um reajuste (ReajustePrecoSchema) e, se a vigência já chegou (ou não
+        foi informada), aplica na mesma transação; senão fica agendado.
+        Itens são identificados por codigo_produto ou codigo_barras; os que não
+        existem voltam em 'nao_encontrados'. Retorna o reajuste ou None em erro.
+        Levanta ValueError se o fornecedor não existir.
+        """
+        conn = get_db_connection()
+        if conn is None: return None
+
+        itens = dados.get('itens') or []
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    INSERT INTO {self.table_name} (descricao, percentual, id_fornecedor, vigencia)
+                    VALUES (%s, %s, %s, COALESCE(%s, now()))
+                    RETURNING id_reajuste, vigencia <= now();
+                    """,
+                    (dados.get('descricao'), dados.get('percentual'), dados.get('id_fornecedor'), dados.get('vigencia'))
+                )
+                id_reajuste, vigente = cur.fetchone()
+
+                nao_encontrados = []
+                if itens:
+                    # Resolve os itens em uma consulta (código ou código de barras); repetidos: vale o último
+                    params = {
+                        'id_reajuste': id_reajuste,
+                        'codigos': [item.get('codigo_produto') for item in itens],
+                        'barras': [item.get('codigo_barras') for item in itens],
+                        'precos': [item.get('preco') for item in itens],
+                    }
+                    cur.execute("""
+                        CREATE TEMP TABLE reajuste_pedido ON COMMIT DROP AS
+                        SELECT t.ordem, COALESCE(p1.codigo_produto, p2.codigo_produto) AS codigo_produto,
+                               t.codigo_produto AS codigo_informado, t.codigo_barras, t.preco
+                        FROM unnest(%(codigos)s::integer[], %(barras)s::text[], %(precos)s::numeric[])
+                             WITH ORDINALITY AS t(codigo_produto, codigo_barras, preco, ordem)
+                        LEFT JOIN produto p1 ON p1.codigo_produto = t.codigo_produto
+                        LEFT JOIN produto p2 ON p2.codigo_barras = t.codigo_barras;
+                    """, params)
+                    cur.execute("""
+                        INSERT INTO reajuste_preco_item (id_reajuste, codigo_produto, preco)
+                        SELECT DISTINCT ON (codigo_produto) %(id_reajuste)s, codigo_produto, preco
+                        FROM reajuste_pedido
+                        WHERE codigo_produto IS NOT NULL
+                        ORDER BY codigo_produto, ordem DESC;
+                    """, params)
+                    cur.execute("""
+                        SELECT codigo_informado, codigo_barras FROM reajuste_pedido
+                        WHERE codigo_produto IS NULL ORDER BY ordem;
+                    """)
+                    nao_encontrados = [
+                        {'codigo_produto': codigo} if codigo is not None else {'codigo_barras': barras}
+                        for codigo, barras in cur.fetchall()
+                    ]
+
+                if vigente:
+                    self._aplicar(cur, id_reajuste)
+
+            conn.commit()
+        except psycopg.errors.ForeignKeyViolation:
+            conn.rollback()
+            raise ValueError(f"Fornecedor {dados.get('id_fornecedor')} não encontrado.")
+        except Exception as e:
+            logger.error(f"Erro ao registrar reajuste de preços: {e}")
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+        if vigente:
+            invalidar_catalogo_em_memoria()
+        reajuste = self.find_by_id(id_reajuste)
+        if reajuste is not None:
+            reajuste['nao_encontrados'] = nao_encontrados
+        return reajuste
+
+    def aplicar_pendentes(self) -> list[dict]:
+        """
+        Aplica os reajustes agendados cuja vigência chegou, em ordem de vigência,
+        um por transação. Vários processos podem rodar ao mesmo tempo (SKIP LOCKED).
+        Retorna [{'id_reajuste', 'produtos_alterados'}].
+        """
+        aplicados = []
+        while True:
+            conn = get_db_connection()
+            if conn is None: break
+
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(f"""
+                        SELECT id_reajuste FROM {self.table_name}
+                        WHERE status = 'agendado' AND vigencia <= now()
+                        ORDER BY vigencia, id_reajuste
+                        LIMIT 1
+                        FOR UPDATE SKIP LOCKED;
+                    """)
+                    row = cur.fetchone()
+                    if row is None:
+                        conn.rollback()
+                        break
+                    alterados = self._aplicar(cur, row[0])
+                conn.commit()
+                aplicados.append({'id_reajuste': row[0], 'produtos_alterados': alterados})
+            except Exception as e:
+                logger.error(f"Erro ao aplicar reajustes agendados: {e}")
+                conn.rollback()
+                break
+            finally:
+                conn.close()
+
+        if aplicados:
+            invalidar_catalogo_em_memoria()
+        return aplicados
+
+    def find_by_id(self, id_reajuste: int):
+        conn = get_db_connection()
+        if conn is None: return None
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT r.*, (SELECT count(*) FROM reajuste_preco_item i WHERE i.id_reajuste = r.id_reajuste) AS quantidade_itens
+                    FROM {self.table_name} r
+                    WHERE r.id_reajuste = %s;
+                    """,
+                    (id_reajuste,)
+                )
+                row = cur.fetchone()
+                if row is None:
+                    return None
+                columns = [desc[0] for desc in cur.description]
+                return dict(zip(columns, row))
+        except Exception as e:
+            logger.error(f"Erro ao buscar reajuste {id_reajuste}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def find_all(self, status: str = None) -> list[dict]:
+        """ Reajustes do mais recente para o mais antigo (por vigência), opcionalmente por status. """
+        conn = get_db_connection()
+        if conn is None: return []
+
+        try:
+            with conn.cursor() as cur:
+                sql = f"""
+                    SELECT r.*, (SELECT count(*) FROM reajuste_preco_item i WHERE i.id_reajuste = r.id_reajuste) AS quantidade_itens
+                    FROM {self.table_name} r
+                """
+                params = []
+                if status:
+                    sql += " WHERE r.status = %s"
+                    params.append(status)
+                sql += " ORDER BY r.vigencia DESC, r.id_reajuste DESC;"
+                cur.execute(sql, params)
+                columns = [desc[0] for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
+        except Exception as e:
+            logger.error(f"Erro ao listar reajustes: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def cancelar(self, id_reajuste: int) -> int:
+        """ Cancela um reajuste ainda agendado. Retorna o número de linhas afetadas (0 se não estava agendado). """
+        conn = get_db_connection()
+        if conn is None: return 0
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"UPDATE {self.table_name} SET status = 'cancelado' WHERE id_reajuste = %s AND status = 'agendado';",
+                    (id_reajuste,)
+                )
+                rows_affected = cur.rowcount
+            conn.commit()
+            return rows_affected
+        except Exception as e:
+            logger.error(f"Erro ao cancelar reajuste {id_reajuste}: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            conn.close()
+
+    def historico(self, codigo_produto: int, limite: int = 50) -> list[dict]:
+        """ Alterações de preço do produto, da mais recente para a mais antiga. """
+        conn = get_db_connection()
+        if conn is None: return []
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT id_historico, codigo_produto, preco_anterior, preco_novo, id_reajuste, alterado_em
+                    FROM produto_preco_historico
+                    WHERE codigo_produto = %s
+                    ORDER BY alterado_em DESC, id_historico DESC
+                    LIMIT %s;
+                    """,
+                    (codigo_produto, limite)
+                )
+                columns = [desc[0] for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
+        except Exception as e:
+            logger.error(f"Erro ao buscar histórico de preços do produto {codigo_produto}: {e}")
+            return []
+        finally:
+            conn.close()
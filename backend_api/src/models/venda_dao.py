@@ -1,48 +1,273 @@
 # src/models/venda_dao.py
 
-from src.db_connection import get_db_connection
+from src.db_connection import get_db_connection, unit_of_work, run_in_unit_of_work, DatabaseUnavailableError
+import hashlib
+import json
 import logging
+from datetime import datetime
 from decimal import Decimal
+from config import Config
 from src.utils.formatters import clean_only_numbers 
+from src.utils.cache import TTLCache
+from src.utils.pagination import encode_cursor, decode_cursor, CursorInvalidoError
 from src.models.fluxo_caixa_dao import FluxoCaixaDAO 
+from src.models.estoque_dao import EstoqueDAO, EstoqueInsuficienteError
+from src.models.idempotencia_dao import IdempotenciaDAO, ChaveIdempotenciaEmUsoError, ChaveIdempotenciaReutilizadaError
 from psycopg import rows 
 import psycopg 
-from psycopg.errors import CheckViolation
+from psycopg.types.json import Jsonb
 
 logger = logging.getLogger(__name__)
 
+# Dados de referência do recibo por (cpf_funcionario, id_tipo_pagamento)
+_cache_referencia = TTLCache(maxsize=256, ttl=300, nome='venda_referencia')
+
 class VendaDAO:
 
-    def __init__(self):
+    # SQLSTATEs próprios levantados pela função registrar_venda_json
+    SQLSTATE_ESTOQUE_INSUFICIENTE = 'PV001'
+    SQLSTATE_CLIENTE_NAO_ENCONTRADO = 'PV002'
+    SQLSTATE_CAIXA_FECHADO = 'PV003'
+
+    # Vendas por transação na sincronização em lote (um COMMIT a cada bloco)
+    VENDAS_POR_TRANSACAO_LOTE = 100
+
+    def __init__(self, usar_procedure: bool = None, fracoes_estoque: int = None):
         self.fluxo_caixa_dao = FluxoCaixaDAO()
+        self.estoque_dao = EstoqueDAO()
+        self.idempotencia_dao = IdempotenciaDAO()
+        # Checkout via função no servidor (um único round trip), ver config.py
+        self.usar_procedure = Config.CHECKOUT_VIA_PROCEDURE if usar_procedure is None else usar_procedure
+        # Frações por caixa dos produtos de alta rotatividade (0 = desativado), ver config.py
+        self.fracoes_estoque = Config.ESTOQUE_FRACOES if fracoes_estoque is None else fracoes_estoque
 
 
     def registrar_venda(self, dados_venda: dict):
+        """
+        Registra a venda completa (cliente, itens, estoque e fluxo de caixa)
+        em uma única conexão e transação. Se já existir uma unidade de
+        trabalho ativa (ex.: no controller), a venda participa dela.
+        Retorna o id_venda.
+        """
+        recibo = self.registrar_venda_com_recibo(dados_venda)
+        return recibo['id_venda'] if recibo else None
+
+    def registrar_venda_com_recibo(self, dados_venda: dict):
+        """ 
+        Registra a venda e devolve o recibo completo (mesmo formato de buscar_por_id),
+        montado a partir das linhas retornadas pelos INSERTs, sem reler a venda.
+        Com usar_procedure, tudo acontece em uma única chamada ao banco.
+        """
+        registrar = self.registrar_venda_via_procedure if self.usar_procedure else self._persistir_venda
+
+        try:
+            # Deadlock/falha de serialização: a venda inteira é repetida automaticamente
+            return run_in_unit_of_work(registrar, dados_venda)
+        except DatabaseUnavailableError as e:
+            logger.error(f"Erro de conexão ao registrar venda: {e}")
+            return None
+
+    def registrar_venda_idempotente(self, dados_venda: dict, chave: str):
+        """
+        Registra a venda protegida por uma Idempotency-Key. Retorna (recibo, repetida):
+        no reenvio de uma chave já concluída, devolve o recibo da venda original
+        sem baixar estoque nem lançar no caixa de novo (repetida=True).
+        Levanta ChaveIdempotenciaEmUsoError / ChaveIdempotenciaReutilizadaError.
+        """
+        # Só os campos do VendaSchema: a data original (vendas offline, POST /vendas/lote)
+        # não entra, para o envio online e o reenvio pelo journal terem o mesmo hash
+        hash_requisicao = hashlib.sha256(
+            json.dumps({k: v for k, v in dados_venda.items() if k != 'data_venda'}, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        def reservar_e_registrar():
+            id_venda_original = self.idempotencia_dao.reservar(chave, hash_requisicao)
+            if id_venda_original is not None:
+                return self.buscar_por_id(id_venda_original), True
+
+            recibo = self.registrar_venda_com_recibo(dados_venda)
+            if recibo:
+                self.idempotencia_dao.concluir(chave, recibo['id_venda'])
+            return recibo, False
+
+        try:
+            # Reserva da chave e venda na mesma transação: se a venda falhar, a chave é liberada
+            return run_in_unit_of_work(reservar_e_registrar)
+        except DatabaseUnavailableError as e:
+            logger.error(f"Erro de conexão ao registrar venda: {e}")
+            return None, False
+
+    def registrar_vendas_em_lote(self, vendas: list[tuple[str, dict]]) -> list[dict]:
+        """
+        Sincroniza vendas feitas offline: recebe [(chave_idempotencia, dados_venda), ...]
+        já validados e grava em blocos de VENDAS_POR_TRANSACAO_LOTE vendas por transação.
+        Cada venda roda em um SAVEPOINT: a falha de uma não desfaz as demais do bloco.
+        Reenviar o lote é seguro (as chaves já gravadas são apenas confirmadas).
+
+        Retorna, na ordem recebida, um resultado por venda:
+        {'status': 'criada' | 'repetida' | 'estoque_insuficiente' | 'recusada'
+                   | 'em_processamento' | 'conflito' | 'erro', 'id_venda', ...}
+        """
+        resultados = []
+        for inicio in range(0, len(vendas), self.VENDAS_POR_TRANSACAO_LOTE):
+            bloco = vendas[inicio:inicio + self.VENDAS_POR_TRANSACAO_LOTE]
+            try:
+                resultados.extend(run_in_unit_of_work(self._registrar_bloco, bloco))
+            except Exception as e:
+                logger.error(f"Erro ao gravar bloco de vendas do lote: {e}")
+                resultados.extend(
+                    {'status': 'erro', 'message': "Erro interno ao gravar o bloco. Reenvie a venda."}
+                    for _ in bloco
+                )
+        return resultados
+
+    def _registrar_bloco(self, bloco: list[tuple[str, dict]]) -> list[dict]:
+        uow = unit_of_work() # Unidade ativa aberta por run_in_unit_of_work
+        resultados = []
+
+        for chave, dados_venda in bloco:
+            try:
+                with uow.savepoint():
+                    recibo, repetida = self.registrar_venda_idempotente(dados_venda, chave)
+
+                if recibo:
+                    resultados.append({'status': 'repetida' if repetida else 'criada', 'id_venda': recibo['id_venda']})
+                else:
+                    resultados.append({'status': 'recusada', 'message': "Cliente não encontrado ou caixa fechado."})
+
+            except EstoqueInsuficienteError as e:
+                resultados.append({'status': 'estoque_insuficiente', 'message': str(e), 'faltas': e.faltas})
+            except ChaveIdempotenciaEmUsoError as e:
+                resultados.append({'status': 'em_processamento', 'message': str(e)})
+            except ChaveIdempotenciaReutilizadaError as e:
+                resultados.append({'status': 'conflito', 'message': str(e)})
+            except Exception as e:
+                logger.error(f"Erro ao gravar venda {chave} do lote: {e}")
+                resultados.append({'status': 'erro', 'message': "Erro interno ao gravar a venda. Reenvie a venda."})
+
+        return resultados
+
+    def registrar_venda_via_procedure(self, dados_venda: dict):
+        """ 
+        Executa a venda inteira na função registrar_venda_json (um round trip).
+        Recebe o payload validado pelo VendaSchema e retorna o recibo.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            return None
+
+        try:
+            with conn.cursor() as cur:
+                # Decimais viajam como texto para não perder precisão no JSON
+                payload = Jsonb(
+                    {**dados_venda, 'fracoes_estoque': self.fracoes_estoque},
+                    dumps=lambda obj: json.dumps(obj, default=str)
+                )
+                cur.execute("SELECT registrar_venda_json(%s)::text;", (payload,))
+                recibo = json.loads(cur.fetchone()[0], parse_float=Decimal)
+
+            conn.commit()
+
+            recibo['data_venda'] = datetime.fromisoformat(recibo['data_venda'])
+            return recibo
+
+        except psycopg.Error as e:
+            if conn:
+                conn.rollback()
+
+            if e.sqlstate == self.SQLSTATE_ESTOQUE_INSUFICIENTE:
+                faltas = json.loads(e.diag.message_detail)
+                logger.error(f"Erro de validação de venda: {e.diag.message_primary}")
+                raise EstoqueInsuficienteError(faltas)
+
+            if e.sqlstate == self.SQLSTATE_CLIENTE_NAO_ENCONTRADO:
+                logger.error(f"Erro de validação de venda: {e.diag.message_primary}")
+                return None
+
+            if e.sqlstate == self.SQLSTATE_CAIXA_FECHADO:
+                logger.error(f"Erro CRÍTICO na transação de venda: {e.diag.message_primary}")
+                raise Exception(e.diag.message_primary)
+
+            logger.error(f"Erro CRÍTICO na transação de venda: {e}")
+            raise
+
+        finally:
+            if conn:
+                conn.close()
+
+    def _dados_referencia(self, cur, cpf_funcionario: str, id_tipo_pagamento: int) -> dict:
+        """ 
+        Dados do recibo que não mudam a cada venda (forma de pagamento, nome do
+        caixa e dados do mercado). Ficam em cache por alguns minutos.
+        """
+        chave = (cpf_funcionario, id_tipo_pagamento)
+        referencia = _cache_referencia.get(chave)
+        if referencia is not None:
+            return referencia
+
+        cur.execute("""
+            SELECT 
+                tp.descricao AS tipo_pagamento_descricao,
+                CONCAT(f.nome, ' ', f.sobrenome) AS nome_caixa,
+                cm.cnpj AS mercado_cnpj, 
+                cm.endereco AS mercado_endereco,
+                cm.razao_social AS mercado_razao_social,
+                cm.contato AS mercado_contato
+            FROM (SELECT 1) AS ref
+            LEFT JOIN tipo_pagamento tp ON tp.id_tipo = %s
+            LEFT JOIN funcionario f ON f.cpf = %s
+            LEFT JOIN configuracao_mercado cm ON cm.id_config = 1;
+        """, (id_tipo_pagamento, cpf_funcionario))
+        referencia = dict(cur.fetchone())
+
+        _cache_referencia.set(chave, referencia)
+        return referencia
+
+    def _persistir_venda(self, dados_venda: dict):
         
         conn = get_db_connection() 
         if conn is None:
             return None
             
-        id_venda = None
         valor_total = dados_venda['valor_total']
         troco_calculado = dados_venda['troco'] 
         
         try:
-            with conn.cursor() as cur:
+            with conn.cursor(row_factory=rows.dict_row) as cur:
                 
                 cpf_cliente = dados_venda.get('cpf_cliente') 
                 id_cliente = None
+                nome_cliente = None
                 cpf_cliente_limpo = None 
 
                 if cpf_cliente:
                     cpf_cliente_limpo = clean_only_numbers(cpf_cliente) 
-                    cur.execute("SELECT id_cliente FROM cliente WHERE cpf_cnpj = %s", (cpf_cliente_limpo,))
+                    cur.execute("SELECT id_cliente, nome FROM cliente WHERE cpf_cnpj = %s", (cpf_cliente_limpo,))
                     cliente_result = cur.fetchone()
-                    id_cliente = cliente_result[0] if cliente_result else None
 
-                    if id_cliente is None:
+                    if cliente_result is None:
                         raise ValueError(f"O Cliente com CPF/CNPJ '{cpf_cliente}' não foi encontrado no sistema.")
+
+                    id_cliente = cliente_result['id_cliente']
+                    nome_cliente = cliente_result['nome']
                 
+                # CAIXA ABERTO (falha antes de qualquer escrita)
+                
+                id_fluxo_aberto = self.fluxo_caixa_dao.buscar_caixa_aberto(dados_venda['cpf_funcionario'], bloquear=True)
+
+                if id_fluxo_aberto is None:
+                    raise Exception("Caixa não está aberto para o funcionário. ROLLBACK!")
+
+                # BAIXA NO ESTOQUE: um único UPDATE para todos os itens
+                
+                # Produtos de alta rotatividade: cada caixa baixa na sua fração do estoque
+                fracao = id_fluxo_aberto % self.fracoes_estoque if self.fracoes_estoque else None
+                faltas = self.estoque_dao.baixar_em_lote(dados_venda['itens'], fracao=fracao)
+                if faltas is None:
+                    raise Exception("Falha na baixa de estoque. ROLLBACK!")
+                if faltas:
+                    raise EstoqueInsuficienteError(faltas)
+
                 pagamento = dados_venda['pagamentos'][0]
                 
                 venda_sql = """
@@ -54,10 +279,11 @@ class VendaDAO:
                         id_tipo_pagamento, 
                         valor_pago,
                         troco,
-                        desconto
+                        desconto,
+                        data_venda
                     )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id_venda;
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP))
+                    RETURNING *;
                 """
                 
                 cur.execute(venda_sql, (
@@ -68,54 +294,45 @@ class VendaDAO:
                     pagamento['id_tipo'],
                     pagamento['valor_pago'],
                     troco_calculado,
-                    dados_venda.get('desconto', 0)
+                    dados_venda.get('desconto', 0),
+                    dados_venda.get('data_venda') # Vendas sincronizadas offline trazem a data original
                 ))
-                id_venda = cur.fetchone()[0]
+                venda_data = dict(cur.fetchone())
+                id_venda = venda_data['id_venda']
                 
                 
-                # INSERT na Tabela VENDA_ITEM e UPDATE no ESTOQUE
+                # INSERT na VENDA_ITEM: todas as linhas em um único INSERT,
+                # já devolvendo o nome do produto para o recibo
                 
-                for item in dados_venda['itens']:
-                    codigo_produto = item['codigo_produto']
-                    quantidade_vendida = item['quantidade_venda']
-                    
-                    # BAIXA NO ESTOQUE (UPDATE)
-                    estoque_update_sql = """
-                        UPDATE estoque
-                        SET quantidade = quantidade - %s
-                        WHERE codigo_produto = %s
-                        RETURNING quantidade; 
-                    """
-                    try:
-                        cur.execute(estoque_update_sql, (quantidade_vendida, codigo_produto))
-                    except CheckViolation:
-                        raise ValueError(f"Estoque insuficiente para o produto {codigo_produto}.")
-                    
-                    new_quantity_result = cur.fetchone()
-                    
-                    if new_quantity_result is None or new_quantity_result[0] < 0:
-                        raise Exception(f"Estoque insuficiente para o produto {codigo_produto}. ROLLBACK!")
-                        
-                    # INSERT na VENDA_ITEM
-                    item_sql = """
+                itens = dados_venda['itens']
+                item_sql = """
+                    WITH inseridos AS (
                         INSERT INTO venda_item (id_venda, codigo_produto, preco_unitario, quantidade_venda, valor_total)
-                        VALUES (%s, %s, %s, %s, %s);
-                    """
-                    cur.execute(item_sql, (
-                        id_venda,
-                        codigo_produto,
-                        item['preco_unitario'],
-                        quantidade_vendida,
-                        item['subtotal']
-                    ))
+                        SELECT %s, i.*
+                        FROM unnest(%s::int[], %s::numeric[], %s::int[], %s::numeric[]) AS i
+                        RETURNING *
+                    )
+                    SELECT 
+                        ins.codigo_produto,
+                        ins.quantidade_venda,
+                        ins.preco_unitario,
+                        ins.valor_total AS subtotal,
+                        p.nome AS nome_produto
+                    FROM inseridos ins
+                    JOIN produto p ON ins.codigo_produto = p.codigo_produto
+                    ORDER BY ins.id_venda_item;
+                """
+                cur.execute(item_sql, (
+                    id_venda,
+                    [item['codigo_produto'] for item in itens],
+                    [item['preco_unitario'] for item in itens],
+                    [item['quantidade_venda'] for item in itens],
+                    [item['subtotal'] for item in itens]
+                ))
+                venda_data['itens'] = [dict(r) for r in cur.fetchall()]
 
 
                 # REGISTRO NO FLUXO DE CAIXA (LEDGER)
-                
-                id_fluxo_aberto = self.fluxo_caixa_dao.buscar_caixa_aberto(dados_venda['cpf_funcionario'])
-
-                if id_fluxo_aberto is None:
-                    raise Exception("Caixa não está aberto para o funcionário. ROLLBACK!")
 
                 fluxo_movimento_sql = """
                     INSERT INTO fluxo_caixa_movimento (id_fluxo, id_venda, valor, tipo)
@@ -124,9 +341,27 @@ class VendaDAO:
                 cur.execute(fluxo_movimento_sql, (id_fluxo_aberto, id_venda, valor_total))
 
 
+                # RECIBO: linhas retornadas + dados de referência em cache
+                
+                venda_data.update(self._dados_referencia(cur, venda_data['cpf_funcionario'], venda_data['id_tipo_pagamento']))
+                venda_data['nome_cliente'] = nome_cliente
+                venda_data['pagamentos'] = [{
+                    'id_tipo': venda_data['id_tipo_pagamento'],
+                    'valor_pago': venda_data['valor_pago'],
+                    'troco': venda_data['troco'],
+                    'descricao': venda_data.get('tipo_pagamento_descricao')
+                }]
+
                 conn.commit()
-                return id_venda
+                return venda_data
                 
+        except EstoqueInsuficienteError as ei:
+            # Relatório de faltas por produto segue para o controller
+            logger.error(f"Erro de validação de venda: {ei}")
+            if conn:
+                conn.rollback()
+            raise
+
         except ValueError as ve:
             logger.error(f"Erro de validação de venda: {ve}")
             if conn:
@@ -210,13 +445,107 @@ class VendaDAO:
         finally:
             if conn: conn.close()
 
+    def _anexar_itens_e_pagamentos(self, cur, vendas_list: list[dict]):
+        """ 
+        Carrega os itens de todas as vendas da lista com uma única consulta
+        (id_venda = ANY) e monta a lista de pagamentos de cada venda.
+        """
+        if not vendas_list:
+            return
+
+        sql_itens = """
+            SELECT 
+                vi.id_venda,
+                vi.codigo_produto,
+                vi.quantidade_venda,
+                vi.preco_unitario,
+                vi.valor_total AS subtotal,
+                p.nome AS nome_produto
+            FROM venda_item vi
+            JOIN produto p ON vi.codigo_produto = p.codigo_produto
+            WHERE vi.id_venda = ANY(%s)
+            ORDER BY vi.id_venda, vi.id_venda_item;
+        """
+        cur.execute(sql_itens, ([venda['id_venda'] for venda in vendas_list],))
+
+        itens_por_venda = {}
+        for r in cur.fetchall():
+            item = dict(r)
+            itens_por_venda.setdefault(item.pop('id_venda'), []).append(item)
+
+        for venda in vendas_list:
+            venda['itens'] = itens_por_venda.get(venda['id_venda'], [])
+            venda['pagamentos'] = self._pagamentos_da_venda(venda)
+
+    @staticmethod
+    def _pagamentos_da_venda(venda: dict) -> list[dict]:
+        """ A venda guarda um único pagamento; monta a lista no formato do VendaSchema. """
+        return [{
+            'id_tipo': venda['id_tipo_pagamento'],
+            'valor_pago': venda['valor_pago'],
+            'troco': venda['troco'],
+            'descricao': venda.get('tipo_pagamento_descricao')
+        }]
+
+    @staticmethod
+    def _filtros_vendas(data_str=None, cpf_cliente=None, data_inicio=None, data_fim=None,
+                        cpf_funcionario=None, id_tipo_pagamento=None):
+        """ Monta as condições WHERE (e parâmetros) comuns à listagem e à exportação de vendas. """
+        params = []
+        where_clauses = []
+
+        # Filtro 1: Data (intervalo semiaberto para usar o índice de data_venda)
+        if data_str:
+            where_clauses.append("v.data_venda >= %s::date AND v.data_venda < %s::date + 1")
+            params.extend([data_str, data_str])
+
+        # Filtro 2: CPF do Cliente (coluna normalizada e indexada, só dígitos)
+        if cpf_cliente:
+            where_clauses.append("v.cpf_cnpj_cliente_digitos = %s") 
+            params.append(cpf_cliente) 
+
+        # Filtro 3: Período (data_fim inclusiva)
+        if data_inicio:
+            where_clauses.append("v.data_venda >= %s::date")
+            params.append(data_inicio)
+        if data_fim:
+            where_clauses.append("v.data_venda < %s::date + 1")
+            params.append(data_fim)
+
+        # Filtro 4: Operador (caixa)
+        if cpf_funcionario:
+            where_clauses.append("v.cpf_funcionario = %s")
+            params.append(cpf_funcionario)
+
+        # Filtro 5: Forma de pagamento
+        if id_tipo_pagamento:
+            where_clauses.append("v.id_tipo_pagamento = %s")
+            params.append(id_tipo_pagamento)
+
+        return where_clauses, params
+
     # BUSCAR VENDAS FLEXÍVEL 
-    def buscar_vendas_flexivel(self, data_str=None, cpf_cliente=None):
+    def buscar_vendas_flexivel(self, data_str=None, cpf_cliente=None, data_inicio=None, data_fim=None,
+                               cpf_funcionario=None, id_tipo_pagamento=None, apos=None, limite=None):
+        """ 
+        Lista vendas (com itens) da mais recente para a mais antiga.
+        apos=(data_venda, id_venda) continua a listagem depois dessa venda (keyset)
+        e limite restringe a quantidade de vendas retornadas. Em erro, retorna [].
+        """
+        try:
+            return self._consultar_vendas(data_str, cpf_cliente, data_inicio, data_fim,
+                                          cpf_funcionario, id_tipo_pagamento, apos, limite)
+        except Exception as e:
+            print(f"Erro ao buscar vendas de forma flexível: {e}")
+            return []
+
+    def _consultar_vendas(self, data_str=None, cpf_cliente=None, data_inicio=None, data_fim=None,
+                          cpf_funcionario=None, id_tipo_pagamento=None, apos=None, limite=None) -> list[dict]:
+        """ Consulta de buscar_vendas_flexivel; erros de banco são propagados. """
         conn = get_db_connection()
-        if conn is None: return []
+        if conn is None:
+            raise DatabaseUnavailableError("Não foi possível obter conexão com o banco de dados.")
 
-        vendas_list = []
-        
         try:
             with conn.cursor(row_factory=rows.dict_row) as cur:
                 
@@ -229,60 +558,127 @@ class VendaDAO:
                     LEFT JOIN tipo_pagamento tp ON v.id_tipo_pagamento = tp.id_tipo
                     LEFT JOIN funcionario f ON v.cpf_funcionario = f.cpf
                 """
-                params = []
-                where_clauses = []
-                
-                # Filtro 1: Data
-                if data_str:
-                    where_clauses.append("DATE(v.data_venda) = %s")
-                    params.append(data_str)
-                    
-                # Filtro 2: CPF do Cliente
-                if cpf_cliente:
-                    where_clauses.append("REGEXP_REPLACE(v.cpf_cnpj_cliente, '[^0-9]', '', 'g') = %s") 
-                    params.append(cpf_cliente) 
+                where_clauses, params = self._filtros_vendas(
+                    data_str, cpf_cliente, data_inicio, data_fim, cpf_funcionario, id_tipo_pagamento
+                )
+
+                # Paginação por keyset: vendas anteriores à última da página
+                if apos:
+                    where_clauses.append("(v.data_venda, v.id_venda) < (%s::timestamp, %s)")
+                    params.extend(apos)
                     
                 # Constrói a cláusula WHERE
                 if where_clauses:
                     sql += " WHERE " + " AND ".join(where_clauses) 
                     
-                sql += " ORDER BY v.data_venda DESC;"
+                sql += " ORDER BY v.data_venda DESC, v.id_venda DESC"
+
+                if limite:
+                    sql += " LIMIT %s"
+                    params.append(limite)
                 
                 cur.execute(sql, tuple(params))
                 rows_fetched = cur.fetchall() 
                 
                 vendas_list = [dict(r) for r in rows_fetched]
 
-                # Buscar ITENS e formatar PAGAMENTOS para cada venda
-                for venda in vendas_list:
-                    # 1. Buscar Itens
-                    sql_itens = """
-                        SELECT 
-                            vi.codigo_produto,
-                            vi.quantidade_venda,
-                            vi.preco_unitario,
-                            vi.valor_total AS subtotal,
-                            p.nome AS nome_produto
-                        FROM venda_item vi
-                        JOIN produto p ON vi.codigo_produto = p.codigo_produto
-                        WHERE vi.id_venda = %s;
-                    """
-                    cur.execute(sql_itens, (venda['id_venda'],))
-                    item_records = cur.fetchall()
-                    venda['itens'] = [dict(r) for r in item_records]
-
-                    # 2. Formatar Pagamentos (Lista)
-                    venda['pagamentos'] = [{
-                        'id_tipo': venda['id_tipo_pagamento'],
-                        'valor_pago': venda['valor_pago'],
-                        'troco': venda['troco'],
-                        'descricao': venda.get('tipo_pagamento_descricao')
-                    }]
+                # Buscar ITENS de todas as vendas em uma única consulta e formatar PAGAMENTOS
+                self._anexar_itens_e_pagamentos(cur, vendas_list)
             
             return vendas_list
-            
+        finally:
+            conn.close()
+
+    def buscar_vendas_paginado(self, cursor: str = None, limite: int = 50, **filtros) -> dict:
+        """ 
+        Página de vendas por keyset (data_venda, id_venda). Retorna
+        {'vendas': [...], 'proximo_cursor': str | None}. Levanta
+        CursorInvalidoError se o cursor recebido não for válido; erros de banco
+        são propagados (uma página vazia significaria fim da listagem).
+        """
+        apos = None
+        if cursor:
+            data_venda, id_venda = decode_cursor(cursor, 2)
+            try:
+                apos = (datetime.fromisoformat(data_venda), int(id_venda))
+            except (ValueError, TypeError) as e:
+                raise CursorInvalidoError("Cursor de paginação inválido.") from e
+
+        # Busca uma venda a mais para saber se existe próxima página
+        vendas = self._consultar_vendas(apos=apos, limite=limite + 1, **filtros)
+
+        proximo_cursor = None
+        if len(vendas) > limite:
+            vendas = vendas[:limite]
+            ultima = vendas[-1]
+            proximo_cursor = encode_cursor(ultima['data_venda'], ultima['id_venda'])
+
+        return {'vendas': vendas, 'proximo_cursor': proximo_cursor}
+
+    # EXPORTAÇÃO (STREAMING)
+    def exportar_vendas(self, tamanho_lote: int = 1000, **filtros):
+        """
+        Gerador que percorre as vendas filtradas (com itens e pagamentos) em ordem
+        cronológica, lendo venda/venda_item por um cursor nomeado no servidor
+        em lotes de tamanho_lote linhas. A memória usada não depende do período.
+        Aceita os mesmos filtros de buscar_vendas_flexivel.
+        Erros de banco são propagados: quem consome decide como abortar a exportação.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise ConnectionError("Sem conexão com o banco de dados para exportar as vendas.")
+
+        sql = """
+            SELECT 
+                v.*, 
+                tp.descricao AS tipo_pagamento_descricao,
+                CONCAT(f.nome, ' ', f.sobrenome) AS nome_caixa,
+                vi.codigo_produto,
+                vi.quantidade_venda,
+                vi.preco_unitario,
+                vi.valor_total AS subtotal,
+                p.nome AS nome_produto
+            FROM venda v 
+            LEFT JOIN tipo_pagamento tp ON v.id_tipo_pagamento = tp.id_tipo
+            LEFT JOIN funcionario f ON v.cpf_funcionario = f.cpf
+            LEFT JOIN venda_item vi ON vi.id_venda = v.id_venda
+            LEFT JOIN produto p ON p.codigo_produto = vi.codigo_produto
+        """
+        where_clauses, params = self._filtros_vendas(**filtros)
+        if where_clauses:
+            sql += " WHERE " + " AND ".join(where_clauses)
+        sql += " ORDER BY v.data_venda, v.id_venda, vi.id_venda_item"
+
+        campos_item = ('codigo_produto', 'quantidade_venda', 'preco_unitario', 'subtotal', 'nome_produto')
+
+        try:
+            # Cursor nomeado (DECLARE ... CURSOR): o servidor entrega tamanho_lote linhas por vez
+            with conn.cursor(name="exportacao_vendas", row_factory=rows.dict_row) as cur:
+                cur.itersize = tamanho_lote
+                cur.execute(sql, tuple(params))
+
+                venda = None
+                for r in cur:
+                    linha = dict(r)
+                    item = {campo: linha.pop(campo) for campo in campos_item}
+
+                    if venda is None or venda['id_venda'] != linha['id_venda']:
+                        if venda is not None:
+                            yield venda
+                        venda = linha
+                        venda['itens'] = []
+                        venda['pagamentos'] = self._pagamentos_da_venda(venda)
+
+                    # Venda sem itens vem do LEFT JOIN com os campos do item nulos
+                    if item['codigo_produto'] is not None:
+                        venda['itens'].append(item)
+
+                if venda is not None:
+                    yield venda
+
         except Exception as e:
-            print(f"Erro ao buscar vendas de forma flexível: {e}")
-            return []
+            # Propaga: antes do primeiro lote vira 500; no meio do stream, aborta a transferência
+            logger.error(f"Erro ao exportar vendas: {e}")
+            raise
         finally:
-            if conn: conn.close()
\ No newline at end of file
+            if conn: conn.close()
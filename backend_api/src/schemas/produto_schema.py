@@ -1,6 +1,8 @@
 # src/schemas/produto_schema.py
 
 from marshmallow import Schema, fields, validate
+from src.schemas.promocao_schema import PromocaoSchema
+from src.utils.catalogo_binario import CODIGO_BARRAS_PERMITIDO
 
 class ProdutoSchema(Schema):
     codigo_produto = fields.Int(dump_only=True)
@@ -9,7 +11,10 @@ class ProdutoSchema(Schema):
     
     codigo_barras = fields.Str(
         required=False,
-        validate=validate.Length(max=50),
+        validate=[
+            validate.Length(max=50),
+            validate.Regexp(CODIGO_BARRAS_PERMITIDO, error="O código de barras aceita apenas caracteres ASCII imprimíveis.")
+        ],
         allow_none=True
     )
     
@@ -35,4 +40,26 @@ class ProdutoSchema(Schema):
         load_only=True, 
         validate=validate.Range(min=0),
         load_default=0 
-    )
\ No newline at end of file
+    )
+
+class EtiquetaBalancaSchema(Schema):
+    """ Peso (kg) e total lidos de uma etiqueta de balança (src/utils/etiqueta_balanca.py). """
+    codigo_item = fields.Str()
+    tipo_valor = fields.Str()
+    quantidade = fields.Decimal(as_string=True, places=3)
+    valor_total = fields.Decimal(as_string=True, places=2)
+
+
+class ScanSchema(Schema):
+    """ Resposta do scan do caixa (src/services/scan_service.py). Só saída. """
+    codigo_lido = fields.Str()
+    codigo_produto = fields.Int()
+    codigo_barras = fields.Str(allow_none=True)
+    nome = fields.Str()
+    preco = fields.Decimal(as_string=True, places=2)
+    estoque = fields.Int()
+    preco_unitario = fields.Decimal(as_string=True, places=2)
+    quantidade = fields.Decimal(as_string=True, places=3)
+    valor_total = fields.Decimal(as_string=True, places=2)
+    promocoes = fields.List(fields.Nested(PromocaoSchema))
+    balanca = fields.Nested(EtiquetaBalancaSchema, allow_none=True)
@@ -0,0 +1,24 @@
+# src/schemas/promocao_schema.py
+
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+from decimal import Decimal
+
+
+class PromocaoSchema(Schema):
+    """ Preço promocional de um produto entre 'inicio' (padrão: agora) e 'fim', a partir de 'quantidade_minima' unidades. """
+    id_promocao = fields.Int(dump_only=True)
+    codigo_produto = fields.Int(required=True, validate=validate.Range(min=1))
+    descricao = fields.Str(load_default=None, allow_none=True, validate=validate.Length(max=100))
+    preco_promocional = fields.Decimal(
+        required=True, as_string=True, places=2,
+        validate=validate.Range(min=Decimal('0.01'))
+    )
+    quantidade_minima = fields.Int(load_default=1, validate=validate.Range(min=1))
+    inicio = fields.DateTime(allow_none=True, load_default=None)
+    fim = fields.DateTime(required=True)
+
+    @validates_schema
+    def validar_periodo(self, data, **kwargs):
+        inicio, fim = data.get('inicio'), data.get('fim')
+        if inicio and fim and (inicio.tzinfo is None) == (fim.tzinfo is None) and fim <= inicio:
+            raise ValidationError("O fim da promoção deve ser posterior ao início.", 'fim')
@@ -0,0 +1,53 @@
+# src/schemas/reajuste_preco_schema.py
+
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+from decimal import Decimal
+
+
+class ReajustePrecoItemSchema(Schema):
+    """ Produto do reajuste, por código ou código de barras. Sem preço, recebe o percentual. """
+    codigo_produto = fields.Int(validate=validate.Range(min=1))
+    codigo_barras = fields.Str(validate=validate.Length(min=1, max=50))
+    preco = fields.Decimal(as_string=True, places=2, validate=validate.Range(min=Decimal('0.01')))
+
+    @validates_schema
+    def validar_identificacao(self, data, **kwargs):
+        if ('codigo_produto' in data) == ('codigo_barras' in data):
+            raise ValidationError("Informe codigo_produto ou codigo_barras.")
+
+
+class ReajustePrecoSchema(Schema):
+    """
+    Reajuste em lote: lista de preços (itens com preço) ou regra (percentual para
+    todos os produtos, os de um fornecedor e/ou os itens listados sem preço).
+    Sem vigência, ou com vigência no passado, é aplicado na hora.
+    """
+    id_reajuste = fields.Int(dump_only=True)
+    descricao = fields.Str(load_default=None, allow_none=True, validate=validate.Length(max=255))
+    itens = fields.List(fields.Nested(ReajustePrecoItemSchema), load_default=list, load_only=True)
+    percentual = fields.Decimal(
+        as_string=True, allow_none=True, load_default=None,
+        validate=validate.Range(min=Decimal('-99.999'), max=Decimal('1000'))
+    )
+    id_fornecedor = fields.Int(allow_none=True, load_default=None, validate=validate.Range(min=1))
+    vigencia = fields.DateTime(allow_none=True, load_default=None)
+
+    status = fields.Str(dump_only=True)
+    quantidade_itens = fields.Int(dump_only=True)
+    produtos_alterados = fields.Int(dump_only=True)
+    criado_em = fields.DateTime(dump_only=True)
+    aplicado_em = fields.DateTime(dump_only=True)
+    nao_encontrados = fields.List(fields.Dict(), dump_only=True)
+
+    @validates_schema
+    def validar_regra(self, data, **kwargs):
+        itens = data.get('itens') or []
+        if data.get('percentual') is None:
+            if not itens:
+                raise ValidationError("Informe os itens com preço ou um percentual.")
+            if any('preco' not in item for item in itens):
+                raise ValidationError("Sem percentual, todos os itens precisam de preço.", 'itens')
+            if data.get('id_fornecedor') is not None:
+                raise ValidationError("id_fornecedor só vale para reajuste por percentual.", 'id_fornecedor')
+        elif any('preco' in item for item in itens):
+            raise ValidationError("Com percentual, os itens só limitam os produtos reajustados (sem preço).", 'itens')
@@ -0,0 +1,49 @@
+# src/services/catalogo_binario_service.py
+
+from src.models.produto_dao import ProdutoDAO
+from src.utils.catalogo_binario import gravar_catalogo_binario, ler_cabecalho, CatalogoBinarioInvalidoError
+from config import Config
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+NOME_ARQUIVO = 'catalogo.bin'
+
+# Uma geração por vez neste processo; entre processos, a troca atômica do arquivo basta
+_geracao = threading.Lock()
+
+
+def obter_catalogo_binario(pasta: str = None):
+    """
+    Caminho do catálogo binário (src/utils/catalogo_binario.py) atualizado.
+    O arquivo é regenerado quando algum produto mudou desde a versão gravada
+    nele; sem alterações, só os índices de versão são consultados.
+    Se o banco estiver indisponível, devolve o último arquivo gerado (ou None).
+    """
+    caminho = os.path.join(pasta or Config.CATALOGO_BINARIO_PASTA, NOME_ARQUIVO)
+    produto_dao = ProdutoDAO()
+
+    with _geracao:
+        existente = os.path.exists(caminho)
+        if existente:
+            try:
+                alterado = produto_dao.catalogo_alterado_desde(ler_cabecalho(caminho)['versao'])
+            except CatalogoBinarioInvalidoError:
+                alterado = True
+            if alterado is None or not alterado:
+                return caminho
+
+        catalogo = produto_dao.catalogo_desde(None)
+        if catalogo is None:
+            return caminho if existente else None
+
+        inicio = time.perf_counter()
+        gravar_catalogo_binario(caminho, catalogo['produtos'], catalogo['versao'], int(time.time()))
+        logger.info(
+            f"Catálogo binário gerado: {len(catalogo['produtos'])} produtos, versão {catalogo['versao']}, "
+            f"{(time.perf_counter() - inicio) * 1000:.0f} ms."
+        )
+        return caminho
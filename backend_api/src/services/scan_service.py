@@ -0,0 +1,59 @@
+# src/services/scan_service.py
+
+from src.models.produto_dao import ProdutoDAO
+from src.models.promocao_dao import PromocaoDAO
+from src.utils.etiqueta_balanca import decodificar_etiqueta, item_pesado
+from config import Config
+
+produto_dao = ProdutoDAO()
+promocao_dao = PromocaoDAO()
+
+
+def escanear(codigo_barras: str):
+    """
+    Tudo o que o caixa precisa para lançar o item lido, sem outra chamada:
+    produto, saldo em estoque, promoções vigentes, preço a cobrar e, para
+    etiquetas de balança, o peso e o total impressos. Catálogo, saldo e
+    promoções vêm dos caches em memória; o banco só é consultado no que expirou.
+    Retorna None se o código não corresponder a nenhum produto.
+    """
+    balanca = None
+    produto = produto_dao.find_by_codigo_barras(codigo_barras)
+    if produto is None:
+        # Não cadastrado como está: pode ser uma etiqueta de balança (código do item + valor)
+        etiqueta = decodificar_etiqueta(codigo_barras, Config.BALANCA_PREFIXO, Config.BALANCA_DIGITOS_CODIGO)
+        if etiqueta is None:
+            return None
+        codigo_item, valor = etiqueta
+        produto = produto_dao.find_by_codigo_barras(codigo_item)
+        if produto is None:
+            return None
+        balanca = {'codigo_item': codigo_item, 'tipo_valor': Config.BALANCA_VALOR,
+                   **item_pesado(produto['preco'], valor, Config.BALANCA_VALOR)}
+
+    promocoes = promocao_dao.vigentes(produto['codigo_produto'])
+
+    # Item unitário: vale a menor promoção que já se aplica a 1 unidade. Promoções
+    # com quantidade mínima maior ficam para o caixa aplicar quando a quantidade chegar lá.
+    # Na etiqueta de balança, o total impresso é o que se cobra.
+    if balanca is None:
+        precos = [p['preco_promocional'] for p in promocoes if p['quantidade_minima'] <= 1]
+        preco_unitario = min([produto['preco'], *precos])
+        quantidade, valor_total = 1, preco_unitario
+    else:
+        preco_unitario = produto['preco']
+        quantidade, valor_total = balanca['quantidade'], balanca['valor_total']
+
+    return {
+        'codigo_lido': codigo_barras,
+        'codigo_produto': produto['codigo_produto'],
+        'codigo_barras': produto['codigo_barras'],
+        'nome': produto['nome'],
+        'preco': produto['preco'],
+        'estoque': produto['quantidade'],
+        'preco_unitario': preco_unitario,
+        'quantidade': quantidade,
+        'valor_total': valor_total,
+        'promocoes': promocoes,
+        'balanca': balanca,
+    }
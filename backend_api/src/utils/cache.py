@@ -0,0 +1,89 @@
+# src/utils/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+# Caches nomeados, para as métricas de GET /api/v1/status
+_caches = {}
+
+class TTLCache:
+    """
+    Cache em memória com tempo de vida (TTL) e limite de tamanho.
+    Quando cheio, descarta o item usado há mais tempo (LRU). Thread-safe.
+    Com nome, o cache aparece em get_cache_stats().
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, nome: str = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self._acertos = 0
+        self._falhas = 0
+        self._descartes = 0
+        if nome:
+            _caches[nome] = self
+
+    def get(self, chave, default=None):
+        """ Retorna o valor se existir e não tiver expirado. """
+        with self._lock:
+            entrada = self._dados.get(chave, _AUSENTE)
+            if entrada is _AUSENTE:
+                self._falhas += 1
+                return default
+
+            valor, expira_em = entrada
+            if expira_em < time.monotonic():
+                del self._dados[chave]
+                self._falhas += 1
+                return default
+
+            self._dados.move_to_end(chave)
+            self._acertos += 1
+            return valor
+
+    def set(self, chave, valor):
+        with self._lock:
+            self._dados[chave] = (valor, time.monotonic() + self.ttl)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+                self._descartes += 1
+
+    def invalidate(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def invalidate_where(self, condicao):
+        """ Remove as entradas cujo valor satisfaz condicao(valor). Percorre o cache inteiro. """
+        with self._lock:
+            for chave in [c for c, (valor, _) in self._dados.items() if condicao(valor)]:
+                del self._dados[chave]
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            consultas = self._acertos + self._falhas
+            return {
+                "tamanho": len(self._dados),
+                "capacidade": self.maxsize,
+                "ttl": self.ttl,
+                "acertos": self._acertos,
+                "falhas": self._falhas,
+                "descartes": self._descartes,
+                "taxa_acerto": round(self._acertos / consultas, 4) if consultas else None
+            }
+
+    def __len__(self):
+        return len(self._dados)
+
+
+def get_cache_stats() -> dict:
+    """ Métricas (acertos, falhas, descartes LRU) de cada cache nomeado. """
+    return {nome: cache.stats() for nome, cache in _caches.items()}
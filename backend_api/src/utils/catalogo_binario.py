@@ -0,0 +1,194 @@
+# src/utils/catalogo_binario.py
+"""
+Formato binário do catálogo para os terminais (GET /api/v1/produtos/catalogo.bin).
+
+Tudo little-endian; cada bloco começa em posição múltipla de 8:
+
+    cabeçalho   magic "PDVCAT01" | versao u64 | gerado_em i64 | quantidade u32 |
+                largura_codigo_barras u16 | reservado u16                (32 bytes)
+    bloco 1     códigos de barras, quantidade x largura bytes (ASCII, completados
+                com \\0), em ordem crescente: busca binária direto no arquivo
+    bloco 2     codigo_produto, quantidade x u32
+    bloco 3     preço em centavos, quantidade x u32
+    bloco 4     início de cada nome no bloco 5, (quantidade + 1) x u32
+    bloco 5     nomes em UTF-8, concatenados
+
+A linha i de cada bloco é o mesmo produto. 'versao' é a mesma do GET
+/api/v1/produtos/catalogo: depois de carregar o arquivo, o terminal continua
+com ?desde=versao (estoque e alterações posteriores).
+"""
+
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+from decimal import Decimal
+
+MAGIC = b"PDVCAT01"
+CABECALHO = struct.Struct("<8sQqIHH")
+PRECO_MAXIMO_CENTAVOS = 2**32 - 1
+
+# Códigos de barras aceitos: ASCII imprimível (o bloco 1 guarda os bytes ASCII).
+# É a mesma regra do ProdutoSchema e da importação por CSV
+CODIGO_BARRAS_PERMITIDO = re.compile(r'[\x20-\x7e]*\Z')
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogoBinarioInvalidoError(ValueError):
+    """ Arquivo que não está no formato do catálogo binário. """
+
+
+def codigo_barras_valido(codigo_barras: str) -> bool:
+    return CODIGO_BARRAS_PERMITIDO.match(codigo_barras) is not None
+
+
+def _codigo_barras_gravavel(produto: dict) -> bytes:
+    """ Código de barras em ASCII; fora da regra (cadastro antigo), o produto vai sem código. """
+    codigo_barras = produto.get('codigo_barras') or ''
+    if not codigo_barras_valido(codigo_barras):
+        logger.warning(
+            f"Produto {produto['codigo_produto']} com código de barras fora do ASCII imprimível "
+            f"({codigo_barras!r}): gravado no catálogo binário sem código de barras."
+        )
+        return b''
+    return codigo_barras.encode('ascii')
+
+
+def _alinhar(tamanho: int) -> int:
+    return (tamanho + 7) & ~7
+
+
+def _posicoes(quantidade: int, largura: int) -> tuple:
+    """ Posição de cada bloco no arquivo. """
+    codigos_barras = _alinhar(CABECALHO.size)
+    codigos = _alinhar(codigos_barras + quantidade * largura)
+    precos = _alinhar(codigos + quantidade * 4)
+    inicio_nomes = _alinhar(precos + quantidade * 4)
+    nomes = _alinhar(inicio_nomes + (quantidade + 1) * 4)
+    return codigos_barras, codigos, precos, inicio_nomes, nomes
+
+
+def gravar_catalogo_binario(caminho: str, produtos: list[dict], versao: int, gerado_em: int):
+    """
+    Grava o arquivo a partir de dicts com codigo_produto, codigo_barras, nome e preco.
+    A troca do arquivo é atômica (arquivo temporário + os.replace): quem estiver
+    lendo a versão anterior não é afetado.
+    """
+    linhas = sorted(
+        (_codigo_barras_gravavel(p), p['codigo_produto'],
+         int((Decimal(str(p['preco'])) * 100).to_integral_value()), (p.get('nome') or '').encode('utf-8'))
+        for p in produtos
+    )
+    quantidade = len(linhas)
+    largura = max((len(linha[0]) for linha in linhas), default=0) or 1
+    pos_barras, pos_codigos, pos_precos, pos_inicio_nomes, pos_nomes = _posicoes(quantidade, largura)
+
+    inicio_nomes = [0]
+    for linha in linhas:
+        if not 0 <= linha[2] <= PRECO_MAXIMO_CENTAVOS:
+            raise ValueError(f"Preço fora do intervalo do catálogo binário (produto {linha[1]}).")
+        inicio_nomes.append(inicio_nomes[-1] + len(linha[3]))
+
+    conteudo = bytearray(pos_nomes + inicio_nomes[-1])
+    CABECALHO.pack_into(conteudo, 0, MAGIC, versao, gerado_em, quantidade, largura, 0)
+    conteudo[pos_barras:pos_barras + quantidade * largura] = b''.join(linha[0].ljust(largura, b'\0') for linha in linhas)
+    struct.pack_into(f"<{quantidade}I", conteudo, pos_codigos, *(linha[1] for linha in linhas))
+    struct.pack_into(f"<{quantidade}I", conteudo, pos_precos, *(linha[2] for linha in linhas))
+    struct.pack_into(f"<{quantidade + 1}I", conteudo, pos_inicio_nomes, *inicio_nomes)
+    conteudo[pos_nomes:] = b''.join(linha[3] for linha in linhas)
+
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(pasta, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=pasta, prefix='.catalogo-')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(conteudo)
+        # mkstemp cria com 0600: o arquivo publicado precisa ser legível por outros processos (servidor web, terminais)
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def ler_cabecalho(arquivo) -> dict:
+    """
+    Lê só o cabeçalho (versão, data de geração e quantidade de produtos).
+    Aceita o caminho ou o arquivo já aberto em modo binário (lido a partir do início).
+    """
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as aberto:
+            bruto = aberto.read(CABECALHO.size)
+    else:
+        arquivo.seek(0)
+        bruto = arquivo.read(CABECALHO.size)
+        arquivo.seek(0)
+    if len(bruto) < CABECALHO.size:
+        raise CatalogoBinarioInvalidoError("Arquivo do catálogo incompleto.")
+    magic, versao, gerado_em, quantidade, largura, _ = CABECALHO.unpack(bruto)
+    if magic != MAGIC:
+        raise CatalogoBinarioInvalidoError("Arquivo não é um catálogo binário do PDV.")
+    return {'versao': versao, 'gerado_em': gerado_em, 'quantidade': quantidade, 'largura_codigo_barras': largura}
+
+
+class CatalogoBinario:
+    """ Leitura do arquivo por mmap: a consulta por código de barras não decodifica o arquivo inteiro. """
+
+    def __init__(self, caminho: str):
+        cabecalho = ler_cabecalho(caminho)
+        self.versao = cabecalho['versao']
+        self.gerado_em = cabecalho['gerado_em']
+        self._quantidade = cabecalho['quantidade']
+        self._largura = cabecalho['largura_codigo_barras']
+        (self._pos_barras, self._pos_codigos, self._pos_precos,
+         self._pos_inicio_nomes, self._pos_nomes) = _posicoes(self._quantidade, self._largura)
+
+        with open(caminho, 'rb') as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _codigo_barras(self, indice: int) -> bytes:
+        inicio = self._pos_barras + indice * self._largura
+        return self._mapa[inicio:inicio + self._largura]
+
+    def produto(self, indice: int) -> dict:
+        """ Produto da linha `indice` (0 <= indice < len(catalogo)). """
+        inicio_nome, fim_nome = struct.unpack_from("<2I", self._mapa, self._pos_inicio_nomes + indice * 4)
+        return {
+            'codigo_produto': struct.unpack_from("<I", self._mapa, self._pos_codigos + indice * 4)[0],
+            'codigo_barras': self._codigo_barras(indice).rstrip(b'\0').decode('ascii') or None,
+            'preco_centavos': struct.unpack_from("<I", self._mapa, self._pos_precos + indice * 4)[0],
+            'nome': self._mapa[self._pos_nomes + inicio_nome:self._pos_nomes + fim_nome].decode('utf-8'),
+        }
+
+    def buscar_por_codigo_barras(self, codigo_barras: str):
+        """ Busca binária no bloco de códigos de barras. Retorna o produto ou None. """
+        # Mesma regra da gravação: descartar caracteres poderia casar com outro produto
+        if not codigo_barras or not codigo_barras_valido(codigo_barras) or len(codigo_barras) > self._largura:
+            return None
+        chave = codigo_barras.encode('ascii').ljust(self._largura, b'\0')
+
+        inicio, fim = 0, self._quantidade
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            if self._codigo_barras(meio) < chave:
+                inicio = meio + 1
+            else:
+                fim = meio
+        if inicio < self._quantidade and self._codigo_barras(inicio) == chave:
+            return self.produto(inicio)
+        return None
+
+    def __len__(self):
+        return self._quantidade
+
+    def close(self):
+        self._mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
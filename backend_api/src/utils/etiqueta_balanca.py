@@ -0,0 +1,51 @@
+# src/utils/etiqueta_balanca.py
+"""
+Etiquetas impressas pela balança (EAN-13 de circulação interna):
+
+    PREFIXO | código do item | valor | dígito verificador
+
+Com o prefixo '2' e 5 dígitos de código, '2 00123 001549 D' é o item 00123
+com valor 001549: R$ 15,49 (valor = preço) ou 1,549 kg (valor = peso em gramas).
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+CENTAVOS = Decimal('0.01')
+GRAMAS = Decimal('0.001')
+
+
+def digito_verificador_ean13(doze_digitos: str) -> int:
+    """ Dígito verificador do EAN-13 para os 12 primeiros dígitos (pesos 1 e 3 alternados). """
+    soma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(doze_digitos))
+    return (10 - soma % 10) % 10
+
+
+def decodificar_etiqueta(codigo: str, prefixo: str, digitos_codigo: int):
+    """
+    Separa a etiqueta em (código de barras do produto, valor inteiro do rótulo).
+    O código do produto é o prefixo mais o código do item (ex.: '200123').
+    Retorna None se o código não for uma etiqueta de balança válida.
+    """
+    if len(codigo) != 13 or not codigo.isdigit() or not codigo.startswith(prefixo):
+        return None
+    if digito_verificador_ean13(codigo[:12]) != int(codigo[12]):
+        return None
+
+    fim_codigo = len(prefixo) + digitos_codigo
+    if fim_codigo >= 12:
+        return None
+    return codigo[:fim_codigo], int(codigo[fim_codigo:12])
+
+
+def item_pesado(preco_kg: Decimal, valor: int, tipo_valor: str) -> dict:
+    """
+    Quantidade (kg) e total do item a partir do valor da etiqueta e do preço por kg.
+    tipo_valor 'preco': o valor é o total em centavos; 'peso': o peso em gramas.
+    """
+    if tipo_valor == 'peso':
+        quantidade = (Decimal(valor) / 1000).quantize(GRAMAS)
+        valor_total = (quantidade * preco_kg).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+    else:
+        valor_total = (Decimal(valor) / 100).quantize(CENTAVOS)
+        quantidade = (valor_total / preco_kg).quantize(GRAMAS, rounding=ROUND_HALF_UP) if preco_kg else Decimal('0.000')
+    return {'quantidade': quantidade, 'valor_total': valor_total}
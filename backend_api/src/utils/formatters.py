@@ -1,6 +1,7 @@
 # src/utils/formatters.py 
 
 import re
+import unicodedata
 
 def clean_only_numbers(value):
     """ Remove todos os caracteres que não são dígitos. """
@@ -51,4 +52,11 @@ def get_doc_type(value):
     elif tamanho == 14:
         return 'cnpj'
     else:
-        return 'invalido'
\ No newline at end of file
+        return 'invalido'
+
+def normalizar_busca(value):
+    """ Texto em minúsculas e sem acentos, para comparar com produto.nome_busca. """
+    if value is None:
+        return ''
+    sem_acento = unicodedata.normalize('NFKD', str(value))
+    return ''.join(c for c in sem_acento if not unicodedata.combining(c)).lower()
@@ -0,0 +1,159 @@
+# src/utils/indice_prefixos.py
+
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from src.utils.formatters import normalizar_busca
+
+
+class IndicePrefixos:
+    """
+    Índice em memória para o autocompletar de produtos, consultado por bisect:
+    uma lista ordenada dos nomes completos (sem acentos) e outra com cada palavra
+    do nome e o código de barras. As consultas param ao juntar candidatos
+    suficientes, que são ordenados pela popularidade (produto_popularidade).
+    Atualizado produto a produto (ProdutoDAO) e recarregado por inteiro
+    periodicamente. Thread-safe.
+    """
+
+    # Candidatos examinados por resultado pedido, para ordenar por popularidade
+    CANDIDATOS_POR_RESULTADO = 5
+
+    def __init__(self):
+        self._nomes = []    # [(nome_busca, codigo_produto)] em ordem
+        self._chaves = []   # [(termo, codigo_produto)] em ordem
+        self._produtos = {} # codigo_produto -> (dados, nome_busca, termos, popularidade, ' ' + termos unidos)
+        self._lock = threading.Lock()
+        self.carregado_em = None # time.monotonic() da última carga completa
+
+    @staticmethod
+    def _termos(produto: dict) -> tuple[str, set]:
+        nome_busca = ' '.join(re.findall(r'[a-z0-9]+', normalizar_busca(produto.get('nome'))))
+        termos = set(nome_busca.split())
+        if produto.get('codigo_barras'):
+            termos.add(str(produto['codigo_barras']))
+        return nome_busca, termos
+
+    def carregar(self, produtos: list[dict]):
+        """ Substitui todo o conteúdo (carga inicial e recargas periódicas). """
+        nomes = []
+        chaves = []
+        entradas = {}
+        for produto in produtos:
+            dados = dict(produto)
+            popularidade = dados.pop('popularidade', 0) or 0
+            nome_busca, termos = self._termos(dados)
+            entradas[produto['codigo_produto']] = (dados, nome_busca, termos, popularidade, ' ' + ' '.join(termos))
+            nomes.append((nome_busca, produto['codigo_produto']))
+            chaves.extend((termo, produto['codigo_produto']) for termo in termos)
+        nomes.sort()
+        chaves.sort()
+
+        with self._lock:
+            self._nomes = nomes
+            self._chaves = chaves
+            self._produtos = entradas
+            self.carregado_em = time.monotonic()
+
+    def atualizar(self, codigo_produto: int, **campos):
+        """ Inclui o produto ou altera os campos informados (nome, preco, codigo_barras...). """
+        with self._lock:
+            atual = self._produtos.get(codigo_produto)
+            if atual is None and 'nome' not in campos:
+                return # Produto de fora do índice: entra na próxima recarga completa
+            dados = dict(atual[0]) if atual else {'codigo_produto': codigo_produto}
+            dados.update(campos)
+            popularidade = atual[3] if atual else 0
+            self._remover(codigo_produto)
+
+            nome_busca, termos = self._termos(dados)
+            self._produtos[codigo_produto] = (dados, nome_busca, termos, popularidade, ' ' + ' '.join(termos))
+            insort(self._nomes, (nome_busca, codigo_produto))
+            for termo in termos:
+                insort(self._chaves, (termo, codigo_produto))
+
+    def remover(self, codigo_produto: int):
+        with self._lock:
+            self._remover(codigo_produto)
+
+    def _remover(self, codigo_produto: int):
+        atual = self._produtos.pop(codigo_produto, None)
+        if atual is None:
+            return
+        self._remover_da_lista(self._nomes, (atual[1], codigo_produto))
+        for termo in atual[2]:
+            self._remover_da_lista(self._chaves, (termo, codigo_produto))
+
+    @staticmethod
+    def _remover_da_lista(lista: list, entrada: tuple):
+        posicao = bisect_left(lista, entrada)
+        if posicao < len(lista) and lista[posicao] == entrada:
+            del lista[posicao]
+
+    def buscar(self, termo: str, limite: int = 10) -> list[dict]:
+        """
+        Produtos em que cada palavra digitada é início de uma palavra do nome
+        (ou do código de barras). Primeiro os nomes que começam pelo texto
+        digitado, depois as demais correspondências; em cada grupo, os mais
+        vendidos primeiro e, em seguida, a ordem alfabética.
+        """
+        palavras = re.findall(r'[a-z0-9]+', normalizar_busca(termo))
+        if not palavras:
+            return []
+        digitado = ' '.join(palavras)
+        maximo_candidatos = limite * self.CANDIDATOS_POR_RESULTADO
+
+        with self._lock:
+            # Percorre a faixa da palavra mais seletiva (menos entradas no índice)
+            faixas = {p: self._faixa(p) for p in palavras}
+            principal = min(palavras, key=lambda p: faixas[p][1] - faixas[p][0])
+            outras = [p for p in palavras if p != principal]
+
+            vistos = set()
+
+            # 1. Nome começando pelo texto digitado
+            candidatos = []
+            posicao = bisect_left(self._nomes, (digitado,))
+            while len(candidatos) < maximo_candidatos and posicao < len(self._nomes) and self._nomes[posicao][0].startswith(digitado):
+                codigo = self._nomes[posicao][1]
+                posicao += 1
+                vistos.add(codigo)
+                candidatos.append(codigo)
+            encontrados = self._mais_populares(candidatos, limite)
+
+            # 2. Palavras do meio do nome e código de barras (se ainda faltarem resultados)
+            candidatos = []
+            posicao, fim = faixas[principal]
+            if len(encontrados) >= limite:
+                posicao = fim
+            while len(candidatos) < maximo_candidatos and posicao < fim:
+                codigo = self._chaves[posicao][1]
+                posicao += 1
+                if codigo in vistos:
+                    continue
+                vistos.add(codigo)
+                # ' palavra' dentro de ' termo1 termo2 ...': a palavra é início de algum termo
+                texto = self._produtos[codigo][4]
+                if all(' ' + p in texto for p in outras):
+                    candidatos.append(codigo)
+            encontrados += self._mais_populares(candidatos, limite - len(encontrados))
+
+            return [dict(self._produtos[codigo][0]) for codigo in encontrados]
+
+    def _mais_populares(self, codigos: list, limite: int) -> list:
+        """ Os `limite` códigos de maior popularidade (empate: ordem alfabética do nome). """
+        if limite <= 0:
+            return []
+        return heapq.nsmallest(limite, codigos, key=lambda c: (-self._produtos[c][3], self._produtos[c][1], c))
+
+    def _faixa(self, prefixo: str) -> tuple[int, int]:
+        """ Posições [inicio, fim) das chaves que começam com o prefixo. """
+        return (
+            bisect_left(self._chaves, (prefixo,)),
+            bisect_left(self._chaves, (prefixo + chr(0x10FFFF),))
+        )
+
+    def __len__(self):
+        return len(self._produtos)
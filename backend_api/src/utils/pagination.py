@@ -0,0 +1,63 @@
+# src/utils/pagination.py
+
+import base64
+import json
+
+
+class CursorInvalidoError(ValueError):
+    """ Cursor de paginação malformado ou adulterado. """
+
+
+def encode_cursor(*valores) -> str:
+    """
+    Gera um cursor opaco (keyset) a partir dos valores da última linha da página.
+    Valores não serializáveis em JSON (datetime, Decimal) viram texto ISO/str.
+    """
+    bruto = json.dumps(valores, default=lambda v: v.isoformat() if hasattr(v, 'isoformat') else str(v))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, tamanho: int) -> list:
+    """ Decodifica um cursor gerado por encode_cursor, validando a quantidade de valores. """
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (ValueError, TypeError) as e:
+        raise CursorInvalidoError("Cursor de paginação inválido.") from e
+
+    if not isinstance(valores, list) or len(valores) != tamanho:
+        raise CursorInvalidoError("Cursor de paginação inválido.")
+    return valores
+
+
+def parse_limite(valor, padrao: int, maximo: int) -> int:
+    """ Converte o parâmetro ?limite=, aplicando o padrão e o teto da rota. """
+    if valor in (None, ''):
+        return padrao
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError("O parâmetro 'limite' deve ser um número inteiro.")
+    if limite < 1:
+        raise ValueError("O parâmetro 'limite' deve ser maior que zero.")
+    return min(limite, maximo)
+
+
+def parse_ids(valor, maximo: int) -> list[int]:
+    """ Converte o parâmetro ?ids=1,2,3 (sem repetidos, na ordem pedida), limitado a 'maximo' ids. """
+    try:
+        ids = [int(parte) for parte in valor.split(',') if parte.strip()]
+    except (AttributeError, ValueError):
+        raise ValueError("O parâmetro 'ids' deve ser uma lista de números inteiros separados por vírgula.")
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError("Informe ao menos um id em 'ids'.")
+    if len(ids) > maximo:
+        raise ValueError(f"No máximo {maximo} ids por requisição.")
+    return ids
+
+
+def ordenar_por_ids(registros: list[dict], ids: list, chave: str) -> list[dict]:
+    """ Reordena o resultado de um '= ANY(...)' na ordem dos ids pedidos (os não encontrados ficam de fora). """
+    por_id = {registro[chave]: registro for registro in registros}
+    return [por_id[i] for i in ids if i in por_id]
@@ -177,4 +177,20 @@ def test_05_exclusao_atomica_e_limpeza_de_localizacao():
     assert rows_affected == 1
     
     # 5. ASSERÇÃO 2 (VERALICHE): Verifica se a localização TAMBÉM foi excluída
-    assert check_localizacao_exists(id_loc_inserida) is False, "Falha no VERALICHE: Localização órfã encontrada após delete do cliente."
\ No newline at end of file
+    assert check_localizacao_exists(id_loc_inserida) is False, "Falha no VERALICHE: Localização órfã encontrada após delete do cliente."
+
+def test_06_busca_em_lote_mantem_ordem_pedida():
+    """ Testa a busca de vários clientes em uma consulta: ordem dos ids pedidos, sem os inexistentes. """
+    dados_b = obter_dados_teste()
+    dados_b['localizacao_data']['logradouro'] = "Rua Teste Cliente Lote" # Endereço (cep + logradouro) é único
+    id_a = setup_test_cliente(obter_dados_teste())
+    id_b = setup_test_cliente(dados_b)
+    
+    try:
+        clientes = cliente_dao.find_by_ids([id_b, 999999999, id_a])
+        
+        assert [c['id_cliente'] for c in clientes] == [id_b, id_a]
+        assert clientes[0]['logradouro'] == "Rua Teste Cliente Lote" # Localização lida via JOIN
+    finally:
+        limpar_cliente_inserido(id_a)
+        limpar_cliente_inserido(id_b)
@@ -0,0 +1,214 @@
+import pytest
+import threading
+from flask import Flask
+from src import db_connection
+from src.db_connection import get_db_connection, get_pool, unit_of_work, run_in_unit_of_work, get_retry_stats
+
+# --- UTILS ---
+
+def backend_pid(conn):
+    """ Retorna o PID do processo do PostgreSQL que atende a conexão. """
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_backend_pid();")
+        return cur.fetchone()[0]
+
+def contar_registros_uow():
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM teste_uow;")
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+def inserir_registro_uow(valor):
+    """ Simula um DAO: abre, executa, commita e fecha. """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO teste_uow (valor) VALUES (%s);", (valor,))
+        conn.commit()
+    finally:
+        conn.close()
+
+@pytest.fixture
+def tabela_uow():
+    conn = get_db_connection()
+    with conn.cursor() as cur:
+        cur.execute("CREATE TABLE IF NOT EXISTS teste_uow (valor INTEGER);")
+        cur.execute("DELETE FROM teste_uow;")
+    conn.commit()
+    conn.close()
+
+    yield
+
+    conn = get_db_connection()
+    with conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS teste_uow;")
+    conn.commit()
+    conn.close()
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    db_connection.init_app(app)
+    return app
+
+# --- TESTES DO POOL ---
+
+def test_01_close_devolve_conexao_ao_pool():
+    """ Fechar a conexão deve devolvê-la ao pool, reaproveitando as sessões abertas. """
+    pids = set()
+    for _ in range(20):
+        conn = get_db_connection()
+        assert conn is not None
+        pids.add(backend_pid(conn))
+        conn.close()
+
+    # 20 empréstimos sequenciais não podem abrir 20 sessões no PostgreSQL
+    assert len(pids) <= get_pool().max_size
+
+
+def test_02_close_descarta_transacao_nao_commitada():
+    """ O que não foi commitado não pode vazar para o próximo uso da conexão. """
+    conn = get_db_connection()
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS tmp_pool_teste (id INTEGER);")
+        cur.execute("INSERT INTO tmp_pool_teste VALUES (1);")
+    conn.close()
+
+    conn = get_db_connection()
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('pg_temp.tmp_pool_teste');")
+        assert cur.fetchone()[0] is None
+    conn.close()
+
+
+def test_03_mesma_conexao_durante_a_requisicao(app):
+    """ Dentro de uma requisição, todos os DAOs compartilham a mesma conexão. """
+    with app.test_request_context():
+        conn_1 = get_db_connection()
+        pid_1 = backend_pid(conn_1)
+        conn_1.close() # Não devolve ao pool: apenas encerra a transação
+
+        conn_2 = get_db_connection()
+        assert conn_2 is conn_1
+        assert backend_pid(conn_2) == pid_1
+
+
+def test_04_teardown_devolve_conexao_da_requisicao(app):
+    """ Ao final da requisição a conexão volta para o pool. """
+    with app.test_request_context():
+        conn = get_db_connection()
+        em_uso = get_pool().get_stats()["pool_size"] - get_pool().get_stats()["pool_available"]
+        assert em_uso >= 1
+
+    assert conn.closed
+
+
+# --- TESTES DA UNIDADE DE TRABALHO ---
+
+def test_05_unidade_de_trabalho_compartilha_conexao_e_aninha(tabela_uow):
+    """ DAOs e unidades aninhadas usam a mesma conexão; o commit só ocorre na saída externa. """
+    with unit_of_work() as uow:
+        pid = backend_pid(get_db_connection())
+        inserir_registro_uow(1)
+
+        with unit_of_work() as interna:
+            assert interna is uow
+            assert interna.nested
+            assert backend_pid(get_db_connection()) == pid
+            inserir_registro_uow(2)
+
+        # O commit do "DAO" não foi efetivado: outra sessão ainda não enxerga os dados
+        conn_externa = get_pool().getconn()
+        try:
+            with conn_externa.cursor() as cur:
+                cur.execute("SELECT COUNT(*) FROM teste_uow;")
+                assert cur.fetchone()[0] == 0
+        finally:
+            get_pool().putconn(conn_externa)
+
+    assert contar_registros_uow() == 2
+
+
+def test_06_unidade_de_trabalho_desfaz_em_excecao(tabela_uow):
+    """ Uma exceção dentro da unidade desfaz todas as chamadas de DAO. """
+    with pytest.raises(ValueError):
+        with unit_of_work():
+            inserir_registro_uow(1)
+            inserir_registro_uow(2)
+            raise ValueError("falha simulada")
+
+    assert contar_registros_uow() == 0
+
+
+def test_07_rollback_de_dao_marca_unidade_para_desfazer(tabela_uow):
+    """ Se um DAO pedir rollback (erro tratado), a unidade inteira é desfeita. """
+    with unit_of_work() as uow:
+        inserir_registro_uow(1)
+        get_db_connection().rollback()
+        assert uow.rollback_only
+
+    assert contar_registros_uow() == 0
+
+
+# --- TESTES DE REPETIÇÃO (DEADLOCK) ---
+
+def test_08_deadlock_e_repetido_automaticamente(tabela_uow):
+    """ Duas transações que travam linhas em ordem oposta: a vítima do deadlock é repetida e conclui. """
+    inserir_registro_uow(1)
+    inserir_registro_uow(2)
+    deadlocks_antes = get_retry_stats()['deadlocks']
+
+    barreira = threading.Barrier(2)
+    erros = []
+
+    def travar_em_ordem(primeiro, segundo, tentativas):
+        tentativas.append(1)
+        with get_db_connection().cursor() as cur:
+            cur.execute("UPDATE teste_uow SET valor = valor WHERE valor = %s;", (primeiro,))
+            if len(tentativas) == 1:
+                barreira.wait(5) # Só na primeira tentativa: força o ciclo de espera
+            cur.execute("UPDATE teste_uow SET valor = valor WHERE valor = %s;", (segundo,))
+
+    def executar(primeiro, segundo):
+        try:
+            run_in_unit_of_work(travar_em_ordem, primeiro, segundo, [])
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=executar, args=ordem) for ordem in ((1, 2), (2, 1))]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert erros == []
+    assert get_retry_stats()['deadlocks'] == deadlocks_antes + 1
+
+
+def test_09_savepoint_desfaz_so_o_trecho(tabela_uow):
+    """ Falha (exceção ou rollback pedido por DAO) dentro do savepoint não desfaz o resto da unidade. """
+    with unit_of_work() as uow:
+        inserir_registro_uow(1)
+
+        with pytest.raises(ValueError):
+            with uow.savepoint():
+                inserir_registro_uow(2)
+                raise ValueError("falha simulada")
+
+        with uow.savepoint():
+            inserir_registro_uow(3)
+            get_db_connection().rollback()
+
+        with uow.savepoint():
+            inserir_registro_uow(4)
+
+        assert not uow.rollback_only
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT valor FROM teste_uow ORDER BY valor;")
+            assert [r[0] for r in cur.fetchall()] == [1, 4]
+    finally:
+        conn.close()
@@ -1,11 +1,12 @@
 # tests/test_produto_dao_completo.py
 
 import pytest
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import secrets
 import string
 from psycopg import IntegrityError # Necessário para capturar a exceção de estoque negativo
-from src.models.produto_dao import ProdutoDAO
+from src.models.produto_dao import ProdutoDAO, _cache_codigo_barras, indice_autocomplete
 from src.models.estoque_dao import EstoqueDAO
 from src.db_connection import get_db_connection
 
@@ -236,4 +237,347 @@ def test_06_exclusao_de_produto_e_estoque_em_cascata_dinamico():
 
     finally:
         # GARANTIA DE LIMPEZA
-        limpar_produto_inserido(codigo_para_excluir)
\ No newline at end of file
+        limpar_produto_inserido(codigo_para_excluir)
+
+
+def test_07_cache_do_scan_por_codigo_de_barras_e_invalidado_na_alteracao():
+    """ O segundo scan vem do cache; alterar preço ou estoque e excluir o produto invalidam a entrada. """
+    dados = obter_dados_teste()
+    codigo_teste = configurar_teste_produto(dados)
+
+    try:
+        assert produto_dao.find_by_codigo_barras(dados['codigo_barras'])['preco'] == Decimal('15.50')
+        acertos = _cache_codigo_barras.stats()['acertos']
+        assert produto_dao.find_by_codigo_barras(dados['codigo_barras'])['quantidade'] == dados['initial_quantity']
+        assert _cache_codigo_barras.stats()['acertos'] == acertos + 1
+
+        produto_dao.update(codigo_teste, preco="17.90")
+        assert produto_dao.find_by_codigo_barras(dados['codigo_barras'])['preco'] == Decimal('17.90')
+
+        estoque_dao.update_quantity(codigo_teste, 7)
+        assert produto_dao.find_by_codigo_barras(dados['codigo_barras'])['quantidade'] == 7
+
+        produto_dao.delete(codigo_teste)
+        assert produto_dao.find_by_codigo_barras(dados['codigo_barras']) is None
+
+    finally:
+        limpar_produto_inserido(codigo_teste)
+
+
+def test_08_busca_por_relevancia_sem_acentos_e_paginada():
+    """ A busca ignora acentos/maiúsculas, prioriza o nome sobre a descrição e pagina por cursor. """
+    marca = f"zq{secrets.token_hex(3)}"
+    produtos = [
+        (f"Café {marca} Tradicional", "Torrado e moído"),
+        (f"Filtro de Papel {marca}", "Para café coado"),
+        (f"Pão de Queijo {marca}", "Congelado"),
+    ]
+    codigos = []
+    barras = []
+    for nome, descricao in produtos:
+        codigo_barras = gerar_codigo_aleatorio()
+        codigos.append(produto_dao.insert(nome, descricao, "9.90", codigo_barras, 10))
+        barras.append(codigo_barras)
+
+    try:
+        resultado = produto_dao.buscar(f"cafe {marca}")
+        assert [p['codigo_produto'] for p in resultado['produtos']] == codigos[:2]
+        assert [p['codigo_produto'] for p in produto_dao.buscar(f"CAFÉ {marca.upper()}")['produtos']] == codigos[:2]
+
+        assert produto_dao.buscar(barras[2])['produtos'][0]['codigo_produto'] == codigos[2]
+        assert codigos[1] in [p['codigo_produto'] for p in produto_dao.buscar(barras[1][:9], limite=100)['produtos']]
+
+        primeira = produto_dao.buscar(marca, limite=2)
+        assert len(primeira['produtos']) == 2 and primeira['proximo_cursor']
+        segunda = produto_dao.buscar(marca, limite=2, cursor=primeira['proximo_cursor'])
+        assert segunda['proximo_cursor'] is None
+        assert sorted(p['codigo_produto'] for p in primeira['produtos'] + segunda['produtos']) == sorted(codigos)
+
+        # Cursor com valores de tipo errado é recusado, e não lido como fim da busca
+        from app import create_app
+        from src.utils.pagination import encode_cursor, CursorInvalidoError
+        for adulterado in (encode_cursor("x", "y"), encode_cursor(1.5, None)):
+            with pytest.raises(CursorInvalidoError):
+                produto_dao.buscar(marca, limite=2, cursor=adulterado)
+        resposta = create_app(testing=True).test_client().get(f'/api/v1/produtos?q={marca}&cursor={encode_cursor("x", "y")}')
+        assert resposta.status_code == 400
+
+    finally:
+        for codigo in codigos:
+            limpar_produto_inserido(codigo)
+
+
+def test_09_autocompletar_em_memoria_acompanha_cadastro():
+    """ O índice do autocompletar inclui, altera e remove o produto junto com o ProdutoDAO. """
+    marca = f"zq{secrets.token_hex(3)}"
+    produto_dao.autocompletar("carga") # Garante o índice carregado
+    codigo_teste = produto_dao.insert(f"Pão Francês {marca}", "Unidade", "0.80", gerar_codigo_aleatorio(), 10)
+
+    try:
+        sugestoes = produto_dao.autocompletar(f"PAO {marca[:5]}")
+        assert [p['codigo_produto'] for p in sugestoes] == [codigo_teste]
+        assert sugestoes[0]['nome'] == f"Pão Francês {marca}"
+
+        produto_dao.update(codigo_teste, nome=f"Pão Integral {marca}", preco="1.10")
+        assert produto_dao.autocompletar(f"frances {marca}") == []
+        assert produto_dao.autocompletar(f"integral {marca}")[0]['preco'] == "1.10"
+
+        produto_dao.delete(codigo_teste)
+        assert produto_dao.autocompletar(marca) == []
+        assert codigo_teste not in [p['codigo_produto'] for p in indice_autocomplete.buscar("pao", 1000)]
+
+    finally:
+        limpar_produto_inserido(codigo_teste)
+
+
+def test_10_catalogo_incremental_traz_so_alterados_e_excluidos():
+    """ Depois da carga completa, a sincronização devolve só produtos alterados (dados ou estoque) e excluídos. """
+    completo = produto_dao.catalogo_desde(None)
+    assert completo['completo'] is True
+    assert PRODUTOS_IDS_FIXOS[2] in [p['codigo_produto'] for p in completo['produtos']]
+
+    dados = obter_dados_teste()
+    codigo_novo = configurar_teste_produto(dados)
+    codigo_feijao = PRODUTOS_IDS_FIXOS[2]
+    try:
+        estoque_dao.update_quantity(codigo_feijao, 199)
+        delta = produto_dao.catalogo_desde(completo['versao'])
+        assert delta['completo'] is False
+        alterados = {p['codigo_produto']: p for p in delta['produtos']}
+        assert codigo_novo in alterados and codigo_feijao in alterados
+        assert alterados[codigo_feijao]['quantidade'] == 199
+        assert PRODUTOS_IDS_FIXOS[1] not in alterados
+
+        produto_dao.delete(codigo_novo)
+        seguinte = produto_dao.catalogo_desde(delta['versao'])
+        assert codigo_novo in seguinte['excluidos']
+        assert codigo_feijao not in [p['codigo_produto'] for p in seguinte['produtos']]
+
+        # Versão desconhecida (ex.: banco restaurado): volta ao catálogo completo
+        assert produto_dao.catalogo_desde(seguinte['versao'] + 10**9)['completo'] is True
+    finally:
+        estoque_dao.update_quantity(codigo_feijao, 200)
+        limpar_produto_inserido(codigo_novo)
+
+
+def test_11_catalogo_binario_regenerado_quando_o_catalogo_muda(tmp_path):
+    """ O arquivo binário responde ao scan por busca binária e só é regenerado quando um produto muda. """
+    import os
+    import stat
+    from src.services.catalogo_binario_service import obter_catalogo_binario
+    from src.utils.catalogo_binario import CatalogoBinario, ler_cabecalho
+
+    caminho = obter_catalogo_binario(str(tmp_path))
+    assert stat.S_IMODE(os.stat(caminho).st_mode) == 0o644 # Não fica com o 0600 do mkstemp
+    with CatalogoBinario(caminho) as catalogo:
+        arroz = catalogo.buscar_por_codigo_barras("1000000000001")
+        assert arroz['codigo_produto'] == PRODUTOS_IDS_FIXOS[1]
+        assert arroz['preco_centavos'] == 500
+        assert arroz['nome'] == "ARROZ Teste Fixo"
+        assert catalogo.buscar_por_codigo_barras("9999999999999") is None
+        versao = catalogo.versao
+
+    # Só o saldo mudou: o mesmo arquivo continua valendo
+    estoque_dao.update_quantity(PRODUTOS_IDS_FIXOS[2], 199)
+    try:
+        assert ler_cabecalho(obter_catalogo_binario(str(tmp_path)))['versao'] == versao
+    finally:
+        estoque_dao.update_quantity(PRODUTOS_IDS_FIXOS[2], 200)
+
+    produto_dao.update(PRODUTOS_IDS_FIXOS[1], preco="5.50")
+    try:
+        with CatalogoBinario(obter_catalogo_binario(str(tmp_path))) as catalogo:
+            assert catalogo.versao > versao
+            assert catalogo.buscar_por_codigo_barras("1000000000001")['preco_centavos'] == 550
+    finally:
+        produto_dao.update(PRODUTOS_IDS_FIXOS[1], preco="5.00")
+
+
+def test_12_importacao_csv_insere_atualiza_e_relata_linhas_com_erro():
+    """ O CSV entra por COPY: linhas válidas são gravadas (novas ou pelo código de barras) e as inválidas vão para o relatório. """
+    import io
+    from src.models.produto_dao import ImportacaoInvalidaError
+
+    barras_novo, barras_repetido = gerar_codigo_aleatorio(), gerar_codigo_aleatorio()
+    conteudo = (
+        "nome;descricao;preco;codigo_barras;quantidade\n"
+        f"Café Importado;Café torrado 500g;19,90;{barras_novo};12\n"
+        "X;Nome curto demais;1.00;;\n"
+        "Preço Ruim;Preço com texto;abc;;\n"
+        f"Repetido A;Primeira ocorrência;2.00;{barras_repetido};\n"
+        f"Repetido B;Segunda ocorrência;3.00;{barras_repetido};\n"
+    )
+
+    simulacao = produto_dao.importar_csv(io.BytesIO(conteudo.encode()), simular=True)
+    assert simulacao['inseridos'] == 1 and simulacao['rejeitados'] == 4
+    assert produto_dao.find_by_codigo_barras(barras_novo) is None
+
+    relatorio = produto_dao.importar_csv(io.BytesIO(conteudo.encode()))
+    codigo_novo = produto_dao.find_by_codigo_barras(barras_novo)['codigo_produto']
+    try:
+        assert (relatorio['total'], relatorio['inseridos'], relatorio['rejeitados']) == (5, 1, 4)
+        assert [erro['linha'] for erro in relatorio['erros']] == [3, 4, 5, 6]
+        assert "repetido no arquivo (linhas 5, 6)" in relatorio['erros'][2]['erro']
+        assert produto_dao.find_by_codigo_barras(barras_repetido) is None
+
+        # Mesmo código de barras: atualiza o produto e o saldo
+        atualizacao = f"nome,descricao,preco,codigo_barras,quantidade\nCafé Importado,Café torrado 500g,21.50,{barras_novo},30\n"
+        relatorio = produto_dao.importar_csv(io.BytesIO(atualizacao.encode()))
+        assert (relatorio['inseridos'], relatorio['atualizados']) == (0, 1)
+        produto = produto_dao.find_by_id(codigo_novo)
+        assert produto['preco'] == Decimal('21.50')
+        assert produto['quantidade'] == 30
+
+        with pytest.raises(ImportacaoInvalidaError):
+            produto_dao.importar_csv(io.BytesIO(b"nome,preco\nSem descricao,1.00\n"))
+    finally:
+        limpar_produto_inserido(codigo_novo)
+
+
+def test_13_reajuste_em_lote_imediato_agendado_e_historico():
+    """ Lista de preços aplicada na hora, percentual agendado aplicado na vigência e histórico com os valores antigos e novos. """
+    from src.models.reajuste_preco_dao import ReajustePrecoDAO
+    reajuste_dao = ReajustePrecoDAO()
+
+    dados_a, dados_b = obter_dados_teste(), obter_dados_teste()
+    codigo_a, codigo_b = configurar_teste_produto(dados_a), configurar_teste_produto(dados_b)
+    try:
+        lista = reajuste_dao.criar({
+            'descricao': 'Lista semanal',
+            'itens': [
+                {'codigo_produto': codigo_a, 'preco': Decimal('20.00')},
+                {'codigo_barras': dados_b['codigo_barras'], 'preco': Decimal('30.00')},
+                {'codigo_barras': 'nao-cadastrado', 'preco': Decimal('1.00')},
+            ]
+        })
+        assert lista['status'] == 'aplicado' and lista['produtos_alterados'] == 2
+        assert lista['nao_encontrados'] == [{'codigo_barras': 'nao-cadastrado'}]
+        assert produto_dao.find_by_id(codigo_b)['preco'] == Decimal('30.00')
+
+        agendado = reajuste_dao.criar({
+            'percentual': Decimal('10'),
+            'itens': [{'codigo_produto': codigo_a}],
+            'vigencia': datetime.now(timezone.utc) + timedelta(hours=1),
+        })
+        assert agendado['status'] == 'agendado'
+        assert produto_dao.find_by_id(codigo_a)['preco'] == Decimal('20.00')
+
+        # Antecipa a vigência para o agendamento vencer
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("UPDATE reajuste_preco SET vigencia = now() - interval '1 second' WHERE id_reajuste = %s;", (agendado['id_reajuste'],))
+            conn.commit()
+        finally:
+            conn.close()
+        assert {'id_reajuste': agendado['id_reajuste'], 'produtos_alterados': 1} in reajuste_dao.aplicar_pendentes()
+        assert produto_dao.find_by_id(codigo_a)['preco'] == Decimal('22.00')
+
+        historico = reajuste_dao.historico(codigo_a)
+        assert [(h['preco_anterior'], h['preco_novo'], h['id_reajuste']) for h in historico[:2]] == [
+            (Decimal('20.00'), Decimal('22.00'), agendado['id_reajuste']),
+            (Decimal(dados_a['preco']), Decimal('20.00'), lista['id_reajuste']),
+        ]
+    finally:
+        limpar_produto_inserido(codigo_a)
+        limpar_produto_inserido(codigo_b)
+
+
+def test_14_listagem_paginada_por_keyset_com_campos_e_ordem():
+    """
+    Testa a listagem paginada: percorrer as páginas por preço decrescente
+    traz todos os produtos uma única vez e na ordem, só com os campos pedidos.
+    """
+    completa = produto_dao.find_all(campos=['codigo_produto', 'preco'], ordem='-preco')
+    assert completa and set(completa[0]) == {'codigo_produto', 'preco'}
+
+    paginas, cursor = [], None
+    while True:
+        pagina = produto_dao.find_all_paginado(['codigo_produto', 'nome'], '-preco', limite=2, cursor=cursor)
+        paginas.extend(pagina['produtos'])
+        cursor = pagina['proximo_cursor']
+        if cursor is None:
+            break
+
+    assert [p['codigo_produto'] for p in paginas] == [p['codigo_produto'] for p in completa]
+    assert set(paginas[0]) == {'codigo_produto', 'nome', 'preco'} # preco: coluna do cursor
+
+    with pytest.raises(ValueError):
+        produto_dao.find_all(campos=['senha'])
+    with pytest.raises(ValueError):
+        produto_dao.find_all_paginado(ordem='descricao')
+
+
+def test_15_busca_em_lote_por_codigos_na_ordem_pedida():
+    """ Testa a busca de vários produtos (com estoque) em uma consulta, na ordem dos códigos pedidos. """
+    todos = produto_dao.find_all()
+    primeiro, ultimo = todos[0], todos[-1]
+
+    produtos = produto_dao.find_by_ids([ultimo['codigo_produto'], 999999999, primeiro['codigo_produto']])
+
+    assert [p['codigo_produto'] for p in produtos] == [ultimo['codigo_produto'], primeiro['codigo_produto']]
+    assert produtos[1]['quantidade'] == primeiro['quantidade']
+
+
+def test_16_scan_traz_preco_promocional_estoque_e_etiqueta_de_balanca():
+    """ Scan do caixa: promoção vigente no preço a cobrar, saldo em estoque e peso/total lidos da etiqueta de balança. """
+    from src.models.promocao_dao import PromocaoDAO
+    from src.services.scan_service import escanear
+    from src.utils.etiqueta_balanca import digito_verificador_ean13
+    promocao_dao = PromocaoDAO()
+
+    dados_unidade = obter_dados_teste()
+    dados_pesavel = {**obter_dados_teste(), 'preco': "40.00", 'codigo_barras': '2' + gerar_codigo_aleatorio(5)}
+    codigo_unidade, codigo_pesavel = configurar_teste_produto(dados_unidade), configurar_teste_produto(dados_pesavel)
+    try:
+        fim = datetime.now(timezone.utc) + timedelta(days=1)
+        promocao_dao.criar({'codigo_produto': codigo_unidade, 'preco_promocional': Decimal('12.00'), 'fim': fim})
+        promocao_dao.criar({'codigo_produto': codigo_unidade, 'preco_promocional': Decimal('10.00'), 'quantidade_minima': 3, 'fim': fim})
+        promocao_dao.criar({'codigo_produto': codigo_unidade, 'preco_promocional': Decimal('1.00'),
+                            'inicio': fim, 'fim': fim + timedelta(days=1)}) # Ainda não vigente
+
+        item = escanear(dados_unidade['codigo_barras'])
+        assert item['codigo_produto'] == codigo_unidade and item['estoque'] == 50
+        assert item['preco_unitario'] == Decimal('12.00') and item['balanca'] is None
+        assert [p['preco_promocional'] for p in item['promocoes']] == [Decimal('12.00'), Decimal('10.00')]
+
+        # Etiqueta: código do item + R$ 15,49 + dígito verificador; a R$ 40,00/kg são 0,387 kg
+        etiqueta = dados_pesavel['codigo_barras'] + '001549'
+        etiqueta += str(digito_verificador_ean13(etiqueta))
+        item = escanear(etiqueta)
+        assert item['codigo_produto'] == codigo_pesavel
+        assert item['valor_total'] == Decimal('15.49') and item['quantidade'] == Decimal('0.387')
+
+        assert escanear(etiqueta[:-1] + str((int(etiqueta[-1]) + 1) % 10)) is None # Dígito verificador errado
+    finally:
+        limpar_produto_inserido(codigo_unidade)
+        limpar_produto_inserido(codigo_pesavel)
+
+
+def test_17_codigo_de_barras_fora_do_ascii_nao_derruba_o_catalogo_binario(tmp_path):
+    """ Cadastro antigo com código não ASCII entra no catálogo binário sem código; o schema recusa novos. """
+    import io
+    from marshmallow import ValidationError
+    from src.schemas.produto_schema import ProdutoSchema
+    from src.services.catalogo_binario_service import obter_catalogo_binario
+    from src.utils.catalogo_binario import CatalogoBinario
+
+    with pytest.raises(ValidationError) as erro:
+        ProdutoSchema().load({"nome": "Café", "descricao": "Pacote 500g", "preco": "12.90", "codigo_barras": "789é123"})
+    assert 'codigo_barras' in erro.value.messages
+    csv_invalido = "nome;descricao;preco;codigo_barras;quantidade\nCafé Novo;Pacote 500g;12.90;789é123;\n"
+    relatorio = produto_dao.importar_csv(io.BytesIO(csv_invalido.encode()), simular=True)
+    assert relatorio['rejeitados'] == 1 and 'ASCII' in relatorio['erros'][0]['erro']
+
+    # Gravado direto pelo DAO, como um cadastro anterior à validação
+    codigo_teste = produto_dao.insert("Café Antigo", "Pacote 500g", "12.90", "789é123", 10)
+    try:
+        caminho = obter_catalogo_binario(str(tmp_path))
+        with CatalogoBinario(caminho) as catalogo:
+            assert catalogo.buscar_por_codigo_barras("1000000000001")['codigo_produto'] == PRODUTOS_IDS_FIXOS[1]
+            assert catalogo.buscar_por_codigo_barras("789é123") is None
+            produtos = [catalogo.produto(i) for i in range(len(catalogo))]
+            antigo = next(p for p in produtos if p['codigo_produto'] == codigo_teste)
+            assert antigo['codigo_barras'] is None
+    finally:
+        limpar_produto_inserido(codigo_teste)
@@ -1,12 +1,19 @@
 import pytest
 from decimal import Decimal
+from datetime import date, datetime
 from src.models.venda_dao import VendaDAO
 from src.models.funcionario_dao import FuncionarioDAO 
 from src.models.fluxo_caixa_dao import FluxoCaixaDAO 
-from src.db_connection import get_db_connection
+from src.models.estoque_dao import EstoqueDAO
+from src.models.produto_dao import ProdutoDAO
+from src.models.estoque_dao import EstoqueInsuficienteError
+from src.models.idempotencia_dao import IdempotenciaDAO, ChaveIdempotenciaEmUsoError, ChaveIdempotenciaReutilizadaError
+from src.db_connection import get_db_connection, unit_of_work, get_retry_stats
 from src.schemas.venda_schema import VendaSchema
-from psycopg.errors import CheckViolation, UniqueViolation, UndefinedColumn 
+from psycopg.errors import UniqueViolation, UndefinedColumn 
 import logging
+import threading
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +24,8 @@ CPF_CLIENTE_TESTE = '12345678914'
 ID_TIPO_PAGAMENTO_DINHEIRO = 1 # ID assumido para "Dinheiro"
 
 # Instâncias dos DAOs
-venda_dao = VendaDAO()
+venda_dao = VendaDAO(usar_procedure=False)
+venda_dao_procedure = VendaDAO(usar_procedure=True)
 funcionario_dao = FuncionarioDAO()
 fluxo_caixa_dao = FluxoCaixaDAO()
 venda_schema = VendaSchema()
@@ -224,20 +232,24 @@ def test_02_venda_sucesso_se_caixa_estiver_aberto():
 
 def test_03_venda_falha_por_estoque_insuficiente():
     """
-    Verifica se a venda falha devido ao CheckViolation do DB e o ROLLBACK ocorre.
+    Verifica se a venda falha com o relatório de faltas por produto e o ROLLBACK ocorre.
     """
     # 1. SETUP: CRIAÇÃO DO PRODUTO com estoque baixo e caixa aberto
     id_fluxo = garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
     codigo_produto, estoque_inicial = criar_produto_local(initial_quantity=5)
     
-    # 2. REGISTRA A VENDA (Tenta vender 10 de 5 -> Deve falhar no DB)
+    # 2. REGISTRA A VENDA (Tenta vender 10 de 5 -> Deve falhar na baixa de estoque)
     QUANTIDADE_VENDIDA = 10
     # A função utilitária agora garante que R$ 100.00 serão pagos, passando pela validação do Schema.
     validated_data = realizar_venda_simulada_data(quantidade_venda=QUANTIDADE_VENDIDA, codigo_produto=codigo_produto) 
     
-    # Espera o erro de CHECK VIOLATION do PostgreSQL (ocorre no DAO, após a validação do Schema)
-    with pytest.raises(CheckViolation):
+    # Espera o relatório de faltas (ocorre no DAO, após a validação do Schema)
+    with pytest.raises(EstoqueInsuficienteError) as excinfo:
         venda_dao.registrar_venda(validated_data)
+
+    assert excinfo.value.faltas == [
+        {'codigo_produto': codigo_produto, 'solicitado': QUANTIDADE_VENDIDA, 'disponivel': estoque_inicial}
+    ]
         
     # VERIFICAÇÃO: O estoque deve ter sido restaurado (Rollback)
     estoque_final = buscar_estoque_local(codigo_produto)
@@ -278,4 +290,611 @@ def test_03_registrar_venda_rapida_sem_cliente_sucesso():
     
     # Garante que o estoque foi baixado (5 - 1 = 4)
     estoque_final = buscar_estoque_local(codigo_produto)
-    assert estoque_final == 4
\ No newline at end of file
+    assert estoque_final == 4
+
+
+def test_04_venda_com_varios_itens_baixa_estoque_em_lote():
+    """
+    Cesta com vários itens (inclusive o mesmo produto em duas linhas):
+    baixa todo o estoque de uma vez e grava uma linha de venda_item por item.
+    """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    produto_a, _ = criar_produto_local(initial_quantity=20)
+    produto_b, _ = criar_produto_local(initial_quantity=30)
+
+    dados_venda = {
+        "cpf_funcionario": CPF_FUNCIONARIO_TESTE,
+        "itens": [
+            {"codigo_produto": produto_a, "quantidade_venda": 2, "preco_unitario": Decimal('10.00')},
+            {"codigo_produto": produto_b, "quantidade_venda": 5, "preco_unitario": Decimal('3.00')},
+            {"codigo_produto": produto_a, "quantidade_venda": 1, "preco_unitario": Decimal('10.00')},
+        ],
+        "pagamentos": [{"id_tipo": ID_TIPO_PAGAMENTO_DINHEIRO, "valor_pago": Decimal('50.00')}]
+    }
+    id_venda = venda_dao.registrar_venda(venda_schema.load(dados_venda))
+
+    assert id_venda is not None
+    assert buscar_estoque_local(produto_a) == 17
+    assert buscar_estoque_local(produto_b) == 25
+
+    venda_record = venda_dao.buscar_por_id(id_venda)
+    assert len(venda_record['itens']) == 3
+
+
+def test_05_falta_em_um_item_nao_baixa_nenhum():
+    """ Se um dos produtos não tiver saldo, o relatório lista só ele e nada é baixado. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    produto_ok, _ = criar_produto_local(initial_quantity=40)
+    produto_falta, _ = criar_produto_local(initial_quantity=2)
+
+    dados_venda = {
+        "cpf_funcionario": CPF_FUNCIONARIO_TESTE,
+        "itens": [
+            {"codigo_produto": produto_ok, "quantidade_venda": 1, "preco_unitario": Decimal('1.00')},
+            {"codigo_produto": produto_falta, "quantidade_venda": 3, "preco_unitario": Decimal('1.00')},
+        ],
+        "pagamentos": [{"id_tipo": ID_TIPO_PAGAMENTO_DINHEIRO, "valor_pago": Decimal('4.00')}]
+    }
+
+    with pytest.raises(EstoqueInsuficienteError) as excinfo:
+        venda_dao.registrar_venda(venda_schema.load(dados_venda))
+
+    assert [f['codigo_produto'] for f in excinfo.value.faltas] == [produto_falta]
+    assert buscar_estoque_local(produto_ok) == 40
+    assert buscar_estoque_local(produto_falta) == 2
+
+
+
+def test_06_venda_via_procedure_retorna_recibo_completo():
+    """ Checkout em uma única chamada à função registrar_venda_json. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=15)
+
+    validated_data = realizar_venda_simulada_data(quantidade_venda=3, codigo_produto=codigo_produto)
+    recibo = venda_dao_procedure.registrar_venda_com_recibo(validated_data)
+
+    assert recibo is not None
+    assert recibo['valor_total'] == Decimal('30.00')
+    assert recibo['nome_cliente'] == 'Cliente Teste'
+    assert recibo['itens'][0]['codigo_produto'] == codigo_produto
+    assert recibo['pagamentos'][0]['descricao'] == 'Dinheiro'
+    assert buscar_estoque_local(codigo_produto) == 12
+
+    # O recibo da função tem o mesmo formato da leitura pelo DAO
+    assert venda_schema.dump(recibo) == venda_schema.dump(venda_dao.buscar_por_id(recibo['id_venda']))
+
+
+def test_07_venda_via_procedure_reporta_faltas():
+    """ A função devolve o mesmo relatório de faltas da baixa em lote. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, estoque_inicial = criar_produto_local(initial_quantity=1)
+
+    validated_data = realizar_venda_simulada_data(quantidade_venda=4, codigo_produto=codigo_produto)
+
+    with pytest.raises(EstoqueInsuficienteError) as excinfo:
+        venda_dao_procedure.registrar_venda(validated_data)
+
+    assert excinfo.value.faltas == [
+        {'codigo_produto': codigo_produto, 'solicitado': 4, 'disponivel': estoque_inicial}
+    ]
+    assert buscar_estoque_local(codigo_produto) == estoque_inicial
+
+
+
+def test_08_recibo_montado_na_gravacao_igual_a_leitura():
+    """ O recibo devolvido pela gravação é idêntico ao lido depois por buscar_por_id. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=16)
+
+    validated_data = realizar_venda_simulada_data(quantidade_venda=2, codigo_produto=codigo_produto)
+    recibo = venda_dao.registrar_venda_com_recibo(validated_data)
+
+    assert recibo is not None
+    assert recibo['nome_cliente'] == 'Cliente Teste'
+    assert venda_schema.dump(recibo) == venda_schema.dump(venda_dao.buscar_por_id(recibo['id_venda']))
+
+
+def test_09_listagem_traz_itens_de_cada_venda():
+    """ A listagem carrega os itens de todas as vendas e associa cada item à sua venda. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    produto_a, _ = criar_produto_local(initial_quantity=21)
+    produto_b, _ = criar_produto_local(initial_quantity=22)
+
+    id_venda_a = venda_dao.registrar_venda(realizar_venda_simulada_data(1, produto_a))
+    id_venda_b = venda_dao.registrar_venda(realizar_venda_simulada_data(2, produto_b))
+
+    vendas = venda_dao.buscar_vendas_flexivel(data_str=date.today().isoformat())
+    por_id = {v['id_venda']: v for v in vendas}
+
+    assert [i['codigo_produto'] for i in por_id[id_venda_a]['itens']] == [produto_a]
+    assert [i['quantidade_venda'] for i in por_id[id_venda_b]['itens']] == [2]
+    assert por_id[id_venda_b]['pagamentos'][0]['descricao'] == 'Dinheiro'
+
+
+def test_10_paginacao_por_cursor_percorre_todas_as_vendas():
+    """ Percorre as vendas do operador de 2 em 2, sem repetir nem pular nenhuma. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=23)
+    for _ in range(3):
+        venda_dao.registrar_venda(realizar_venda_simulada_data(1, codigo_produto))
+
+    esperadas = [v['id_venda'] for v in venda_dao.buscar_vendas_flexivel(cpf_funcionario=CPF_FUNCIONARIO_TESTE)]
+
+    vistas = []
+    cursor = None
+    while True:
+        pagina = venda_dao.buscar_vendas_paginado(cursor=cursor, limite=2, cpf_funcionario=CPF_FUNCIONARIO_TESTE)
+        assert len(pagina['vendas']) <= 2
+        vistas.extend(v['id_venda'] for v in pagina['vendas'])
+        cursor = pagina['proximo_cursor']
+        if cursor is None:
+            break
+
+    assert len(esperadas) >= 3
+    assert vistas == esperadas
+
+
+def test_11_busca_por_cpf_e_data_usa_colunas_indexadas():
+    """ Filtro por CPF (com ou sem máscara na origem) e por data continuam encontrando a venda. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=24)
+    id_venda = venda_dao.registrar_venda(realizar_venda_simulada_data(1, codigo_produto))
+
+    vendas = venda_dao.buscar_vendas_flexivel(data_str=date.today().isoformat(), cpf_cliente=CPF_CLIENTE_TESTE)
+    assert id_venda in [v['id_venda'] for v in vendas]
+
+    vendas_outro_dia = venda_dao.buscar_vendas_flexivel(data_str='2000-01-01', cpf_cliente=CPF_CLIENTE_TESTE)
+    assert vendas_outro_dia == []
+
+
+def test_12_exportacao_em_lotes_agrupa_itens_por_venda():
+    """ A exportação (cursor no servidor, lotes pequenos) traz as mesmas vendas e itens da listagem. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=25)
+    for _ in range(2):
+        venda_dao.registrar_venda(realizar_venda_simulada_data(1, codigo_produto))
+
+    listadas = venda_dao.buscar_vendas_flexivel(cpf_funcionario=CPF_FUNCIONARIO_TESTE)
+    exportadas = list(venda_dao.exportar_vendas(tamanho_lote=1, cpf_funcionario=CPF_FUNCIONARIO_TESTE))
+
+    # Exportação é cronológica; a listagem, da mais recente para a mais antiga
+    assert [v['id_venda'] for v in exportadas] == [v['id_venda'] for v in reversed(listadas)]
+    assert [v['itens'] for v in exportadas] == [v['itens'] for v in reversed(listadas)]
+    assert exportadas[0]['pagamentos'][0]['descricao'] == 'Dinheiro'
+
+
+def test_13_reenvio_com_mesma_chave_devolve_recibo_original():
+    """ O reenvio com a mesma Idempotency-Key não duplica a venda nem baixa o estoque de novo. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=26)
+    dados_venda = realizar_venda_simulada_data(2, codigo_produto)
+    chave = str(uuid.uuid4())
+
+    recibo, repetida = venda_dao.registrar_venda_idempotente(dados_venda, chave)
+    assert recibo is not None and repetida is False
+
+    recibo_repetido, repetida = venda_dao.registrar_venda_idempotente(dados_venda, chave)
+    assert repetida is True
+    assert recibo_repetido['id_venda'] == recibo['id_venda']
+    assert buscar_estoque_local(codigo_produto) == 24
+
+    with pytest.raises(ChaveIdempotenciaReutilizadaError):
+        venda_dao.registrar_venda_idempotente(realizar_venda_simulada_data(1, codigo_produto), chave)
+
+
+def test_14_venda_recusada_libera_a_chave():
+    """ Se a venda falhar, a chave é desfeita junto e pode ser usada novamente. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=3)
+    chave = str(uuid.uuid4())
+
+    with pytest.raises(EstoqueInsuficienteError):
+        venda_dao.registrar_venda_idempotente(realizar_venda_simulada_data(5, codigo_produto), chave)
+
+    recibo, repetida = venda_dao.registrar_venda_idempotente(realizar_venda_simulada_data(1, codigo_produto), chave)
+    assert recibo is not None and repetida is False
+    assert buscar_estoque_local(codigo_produto) == 2
+
+
+def test_15_chave_em_andamento_retorna_erro_apos_espera():
+    """ Uma segunda requisição com a chave ainda em processamento espera e, esgotado o tempo, é recusada. """
+    chave = str(uuid.uuid4())
+    idempotencia_dao = IdempotenciaDAO(espera_segundos=0.2)
+    reservada = threading.Event()
+    liberar = threading.Event()
+
+    def venda_em_andamento():
+        with unit_of_work():
+            idempotencia_dao.reservar(chave, 'a' * 64)
+            reservada.set()
+            liberar.wait(5)
+            get_db_connection().rollback() # Simula a falha da primeira venda
+
+    thread = threading.Thread(target=venda_em_andamento)
+    thread.start()
+    try:
+        assert reservada.wait(5)
+        with pytest.raises(ChaveIdempotenciaEmUsoError):
+            with unit_of_work():
+                idempotencia_dao.reservar(chave, 'a' * 64)
+    finally:
+        liberar.set()
+        thread.join()
+
+
+def test_16_vendas_concorrentes_em_ordem_oposta_nao_falham():
+    """ Caixas vendendo os mesmos produtos em ordem oposta não geram deadlock nem perdem baixas. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    produto_a, _ = criar_produto_local(initial_quantity=50)
+    produto_b, _ = criar_produto_local(initial_quantity=51)
+    deadlocks_antes = get_retry_stats()['deadlocks']
+
+    def venda(primeiro, segundo):
+        return venda_schema.load({
+            "cpf_funcionario": CPF_FUNCIONARIO_TESTE,
+            "itens": [
+                {"codigo_produto": primeiro, "quantidade_venda": 1, "preco_unitario": Decimal('10.00')},
+                {"codigo_produto": segundo, "quantidade_venda": 1, "preco_unitario": Decimal('10.00')},
+            ],
+            "pagamentos": [{"id_tipo": ID_TIPO_PAGAMENTO_DINHEIRO, "valor_pago": Decimal('20.00')}]
+        })
+
+    falhas = []
+
+    def caixa(primeiro, segundo):
+        for _ in range(10):
+            if venda_dao.registrar_venda(venda(primeiro, segundo)) is None:
+                falhas.append((primeiro, segundo))
+
+    threads = [threading.Thread(target=caixa, args=ordem) for ordem in ((produto_a, produto_b), (produto_b, produto_a))]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert falhas == []
+    assert buscar_estoque_local(produto_a) == 30
+    assert buscar_estoque_local(produto_b) == 31
+    assert get_retry_stats()['deadlocks'] == deadlocks_antes
+
+
+def buscar_fracoes_local(codigo_produto: int):
+    """ Retorna {fracao: quantidade} das frações do produto. """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT fracao, quantidade FROM estoque_fracao WHERE codigo_produto = %s", (codigo_produto,))
+            return dict(cur.fetchall())
+    finally:
+        conn.close()
+
+
+def test_17_alta_rotatividade_baixa_na_fracao_do_caixa():
+    """ 
+    Produto de alta rotatividade: a venda baixa a fração do caixa sem tocar a linha
+    central; sem saldo na fração, recolhe as frações livres; o saldo lido é sempre o total.
+    """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=60)
+    estoque_dao = EstoqueDAO()
+    vendas_fracionadas = VendaDAO(usar_procedure=False, fracoes_estoque=4)
+
+    assert estoque_dao.definir_alta_rotatividade(codigo_produto, True) == 1
+    estoque_dao.redistribuir_fracoes(4)
+    assert buscar_fracoes_local(codigo_produto) == {0: 12, 1: 12, 2: 12, 3: 12}
+    assert buscar_estoque_local(codigo_produto) == 12
+    assert ProdutoDAO().find_by_id(codigo_produto)['quantidade'] == 60
+
+    # Cabe na fração do caixa: a linha central não é alterada
+    assert vendas_fracionadas.registrar_venda(realizar_venda_simulada_data(5, codigo_produto)) is not None
+    assert buscar_estoque_local(codigo_produto) == 12
+    assert sorted(buscar_fracoes_local(codigo_produto).values()) == [7, 12, 12, 12]
+
+    # Mesma regra no checkout via função do banco
+    venda_procedure_fracionada = VendaDAO(usar_procedure=True, fracoes_estoque=4)
+    assert venda_procedure_fracionada.registrar_venda(realizar_venda_simulada_data(2, codigo_produto)) is not None
+    assert buscar_estoque_local(codigo_produto) == 12
+    assert estoque_dao.find_by_product_id(codigo_produto)['quantidade'] == 53
+
+    # Maior que a fração: frações recolhidas para a linha central
+    assert vendas_fracionadas.registrar_venda(realizar_venda_simulada_data(30, codigo_produto)) is not None
+    assert ProdutoDAO().find_by_id(codigo_produto)['quantidade'] == 23
+
+    # Maior que o saldo total: falta reportada com o saldo real e nada é baixado
+    with pytest.raises(EstoqueInsuficienteError) as exc_info:
+        vendas_fracionadas.registrar_venda(realizar_venda_simulada_data(24, codigo_produto))
+    assert exc_info.value.faltas[0]['disponivel'] == 23
+
+    # Desmarcado: o rebalanceamento devolve tudo para a linha central
+    estoque_dao.definir_alta_rotatividade(codigo_produto, False)
+    estoque_dao.redistribuir_fracoes(4)
+    assert buscar_fracoes_local(codigo_produto) == {}
+    assert buscar_estoque_local(codigo_produto) == 23
+
+
+def test_18_lote_offline_grava_por_venda_e_aceita_reenvio():
+    """ Cada venda do lote tem seu resultado; a falha de uma não afeta as outras e o reenvio não duplica. """
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=27)
+
+    venda_antiga = realizar_venda_simulada_data(1, codigo_produto)
+    venda_antiga['data_venda'] = datetime(2025, 1, 15, 9, 30)
+    lote = [
+        (str(uuid.uuid4()), venda_antiga),
+        (str(uuid.uuid4()), realizar_venda_simulada_data(100, codigo_produto)),
+        (str(uuid.uuid4()), realizar_venda_simulada_data(2, codigo_produto)),
+    ]
+
+    resultados = venda_dao.registrar_vendas_em_lote(lote)
+    assert [r['status'] for r in resultados] == ['criada', 'estoque_insuficiente', 'criada']
+    assert buscar_estoque_local(codigo_produto) == 24
+    assert venda_dao.buscar_por_id(resultados[0]['id_venda'])['data_venda'] == datetime(2025, 1, 15, 9, 30)
+
+    reenvio = venda_dao.registrar_vendas_em_lote(lote)
+    assert [r['status'] for r in reenvio] == ['repetida', 'estoque_insuficiente', 'repetida']
+    assert [r.get('id_venda') for r in reenvio] == [r.get('id_venda') for r in resultados]
+    assert buscar_estoque_local(codigo_produto) == 24
+
+
+def test_19_agente_caixa_registra_offline_e_sincroniza(tmp_path):
+    """ Sem servidor central a venda fica no journal local (202); com o servidor no ar, é sincronizada uma única vez. """
+    from werkzeug.serving import make_server
+    from app import create_app
+    from agente_caixa.app import create_agent_app
+
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=28)
+
+    # Porta sem servidor: conexão recusada
+    agente = create_agent_app('http://127.0.0.1:9', str(tmp_path / 'caixa.db'), timeout=1)
+    sincronizador = agente.extensions['agente_caixa']
+    terminal = agente.test_client()
+
+    payload = {
+        "cpf_funcionario": CPF_FUNCIONARIO_TESTE,
+        "cpf_cliente": CPF_CLIENTE_TESTE,
+        "itens": [{"codigo_produto": codigo_produto, "quantidade_venda": 3, "preco_unitario": "10.00"}],
+        "pagamentos": [{"id_tipo": ID_TIPO_PAGAMENTO_DINHEIRO, "valor_pago": "50.00"}]
+    }
+    assert terminal.post('/api/v1/vendas', json={"itens": []}).status_code == 400
+
+    resposta = terminal.post('/api/v1/vendas', json=payload)
+    assert resposta.status_code == 202
+    assert resposta.get_json()['troco'] == '20.00'
+    chave = resposta.get_json()['chave_idempotencia']
+    assert sincronizador.drenar() == 0
+    assert sincronizador.journal.contagem_por_status()['pendente'] == 1
+    assert buscar_estoque_local(codigo_produto) == 28
+
+    servidor = make_server('127.0.0.1', 0, create_app(testing=True), threaded=True)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        sincronizador.cliente.url_base = f"http://127.0.0.1:{servidor.server_port}"
+        assert sincronizador.atualizar_catalogo()
+        assert terminal.get(f'/api/v1/produtos/{codigo_produto}').status_code == 200
+
+        assert terminal.post('/agente/sincronizar').get_json()['encerradas'] == 1
+        venda = sincronizador.journal.buscar_venda(chave)
+        assert venda['status'] == 'sincronizada'
+        assert buscar_estoque_local(codigo_produto) == 25
+
+        # Já sincronizada: um novo ciclo não reenvia
+        assert sincronizador.drenar() == 0
+        assert buscar_estoque_local(codigo_produto) == 25
+
+        # Online, a venda é confirmada na hora
+        online = terminal.post('/api/v1/vendas', json=payload)
+        assert online.status_code == 201
+        assert buscar_estoque_local(codigo_produto) == 22
+    finally:
+        servidor.shutdown()
+
+
+def test_20_busca_e_autocompletar_ordenam_pelos_mais_vendidos():
+    """ Entre produtos igualmente relevantes, o mais vendido recentemente aparece primeiro. """
+    from src.models.produto_dao import recarregar_indice_autocomplete
+
+    produto_dao = ProdutoDAO()
+    marca = f"zq{uuid.uuid4().hex[:6]}"
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    pouco_vendido, _ = criar_produto_local(initial_quantity=29)
+    mais_vendido, _ = criar_produto_local(initial_quantity=30)
+    produto_dao.update(pouco_vendido, nome=f"Arroz {marca} Agulhinha")
+    produto_dao.update(mais_vendido, nome=f"Arroz {marca} Branco")
+
+    # Venda antiga (fora da janela) do primeiro; vendas recentes do segundo
+    venda_antiga = realizar_venda_simulada_data(5, pouco_vendido)
+    venda_antiga['data_venda'] = datetime(2020, 1, 1, 10, 0)
+    venda_dao.registrar_venda(venda_antiga)
+    venda_dao.registrar_venda(realizar_venda_simulada_data(1, mais_vendido))
+    venda_dao.registrar_venda(realizar_venda_simulada_data(1, mais_vendido))
+
+    assert produto_dao.atualizar_popularidade(meia_vida_dias=14, janela_dias=90) >= 1
+
+    resultado = produto_dao.buscar(f"arroz {marca}")
+    assert [p['codigo_produto'] for p in resultado['produtos']] == [mais_vendido, pouco_vendido]
+
+    recarregar_indice_autocomplete()
+    assert [p['codigo_produto'] for p in produto_dao.autocompletar(f"arroz {marca}")] == [mais_vendido, pouco_vendido]
+
+
+def test_21_venda_online_reenviada_pelo_lote_com_data_e_repetida(tmp_path):
+    """
+    A venda confirmada online (POST /vendas com Idempotency-Key) e reenviada pelo journal
+    (POST /vendas/lote com a mesma chave e a data_venda) é reconhecida como a mesma venda.
+    """
+    from app import create_app
+    from agente_caixa.journal import JournalVendas
+    from agente_caixa.sincronizador import Sincronizador
+
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=31)
+    servidor = create_app(testing=True).test_client()
+
+    payload = {
+        "cpf_funcionario": CPF_FUNCIONARIO_TESTE,
+        "itens": [{"codigo_produto": codigo_produto, "quantidade_venda": 2, "preco_unitario": "10.00"}],
+        "pagamentos": [{"id_tipo": ID_TIPO_PAGAMENTO_DINHEIRO, "valor_pago": "20.00"}]
+    }
+    chave = str(uuid.uuid4())
+    online = servidor.post('/api/v1/vendas/', json=payload, headers={'Idempotency-Key': chave})
+    assert online.status_code == 201
+
+    reenvio = servidor.post('/api/v1/vendas/lote', json={'vendas': [
+        {**payload, 'chave_idempotencia': chave, 'data_venda': datetime.now().isoformat(timespec='seconds')}
+    ]})
+    resultado = reenvio.get_json()['resultados'][0]
+    assert resultado['status'] == 'repetida'
+    assert resultado['id_venda'] == online.get_json()['id_venda']
+    assert buscar_estoque_local(codigo_produto) == 29
+
+    # No agente, a venda que o POST /vendas ainda está enviando não entra no lote da sincronização
+    class ClienteRegistrador:
+        def __init__(self):
+            self.lotes = []
+
+        def enviar_lote(self, vendas):
+            self.lotes.append([v['chave_idempotencia'] for v in vendas])
+            return [{'status': 'criada', 'id_venda': 1} for _ in vendas]
+
+    journal = JournalVendas(str(tmp_path / 'caixa.db'))
+    sincronizador = Sincronizador(journal, ClienteRegistrador())
+    with sincronizador.envio_online('em-envio'):
+        journal.registrar_venda(payload, 'em-envio')
+        assert sincronizador.drenar() == 0
+        assert sincronizador.cliente.lotes == []
+    assert sincronizador.drenar() == 1
+    assert sincronizador.cliente.lotes == [['em-envio']]
+
+
+def test_22_falha_na_exportacao_nao_gera_arquivo_completo(monkeypatch):
+    """ Falha antes do primeiro lote responde 500; falha no meio do stream interrompe a transferência. """
+    from app import create_app
+    from src.controllers import venda_controller
+
+    garantir_caixa_aberto(CPF_FUNCIONARIO_TESTE)
+    codigo_produto, _ = criar_produto_local(initial_quantity=32)
+    for _ in range(2):
+        venda_dao.registrar_venda(realizar_venda_simulada_data(1, codigo_produto))
+    servidor = create_app(testing=True).test_client()
+    url = f'/api/v1/vendas/exportar?cpf_funcionario={CPF_FUNCIONARIO_TESTE}'
+
+    def falha_sempre(venda):
+        raise RuntimeError("conexão perdida")
+    monkeypatch.setattr(venda_controller.venda_dao, '_pagamentos_da_venda', falha_sempre)
+    resposta = servidor.get(url)
+    assert resposta.status_code == 500
+
+    original = VendaDAO._pagamentos_da_venda
+    chamadas = []
+    def falha_na_segunda(venda):
+        chamadas.append(venda['id_venda'])
+        if len(chamadas) > 1:
+            raise RuntimeError("conexão perdida")
+        return original(venda)
+    monkeypatch.setattr(venda_controller.venda_dao, '_pagamentos_da_venda', falha_na_segunda)
+    resposta = servidor.get(url, buffered=False)
+    assert resposta.status_code == 200
+    with pytest.raises(RuntimeError):
+        resposta.get_data()
+
+
+def test_23_agente_caixa_repassa_consultas_de_produto_com_parametros(tmp_path):
+    """ Com parâmetros, a listagem de produtos vai ao servidor central; sem conexão, só ?ids= sai do catálogo local. """
+    from werkzeug.serving import make_server
+    from app import create_app
+    from agente_caixa.app import create_agent_app
+
+    codigo_produto, _ = criar_produto_local(initial_quantity=33)
+    agente = create_agent_app('http://127.0.0.1:9', str(tmp_path / 'caixa.db'), timeout=1)
+    sincronizador = agente.extensions['agente_caixa']
+    terminal = agente.test_client()
+
+    servidor = make_server('127.0.0.1', 0, create_app(testing=True), threaded=True)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        sincronizador.cliente.url_base = f"http://127.0.0.1:{servidor.server_port}"
+        assert sincronizador.atualizar_catalogo()
+
+        locais = terminal.get('/api/v1/produtos').get_json()
+        assert codigo_produto in [p['codigo_produto'] for p in locais]
+
+        pagina = terminal.get('/api/v1/produtos?limite=1')
+        assert len(pagina.get_json()) == 1
+        assert pagina.headers.get('X-Next-Cursor')
+
+        por_ids = terminal.get(f'/api/v1/produtos?ids={codigo_produto},999999999').get_json()
+        assert [p['codigo_produto'] for p in por_ids['produtos']] == [codigo_produto]
+        assert por_ids['nao_encontrados'] == [999999999]
+    finally:
+        servidor.shutdown()
+
+    # Sem conexão: ?ids= responde pelo catálogo local, no mesmo formato; o resto não tem como ser atendido
+    sincronizador.cliente.url_base = 'http://127.0.0.1:9'
+    offline = terminal.get(f'/api/v1/produtos?ids=999999999,{codigo_produto}')
+    assert offline.status_code == 200
+    assert [p['codigo_produto'] for p in offline.get_json()['produtos']] == [codigo_produto]
+    assert offline.get_json()['nao_encontrados'] == [999999999]
+    assert terminal.get('/api/v1/produtos?ids=abc').status_code == 400
+    assert terminal.get('/api/v1/produtos?q=Prod').status_code == 503
+    assert terminal.get('/api/v1/produtos?limite=1').status_code == 503
+
+
+def test_24_agente_caixa_mantem_pendente_resposta_sem_json_e_chave_em_uso(tmp_path, monkeypatch):
+    """ Resposta que não é da API (ex.: 404 em HTML) ou chave em processamento (409) deixam a venda pendente (202). """
+    import json
+    from agente_caixa.app import create_agent_app
+
+    class RespostaFalsa:
+        def __init__(self, status_code, corpo):
+            self.status_code = status_code
+            self.corpo = corpo
+
+        def json(self):
+            return json.loads(self.corpo)
+
+    agente = create_agent_app('http://127.0.0.1:9', str(tmp_path / 'caixa.db'), timeout=1)
+    sincronizador = agente.extensions['agente_caixa']
+    terminal = agente.test_client()
+    payload = {
+        "cpf_funcionario": CPF_FUNCIONARIO_TESTE,
+        "itens": [{"codigo_produto": 1, "quantidade_venda": 1, "preco_unitario": "10.00"}],
+        "pagamentos": [{"id_tipo": ID_TIPO_PAGAMENTO_DINHEIRO, "valor_pago": "10.00"}]
+    }
+
+    respostas = [
+        RespostaFalsa(404, '<html>Not Found</html>'),
+        RespostaFalsa(409, '{"message": "Venda com esta chave ainda em processamento.", "status": "Error"}'),
+        RespostaFalsa(409, '{"message": "Estoque insuficiente.", "faltas": [], "status": "Error"}'),
+    ]
+    monkeypatch.setattr(sincronizador.cliente, 'enviar_venda', lambda venda: respostas.pop(0))
+
+    for _ in range(2):
+        resposta = terminal.post('/api/v1/vendas', json=payload)
+        assert resposta.status_code == 202
+        assert sincronizador.journal.buscar_venda(resposta.get_json()['chave_idempotencia'])['status'] == 'pendente'
+
+    # Recusa de negócio continua chegando ao operador
+    assert terminal.post('/api/v1/vendas', json=payload).status_code == 409
+    assert sincronizador.journal.contagem_por_status() == {'pendente': 2, 'sincronizada': 0, 'rejeitada': 1}
+
+
+def test_25_listagem_com_cursor_adulterado_ou_erro_de_banco_nao_vira_fim_da_lista(monkeypatch):
+    """ Cursor com valores de tipo errado responde 400; erro de banco responde 500 (e não uma página vazia). """
+    from app import create_app
+    from src.controllers import venda_controller
+    from src.utils.pagination import encode_cursor, CursorInvalidoError
+
+    servidor = create_app(testing=True).test_client()
+    for cursor in (encode_cursor("nao-e-data", 1), encode_cursor("2024-01-01T10:00:00", "x"), encode_cursor(None, 1)):
+        with pytest.raises(CursorInvalidoError):
+            venda_dao.buscar_vendas_paginado(cursor=cursor)
+        assert servidor.get(f'/api/v1/vendas/?cursor={cursor}').status_code == 400
+    assert servidor.get('/api/v1/vendas/?data=ontem').status_code == 400
+
+    def falha(cur, vendas):
+        raise RuntimeError("conexão perdida")
+    monkeypatch.setattr(venda_controller.venda_dao, '_anexar_itens_e_pagamentos', falha)
+    resposta = servidor.get('/api/v1/vendas/?limite=1')
+    assert resposta.status_code == 500
+    assert 'X-Next-Cursor' not in resposta.headers
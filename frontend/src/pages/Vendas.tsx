@@ -1,5 +1,5 @@
 
-import { useState, useEffect, useMemo } from 'react';
+import { useState, useEffect, useMemo, useRef } from 'react';
 import { LayoutBase } from "../shared/layouts/LayoutBase";
 import { ListTable, type IColumn } from "../shared/components/ListTable";
 import { Filters } from "../shared/components/Filters";
@@ -51,26 +51,41 @@ const Vendas = () => {
         }
     ], []);
 
+    // Cursor de cada página já visitada (a listagem do backend é paginada por cursor)
+    const cursores = useRef<(string | null)[]>([null]);
+
     // Função para buscar dados
     const fetchData = () => {
+        const cursor = cursores.current[page];
+        // Página sem cursor conhecido (filtros acabaram de mudar): a busca da página 0 vem em seguida
+        if (cursor === undefined) return;
+
         setIsLoading(true);
-        // O serviço getAll espera (page, filterData, filterCpf)
         // Nota: O backend parece esperar data no formato YYYY-MM-DD para filtro exato, 
         // ou podemos ajustar conforme a necessidade.
-        VendaService.getAll(page + 1, busca.data, busca.cpf)
+        VendaService.getAll(rowsPerPage, cursor, busca.data, busca.cpf)
             .then((result) => {
                 if (result instanceof Error) {
                     alert(result.message);
                 } else {
-                    setTotalCount(result.totalCount);
-                    const start = page * rowsPerPage;
-                    const end = start + rowsPerPage;
-                    setRows(result.data.slice(start, end));
+                    setRows(result.data);
+                    if (result.proximoCursor) {
+                        cursores.current[page + 1] = result.proximoCursor;
+                        setTotalCount(-1); // Total desconhecido até chegar à última página
+                    } else {
+                        setTotalCount(page * rowsPerPage + result.data.length);
+                    }
                 }
             })
             .finally(() => setIsLoading(false));
     };
 
+    useEffect(() => {
+        // Filtros ou tamanho de página novos: os cursores anteriores não valem mais
+        cursores.current = [null];
+        setPage(0);
+    }, [rowsPerPage, busca]);
+
     useEffect(() => {
         fetchData();
     }, [page, rowsPerPage, busca]); // Recarrega quando filtros mudam
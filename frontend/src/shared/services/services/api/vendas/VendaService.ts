@@ -50,24 +50,26 @@ const create = async (dados: Omit<IVenda, 'id_venda'>): Promise<number | Error>
     }
 };
 
-const getAll = async (p0: number, filterData = '', filterCpf = ''): Promise<{ data: IVenda[], totalCount: number } | Error> => {
+export interface IPaginaVendas {
+    data: IVenda[];
+    proximoCursor: string | null; // Cabeçalho X-Next-Cursor: ausente na última página
+}
+
+const getAll = async (limite: number, cursor: string | null = null, filterData = '', filterCpf = ''): Promise<IPaginaVendas | Error> => {
     try {
-        let url = '/vendas';
         const params = new URLSearchParams();
 
+        params.append('limite', String(limite));
+        if (cursor) params.append('cursor', cursor);
         if (filterData) params.append('data', filterData);
         if (filterCpf) params.append('cpf', filterCpf);
 
-        if (params.toString()) {
-            url += `?${params.toString()}`;
-        }
-
-        const { data } = await Api.get(url);
+        const { data, headers } = await Api.get(`/vendas?${params.toString()}`);
 
         if (data) {
             return {
                 data: data,
-                totalCount: data.length,
+                proximoCursor: headers['x-next-cursor'] || null,
             };
         }
 